@@ -0,0 +1,48 @@
+import io
+from timeit import timeit
+
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.compiler import Compiler
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+
+def make_program(branches: int, statements: int) -> str:
+    """Returns a program of branches that are rarely taken, one in fifty."""
+    body = "".join(
+        f"    y = y * {i % 7 + 1} + x - {i % 5} / 2;\n" for i in range(statements)
+    )
+    return "var x = 3;\nvar y;\n" + "".join(
+        f"if (x == {i % 50}) {{\n{body}}} else {{\n  y = y + 1;\n}}\n"
+        for i in range(branches)
+    )
+
+
+def main(branches: int = 200, statements: int = 20, number: int = 10):
+    source = make_program(branches, statements)
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(Tokenizer().iter_tokens(io.StringIO(source)))
+    vm = VirtualMachine(io.StringIO())
+
+    def run(lazy: bool) -> int:
+        compiler = Compiler(lazy=lazy)
+        bytecode = compiler.compile_tree(tree)
+        _ = vm.run(bytecode, compiler.compile_branch)
+        return len(bytecode)
+
+    eager_size, lazy_size = run(False), run(True)
+    eager_time = timeit(lambda: run(False), number=number)
+    lazy_time = timeit(lambda: run(True), number=number)
+    print(f"{branches} branches of {statements} statements, one in 50 taken")
+    print(
+        f"{'eager compile and run':<24}{eager_time / number * 1e3:>10.2f}ms"
+        f"{eager_size:>10} instructions"
+    )
+    print(
+        f"{'lazy compile and run':<24}{lazy_time / number * 1e3:>10.2f}ms"
+        f"{lazy_size:>10} instructions{eager_time / lazy_time:>9.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from timeit import timeit
+
+from src.evaluator import Evaluator
+
+# expressions exercised by tests/test_evaluator.py
+EXPRESSIONS = [
+    "1 + 2 * 4 - 3",
+    "1 + 2 * (4 - 3)",
+    "(1 + 2) * 4 - 3",
+    "(1 + 2) * (((4 - 3)-2))",
+    "1 + 2 * - 4 - 3",
+    "-((1 + 2)/((6*-7)+(7*-4)/2)-3)",
+    "2+4+6+8-4*3-3*4-1/3*2",
+    "0x1 + 0b10 * 4 - 3.0",
+    "x + 4",
+    "x + y",
+    "3 == 3",
+    "3 != 4",
+    "if (x > 3)",
+]
+
+
+def main(number: int = 20_000):
+    print(f"{'expression':<36}{'evaluate':>12}{'compiled':>12}{'speedup':>10}")
+    for expr in EXPRESSIONS:
+        evaluator = Evaluator(variables={"x": 4.0, "y": 3.0})
+        function = evaluator.compile(expr)
+        variables = {"x": 4.0, "y": 3.0}
+        evaluate_time = timeit(lambda: evaluator.evaluate(expr), number=number)
+        compiled_time = timeit(lambda: function(variables), number=number)
+        print(
+            f"{expr:<36}"
+            f"{evaluate_time / number * 1e6:>10.2f}us"
+            f"{compiled_time / number * 1e6:>10.2f}us"
+            f"{evaluate_time / compiled_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
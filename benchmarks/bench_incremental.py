@@ -0,0 +1,47 @@
+import io
+from timeit import timeit
+
+from benchmarks.suite import script
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.incremental import IncrementalParser
+from src.tokenizer import Tokenizer
+
+
+def full_parse(source: str) -> AbstractSyntaxTree:
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(Tokenizer().iter_tokens(io.StringIO(source)))
+    return tree
+
+
+def main(sizes: tuple[int, ...] = (5_000, 50_000), number: int = 20):
+    print(f"{'lines':>8}{'full parse':>14}{'replace_lines':>16}{'update':>12}{'tree':>12}")
+    for size in sizes:
+        # blocks of script() are 15 lines
+        source = script(size // 15)
+        lines = source.split("\n")
+        middle = len(lines) // 2
+        edits = [f"x{middle} = x{middle} + {i};" for i in range(number)]
+        parser = IncrementalParser(source)
+
+        full = timeit(lambda: full_parse(source), number=1)
+
+        def replace() -> None:
+            for edit in edits:
+                parser.replace_lines(middle, middle + 1, edit + "\n")
+
+        def update() -> None:
+            for edit in edits:
+                parser.update("\n".join(lines[:middle] + [edit] + lines[middle + 1 :]))
+
+        replace_time = timeit(replace, number=1) / number
+        update_time = timeit(update, number=1) / number
+        tree_time = timeit(parser.tree, number=1)
+        assert parser.tree() == full_parse(parser.source)
+        print(
+            f"{len(lines):>8}{full * 1e3:>12.2f}ms{replace_time * 1e3:>14.3f}ms"
+            f"{update_time * 1e3:>10.3f}ms{tree_time * 1e3:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import io
+from timeit import timeit
+
+from src.compiler import Compiler
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+SOURCE = """
+var i;
+var total;
+while (i < {iterations}) {{
+    if ((i % 3) == 0) {{ total = total + i * 2; }}
+    total = total - i / 4;
+    i = i + 1;
+}}
+"""
+
+
+def main(iterations: int = 100_000, number: int = 5):
+    source = SOURCE.format(iterations=iterations)
+    bytecode = Compiler().compile(Tokenizer().iter_tokens(io.StringIO(source)))
+    interpreter = VirtualMachine(io.StringIO(), jit_threshold=None)
+    jit = VirtualMachine(io.StringIO())
+
+    interpreter_time = timeit(lambda: interpreter.run(bytecode), number=number)
+    jit_time = timeit(lambda: jit.run(bytecode), number=number)
+    print(f"{iterations} loop iterations")
+    print(f"{'interpreter':<24}{interpreter_time / number * 1e3:>10.2f}ms")
+    print(
+        f"{'tracing jit':<24}{jit_time / number * 1e3:>10.2f}ms"
+        f"{interpreter_time / jit_time:>9.1f}x"
+    )
+    assert jit.jit is not None
+    print(jit.jit.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+from pathlib import Path
+
+from src.parallel_compile import compile_directory
+
+
+def make_script(index: int, blocks: int) -> str:
+    return "".join(
+        f"var x{i};\nx{i} = {(index + i) % 10};\n"
+        f"while (x{i} < 100) {{\n  if (x{i} % 2) {{\n    x{i} = x{i} + 3;\n"
+        f"  }} else {{\n    x{i} = x{i} * 2 + 1;\n  }}\n}}\nprint(x{i});\n"
+        for i in range(blocks)
+    )
+
+
+def main(files: int = 400, blocks: int = 40):
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(files):
+            # sizes vary tenfold, as they do in a real tree of scripts
+            text = make_script(index, blocks * (index % 10 + 1) // 5)
+            _ = (Path(directory) / f"script{index}.joy").write_text(text)
+        cores = os.cpu_count() or 1
+        jobs = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+        base = None
+        print(f"{files} files on {cores} cores")
+        for count in jobs:
+            summary = compile_directory(directory, count)
+            assert not summary.errors, summary.report()
+            base = base or summary.seconds
+            print(
+                f"{count:>3} jobs {summary.seconds:>8.2f}s"
+                f"{base / summary.seconds:>8.2f}x speedup"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+from pathlib import Path
+from timeit import repeat
+
+from benchmarks.bench_program import make_statements
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.compiler import Compiler
+from src.evaluator import Evaluator
+from src.interpreter import profile
+from src.profiler import Profiler
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+
+def make_program(statements: int) -> str:
+    body = "".join(f"    x = x + i * {i % 7 + 1};\n" for i in range(statements))
+    return f"var x;\nvar i;\nwhile (i < 200) {{\n{body}    i = i + 1;\n}}\n"
+
+
+def bare_run(source_path: str) -> dict[str, float | str]:
+    """profile's pipeline with no phases around its steps."""
+    source = Path(source_path).read_bytes()
+    tokens = list(Tokenizer().iter_tokens(io.TextIOWrapper(io.BytesIO(source))))
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(tokens)
+    return VirtualMachine().run(Compiler().compile_tree(tree))
+
+
+def best(function, number: int) -> float:
+    # the minimum of a few repeats, the overhead measured is within noise
+    return min(repeat(function, number=number, repeat=5))
+
+
+def row(name: str, seconds: float, number: int, baseline: float) -> str:
+    return f"{name:<32}{seconds / number * 1e3:>10.3f}ms{seconds / baseline:>9.3f}x"
+
+
+def main(statements: int = 10_000, number: int = 5):
+    source = ";\n".join(make_statements(statements)) + ";\n"
+    plain = best(lambda: Evaluator().evaluate_program(source), number)
+    disabled = best(
+        lambda: Evaluator().evaluate_program(source, Profiler(enabled=False)), number
+    )
+    enabled = best(lambda: Evaluator().evaluate_program(source, Profiler()), number)
+    print(f"evaluate_program, {statements} statements")
+    print(row("no profiler", plain, number, plain))
+    print(row("disabled profiler", disabled, number, plain))
+    print(row("enabled profiler", enabled, number, plain))
+
+    fd, source_path = tempfile.mkstemp(suffix=".joy")
+    with os.fdopen(fd, "w") as f:
+        _ = f.write(make_program(20))
+    try:
+        plain = best(lambda: bare_run(source_path), number)
+        disabled = best(lambda: profile(source_path, Profiler(enabled=False)), number)
+        enabled = best(lambda: profile(source_path, Profiler()), number)
+    finally:
+        os.remove(source_path)
+    print("run on the VM, 20 statement loop of 200 iterations")
+    print(row("no phases", plain, number, plain))
+    print(row("disabled profiler", disabled, number, plain))
+    print(row("enabled profiler", enabled, number, plain))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from timeit import timeit
+
+from src.evaluator import Evaluator
+
+
+def make_statements(count: int) -> list[str]:
+    """Returns declarations of constants mixed with expressions reading them."""
+    statements = []
+    for i in range(count):
+        if i % 4 == 0:
+            statements.append(f"var v{i} = {i % 9} * 3 + {i % 5} / 2")
+        else:
+            base = i - i % 4
+            statements.append(f"(v{base} + {i % 7}) * v{base} - {i % 3}")
+    return statements
+
+
+def main(count: int = 100_000, number: int = 3):
+    statements = make_statements(count)
+    source = ";\n".join(statements) + ";\n"
+
+    def per_line() -> list[float]:
+        evaluator = Evaluator()
+        return [evaluator.evaluate(statement) for statement in statements]
+
+    def whole_program() -> list[float]:
+        return Evaluator().evaluate_program(source)
+
+    assert per_line() == whole_program()
+    line_time = timeit(per_line, number=number)
+    program_time = timeit(whole_program, number=number)
+    print(f"{count} statements")
+    print(f"{'evaluate per line':<24}{line_time / number * 1e3:>10.2f}ms")
+    print(
+        f"{'evaluate_program':<24}{program_time / number * 1e3:>10.2f}ms"
+        f"{line_time / program_time:>9.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
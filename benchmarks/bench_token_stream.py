@@ -0,0 +1,32 @@
+import tracemalloc
+
+from src.tokenizer import Tokenizer, TokenizerBackend
+
+
+def generate_expression(terms: int) -> str:
+    return " + ".join(f"(x{i} * {i + 1}.5 - 0x{i:x})" for i in range(terms))
+
+
+def traced_size(build) -> tuple[int, int]:
+    tracemalloc.start()
+    result = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, len(result)
+
+
+def main(terms: int = 50_000):
+    expr = generate_expression(terms)
+    list_size, count = traced_size(
+        lambda: Tokenizer(TokenizerBackend.TABLE).tokenize(expr)
+    )
+    stream_size, _ = traced_size(lambda: Tokenizer().tokenize_stream(expr))
+
+    print(f"tokens: {count}")
+    print(f"list[Token]: {list_size:>12} bytes {list_size / count:8.1f} bytes/token")
+    print(f"TokenStream: {stream_size:>12} bytes {stream_size / count:8.1f} bytes/token")
+    print(f"ratio:       {list_size / stream_size:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
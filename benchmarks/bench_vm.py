@@ -0,0 +1,67 @@
+import io
+from timeit import timeit
+
+from src.compiler import Compiler
+from src.evaluator import Evaluator
+from src.peephole import optimize_bytecode
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+
+def make_program(statements: int) -> tuple[str, list[str]]:
+    """Returns a program in the style of examples/sum.joy and its expressions."""
+    expressions = [
+        f"x * {i % 7 + 1} + y - {i % 5} / 2" if i % 2 else f"(x + {i}) * (y - 1)"
+        for i in range(statements)
+    ]
+    source = "var x = 2;\nvar y = 3;\nvar z;\n" + "".join(
+        f"z = {expression};\n" for expression in expressions
+    )
+    return source, expressions
+
+
+def main(statements: int = 1_000, number: int = 20):
+    source, expressions = make_program(statements)
+    bytecode = Compiler().compile(Tokenizer().iter_tokens(io.StringIO(source)))
+    plain = Compiler(optimize=False).compile(
+        Tokenizer().iter_tokens(io.StringIO(source))
+    )
+    optimized, report = optimize_bytecode(plain)
+    vm = VirtualMachine(io.StringIO())
+
+    def evaluate_lines():
+        # what running a program line by line through Evaluator costs
+        evaluator = Evaluator(variables={"x": 2.0, "y": 3.0}, cache_size=0)
+        for expression in expressions:
+            evaluator.variables["z"] = evaluator.evaluate(expression)
+
+    evaluate_time = timeit(evaluate_lines, number=number)
+    vm_time = timeit(lambda: vm.run(bytecode), number=number)
+    plain_time = timeit(lambda: vm.run(plain), number=number)
+    plain_dispatches = vm.dispatches
+    optimized_time = timeit(lambda: vm.run(optimized), number=number)
+    optimized_dispatches = vm.dispatches
+    compile_time = timeit(
+        lambda: Compiler().compile(Tokenizer().iter_tokens(io.StringIO(source))),
+        number=number,
+    )
+    print(f"{statements} statements, {len(bytecode)} instructions")
+    print(f"{'evaluate per line':<24}{evaluate_time / number * 1e3:>10.2f}ms")
+    print(f"{'compile to bytecode':<24}{compile_time / number * 1e3:>10.2f}ms")
+    print(
+        f"{'run bytecode':<24}{vm_time / number * 1e3:>10.2f}ms"
+        f"{evaluate_time / vm_time:>9.1f}x"
+    )
+    print(
+        f"{'unoptimized bytecode':<24}{plain_time / number * 1e3:>10.2f}ms"
+        f"{plain_dispatches:>10} dispatches"
+    )
+    print(
+        f"{'peephole only':<24}{optimized_time / number * 1e3:>10.2f}ms"
+        f"{optimized_dispatches:>10} dispatches"
+        f"  ({report.instructions_before} -> {report.instructions_after} instructions)"
+    )
+
+
+if __name__ == "__main__":
+    main()
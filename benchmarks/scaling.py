@@ -0,0 +1,179 @@
+import io
+import math
+from collections.abc import Callable
+from timeit import repeat
+
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.compiler import Compiler
+from src.evaluator import Evaluator
+from src.tokenizer import Tokenizer, TokenizerBackend
+from src.vm import VirtualMachine
+
+# input sizes a phase runs at, as multiples of its base size
+SIZES = (1, 10, 100)
+# the growth exponent above which a phase counts as superlinear, linear
+# phases fit about 1 and fixed costs pull small sizes below that
+MAX_EXPONENT = 1.3
+
+
+def expression(terms: int) -> str:
+    return " + ".join(f"(x * {i % 9 + 1} - 0x{i % 255:x})" for i in range(terms))
+
+
+def nested(depth: int) -> str:
+    return "(" * depth + "1" + " + 1)" * depth
+
+
+def chain(terms: int) -> str:
+    return f"var x = 1;\nprint({' + '.join(['x'] * terms)});\n"
+
+
+def program(statements: int) -> str:
+    body = "".join(f"  y = y + x * {i % 7 + 1};\n" for i in range(statements))
+    return f"var x = 2;\nvar y;\nif (x > 1) {{\n{body}}}\nprint(y);\n"
+
+
+def _tokens(source: str) -> list:
+    return list(Tokenizer().iter_tokens(io.StringIO(source)))
+
+
+def _tree(source: str) -> AbstractSyntaxTree:
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(_tokens(source))
+    return tree
+
+
+class Phase:
+    """
+    A phase of running Joy code. setup builds its input for a size outside
+    the timing, run is the part timed.
+    """
+
+    name: str
+    base: int
+    setup: Callable[[int], object]
+    run: Callable[[object], object]
+
+    def __init__(
+        self,
+        name: str,
+        base: int,
+        setup: Callable[[int], object],
+        run: Callable[[object], object],
+    ) -> None:
+        self.name = name
+        self.base = base
+        self.setup = setup
+        self.run = run
+
+
+def _rpn_input(source: str) -> tuple[Evaluator, list]:
+    return Evaluator(variables={"x": 3.0}), Tokenizer().tokenize(source)
+
+
+def _create_rpn(state: tuple[Evaluator, list]) -> object:
+    evaluator, tokens = state
+    return evaluator._create_rpn_from_tokens(tokens)
+
+
+def _solve_input(terms: int) -> tuple[Evaluator, object]:
+    evaluator, tokens = _rpn_input(expression(terms))
+    return evaluator, evaluator._create_rpn_from_tokens(tokens)
+
+
+def _solve_rpn(state: tuple[Evaluator, object]) -> object:
+    evaluator, rpn = state
+    # _solve_rpn consumes the stack, so it works on a copy
+    return evaluator._solve_rpn(rpn.copy())
+
+
+def _parse(tokens: list) -> object:
+    return AbstractSyntaxTree().parse_tokens(tokens)
+
+
+PHASES = [
+    Phase("tokenize", 50, expression, lambda source: Tokenizer().tokenize(source)),
+    Phase(
+        "tokenize_long_string",
+        10_000,
+        lambda length: f'print("{"a" * length}");',
+        lambda source: Tokenizer().tokenize(source),
+    ),
+    Phase(
+        "tokenize_table",
+        50,
+        expression,
+        lambda source: Tokenizer(TokenizerBackend.TABLE).tokenize(source),
+    ),
+    Phase("iter_tokens", 50, expression, _tokens),
+    Phase(
+        "create_rpn", 50, lambda terms: _rpn_input(expression(terms)), _create_rpn
+    ),
+    Phase(
+        "create_rpn_nested", 20, lambda depth: _rpn_input(nested(depth)), _create_rpn
+    ),
+    Phase("solve_rpn", 50, _solve_input, _solve_rpn),
+    Phase(
+        "evaluate_program",
+        20,
+        lambda statements: ";\n".join([expression(5)] * statements),
+        lambda source: Evaluator(variables={"x": 3.0}).evaluate_program(source),
+    ),
+    Phase("parse", 20, lambda statements: _tokens(program(statements)), _parse),
+    Phase(
+        "compile",
+        20,
+        lambda statements: _tree(program(statements)),
+        lambda tree: Compiler().compile_tree(tree),
+    ),
+    Phase(
+        "compile_chain",
+        100,
+        lambda terms: _tree(chain(terms)),
+        lambda tree: Compiler().compile_tree(tree),
+    ),
+    Phase(
+        "run",
+        20,
+        lambda statements: Compiler().compile_tree(_tree(program(statements))),
+        lambda bytecode: VirtualMachine(io.StringIO()).run(bytecode),
+    ),
+]
+
+
+def growth_exponent(sizes: list[int], seconds: list[float]) -> float:
+    """The slope of the least squares line through log size and log time."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(time) for time in seconds]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    return covariance / sum((x - mean_x) ** 2 for x in xs)
+
+
+def measure(
+    phase: Phase, sizes: tuple[int, ...] = SIZES, repeats: int = 3
+) -> list[float]:
+    """
+    Best time of one run of phase at every size. The smallest sizes run ten
+    times per timing, so their fixed costs do not vanish in timer noise.
+    """
+    times = []
+    for size in sizes:
+        value = phase.setup(phase.base * size)
+        number = max(1, 10 // size)
+        best = min(repeat(lambda: phase.run(value), number=number, repeat=repeats))
+        times.append(best / number)
+    return times
+
+
+def main():
+    for phase in PHASES:
+        times = measure(phase)
+        exponent = growth_exponent([phase.base * size for size in SIZES], times)
+        timings = "".join(f"{time * 1e3:>10.3f}ms" for time in times)
+        verdict = "ok" if exponent <= MAX_EXPONENT else "SUPERLINEAR"
+        print(f"{phase.name:<22}{timings}{exponent:>8.2f} {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import io
+import json
+import sys
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.compiler import Compiler
+from src.evaluator import Evaluator
+from src.joyTypes.Token import TokenType
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+# the fraction a throughput may drop, or peak memory grow, by before a
+# benchmark counts as regressed, unless the baseline file sets another
+DEFAULT_THRESHOLD = 0.25
+_REPEATS = 3
+
+
+def arithmetic_chains(statements: int, terms: int) -> str:
+    """Statements adding and multiplying terms numbers each."""
+    return "".join(
+        " + ".join(f"{(i * 7 + j) % 97} * {j % 5 + 1}" for j in range(terms)) + ";\n"
+        for i in range(statements)
+    )
+
+
+def nested_parentheses(statements: int, depth: int) -> str:
+    """Statements with their operands nested depth parentheses deep."""
+    return "".join(
+        "(" * depth
+        + f"{i % 9 + 1}"
+        + "".join(f" + {j % 4})" if j % 2 else f" * 1)" for j in range(depth))
+        + ";\n"
+        for i in range(statements)
+    )
+
+
+def literals(statements: int, terms: int) -> str:
+    """Statements of hexadecimal and binary literals."""
+    return "".join(
+        " + ".join(
+            f"0x{(i + j) * 2654435761 % 65536:x}"
+            if j % 2
+            else f"0b{(i + j) * 40503 % 1024:b}"
+            for j in range(terms)
+        )
+        + ";\n"
+        for i in range(statements)
+    )
+
+
+def many_variables(variables: int) -> str:
+    """Declares variables names, then reads each of them in an expression."""
+    declarations = "".join(f"var v{i} = {i % 50} + 1;\n" for i in range(variables))
+    reads = "".join(
+        f"v{i} * 2 + v{(i * 31) % variables} - v{(i * 17) % variables};\n"
+        for i in range(variables)
+    )
+    return declarations + reads
+
+
+def script(blocks: int) -> str:
+    """A program of blocks modeled on examples/, every block its own names."""
+    parts = []
+    for i in range(blocks):
+        parts.append(
+            f"var x{i};\nx{i} = {i % 10};\nvar y{i};\ny{i} = 2;\n"
+            f"x{i} = x{i} + y{i} * 3;\n"
+            f"if (x{i} % 2) {{\n  y{i} = y{i} + x{i};\n}} else {{\n"
+            f"  y{i} = y{i} - 1;\n}}\n"
+            f"var i{i};\nwhile (i{i} < 10) {{\n  x{i} = x{i} + i{i};\n"
+            f"  i{i} = i{i} + 1;\n}}\n"
+        )
+    return "".join(parts) + "print(x0);\n"
+
+
+def _tokens(source: str) -> list:
+    return list(Tokenizer().iter_tokens(io.StringIO(source)))
+
+
+def _statements(tokens: list) -> int:
+    return sum(token.type == TokenType.END_OF_STATEMENT for token in tokens)
+
+
+def _tokenize(source: str) -> Callable[[], object]:
+    return lambda: Tokenizer().tokenize(source)
+
+
+def _evaluate(source: str) -> Callable[[], object]:
+    return lambda: Evaluator().evaluate_program(source)
+
+
+def _run(source: str) -> Callable[[], object]:
+    def run() -> object:
+        tree = AbstractSyntaxTree()
+        _ = tree.parse_tokens(_tokens(source))
+        return VirtualMachine(io.StringIO()).run(Compiler().compile_tree(tree))
+
+    return run
+
+
+class Benchmark:
+    """One workload and the code measured on it."""
+
+    name: str
+    source: str
+    make: Callable[[str], Callable[[], object]]
+
+    def __init__(
+        self, name: str, source: str, make: Callable[[str], Callable[[], object]]
+    ) -> None:
+        self.name = name
+        self.source = source
+        self.make = make
+
+    def measure(self, repeats: int = _REPEATS) -> dict[str, float]:
+        """
+        Runs the benchmark repeats times for its best time, then once more
+        under tracemalloc for its peak memory, which tracing would skew.
+        """
+        tokens = _tokens(self.source)
+        function = self.make(self.source)
+        best = float("inf")
+        for _ in range(repeats):
+            start = perf_counter()
+            _ = function()
+            best = min(best, perf_counter() - start)
+        tracemalloc.start()
+        try:
+            _ = function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            "seconds": best,
+            "tokens_per_second": len(tokens) / best,
+            "statements_per_second": _statements(tokens) / best,
+            "peak_memory": peak,
+        }
+
+
+def benchmarks(scale: float = 1.0) -> list[Benchmark]:
+    """The suite's benchmarks, their workloads sized by scale."""
+
+    def size(count: int) -> int:
+        return max(1, int(count * scale))
+
+    chains = arithmetic_chains(size(1_000), 20)
+    nested = nested_parentheses(size(250), 50)
+    hex_binary = literals(size(1_000), 20)
+    variables = many_variables(size(3_000))
+    program = script(size(300))
+    return [
+        Benchmark("tokenize_arithmetic", chains, _tokenize),
+        Benchmark("evaluate_arithmetic", chains, _evaluate),
+        Benchmark("tokenize_nested", nested, _tokenize),
+        Benchmark("evaluate_nested", nested, _evaluate),
+        Benchmark("tokenize_literals", hex_binary, _tokenize),
+        Benchmark("evaluate_literals", hex_binary, _evaluate),
+        Benchmark("evaluate_variables", variables, _evaluate),
+        Benchmark("run_script", program, _run),
+    ]
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baselines: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """Describes every metric of results regressed past threshold."""
+    regressions = []
+    for name, metrics in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        for metric in ["tokens_per_second", "statements_per_second"]:
+            if metrics[metric] < baseline[metric] * (1 - threshold):
+                regressions.append(
+                    f"{name}: {metric} {metrics[metric]:.0f} is below "
+                    f"{baseline[metric]:.0f} by more than {threshold:.0%}"
+                )
+        if metrics["peak_memory"] > baseline["peak_memory"] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak_memory {metrics['peak_memory']:.0f} is above "
+                f"{baseline['peak_memory']:.0f} by more than {threshold:.0%}"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    _ = parser.add_argument(
+        "--update", action="store_true", help="store the results as the baselines"
+    )
+    _ = parser.add_argument(
+        "--threshold", type=float, help="allowed regression, 0.25 for 25%%"
+    )
+    _ = parser.add_argument(
+        "--baselines", type=Path, default=BASELINE_PATH, help="baseline JSON file"
+    )
+    _ = parser.add_argument("--scale", type=float, default=1.0)
+    _ = parser.add_argument("-k", dest="only", help="run benchmarks containing this")
+    args = parser.parse_args(argv)
+
+    stored = {}
+    if args.baselines.exists():
+        stored = json.loads(args.baselines.read_text())
+    threshold = args.threshold
+    if threshold is None:
+        threshold = stored.get("threshold", DEFAULT_THRESHOLD)
+
+    results = {}
+    for benchmark in benchmarks(args.scale):
+        if args.only and args.only not in benchmark.name:
+            continue
+        metrics = results[benchmark.name] = benchmark.measure()
+        print(
+            f"{benchmark.name:<22}{metrics['seconds'] * 1e3:>10.2f}ms"
+            f"{metrics['tokens_per_second']:>14.0f} tokens/s"
+            f"{metrics['statements_per_second']:>12.0f} statements/s"
+            f"{metrics['peak_memory'] / 1024:>10.0f}KiB"
+        )
+
+    if args.update:
+        baselines = stored.get("benchmarks", {}) | results
+        data = {"threshold": threshold, "benchmarks": baselines}
+        _ = args.baselines.write_text(json.dumps(data, indent=2) + "\n")
+        print(f"stored baselines in {args.baselines}")
+        return 0
+    regressions = compare(results, stored.get("benchmarks", {}), threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
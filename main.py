@@ -1,10 +1,4 @@
-def main():
-    """
-    parse command arguments
-    then call the compiler
-    """
-    print("Hello from joy!")
-
+from src.cli import main
 
 if __name__ == "__main__":
     main()
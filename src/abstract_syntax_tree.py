@@ -1,63 +1,86 @@
 from __future__ import annotations
+from array import array
+from collections.abc import Iterable, Iterator
+from enum import IntEnum
 from os.path import isfile
 from typing import override
 from src.constants.other import SOURCE_CODE_FILE_EXTENSION
-from src.evaluator import Evaluator
+from src.exceptions.ExpressionError import ExpressionError
 from src.exceptions.FileWrongTypeError import FileWrongTypeError
-from src.joyTypes.Token import Token
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.exceptions.VariableEmptyName import VariableEmptyName
+from src.exceptions.VariableIllegalName import VariableIllegalName
+from src.joyTypes.Symbol import binary_operators, unary_operators
+from src.joyTypes.Token import Token, TokenType
+from src.joyTypes.Types import ValueKey, parse_number, value_key
 from src.tokenizer import Tokenizer
 
+NO_NODE = -1
 
-class Node:
-    left: Node
-    right: Node
-    token: Token
 
-    def __init__(
-        self, token: Token = None, left: Node = None, right: Node = None
-    ) -> None:
-        self.token = token
-        self.left = left
-        self.right = right
+class NodeKind(IntEnum):
+    PROGRAM = 0
+    BLOCK = 1
+    DECLARATION = 2
+    ASSIGNMENT = 3
+    PRINT = 4
+    IF = 5
+    EXPRESSION_STATEMENT = 6
+    NUMBER = 7
+    STRING = 8
+    NAME = 9
+    BINARY = 10
+    UNARY = 11
+    WHILE = 12
 
-    @override
-    def __str__(self) -> str:
-        return f"{self.token, self.left, self.right}"
-
-    @override
-    def __repr__(self) -> str:
-        return f"Node(root={self.token}, left={self.left}, right={self.right})"
 
-    @override
-    def __eq__(self, value: object, /) -> bool:
-        if isinstance(value, Node):
-            return (
-                self.token == value.token
-                and self.left == value.left
-                and self.right == value.right
-            )
-        return False
+# binding power of an infix operator, the assignment is a statement
+_INFIX_PRECEDENCE: dict[str, int] = {
+    value: symbol.precedence
+    for value, symbol in binary_operators.items()
+    if value != "="
+}
+_PREFIX_PRECEDENCE: dict[str, int] = {
+    value: symbol.precedence for value, symbol in unary_operators.items()
+}
 
 
 class AbstractSyntaxTree:
-    root: Node
-    code: list[Node]
-    keyword_precedence: dict[str, int]
-
-    def __init__(self, root: Node = None) -> None:
-        self.root = root
-        self.code = []
-        self.keyword_precedence = {
-            "=": 5,
-            "if": 4,
-            "while": 3,
-            "var": 2,
-            "<=": 1,
-            "<": 1,
-            ">=": 1,
-            ">": 1,
-            "!=": 1,
-        }
+    """
+    Whole program as an arena of nodes. Node i is described by kinds[i],
+    operands[i] (an index into values, for names, literals and operators),
+    first_child[i] and next_sibling[i], NO_NODE ending a chain. Children are
+    allocated before their parent, so root is the last node.
+    """
+
+    root: int
+    kinds: array
+    operands: array
+    first_child: array
+    next_sibling: array
+    lines: array
+    columns: array
+    values: list[float | str]
+    _value_indexes: dict[ValueKey, int]
+    _tokens: list[Token]
+    _position: int
+
+    def __init__(self) -> None:
+        self.root = NO_NODE
+        self._clear()
+
+    def _clear(self) -> None:
+        self.root = NO_NODE
+        self.kinds = array("B")
+        self.operands = array("l")
+        self.first_child = array("l")
+        self.next_sibling = array("l")
+        self.lines = array("l")
+        self.columns = array("l")
+        self.values = []
+        self._value_indexes = {}
+        self._tokens = []
+        self._position = 0
 
     def parse(self, file_path: str):
         if not isfile(file_path) or not file_path.endswith(SOURCE_CODE_FILE_EXTENSION):
@@ -65,27 +88,342 @@ class AbstractSyntaxTree:
                 f"File {file_path} is not a file or is not of {SOURCE_CODE_FILE_EXTENSION} extension"
             )
         tokenizer = Tokenizer()
-        with open(file_path) as f:
-            tokens = tokenizer.tokenize(f.readline())
-            syntax = self._parse_line(tokens)
+        return self.parse_tokens(tokenizer.iter_tokens(file_path))
+
+    def parse_tokens(self, tokens: Iterable[Token]) -> int:
+        """Parses a whole program, replacing the tree, and returns its root."""
+        self._clear()
+        self._tokens = list(tokens)
+        statements: list[int] = []
+        while self._peek() is not None:
+            statement = self._statement()
+            if statement != NO_NODE:
+                statements.append(statement)
+        first = self._tokens[0] if self._tokens else Token(line=1, column=1)
+        self.root = self._node(NodeKind.PROGRAM, first, statements)
+        self._tokens = []
+        return self.root
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, index: int) -> NodeKind:
+        return NodeKind(self.kinds[index])
+
+    def value(self, index: int) -> float | str:
+        return self.values[self.operands[index]]
+
+    def children(self, index: int) -> Iterator[int]:
+        child = self.first_child[index]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def where(self, index: int) -> str:
+        return f"at line {self.lines[index]}:{self.columns[index]}"
+
+    def _value(self, value: float | str) -> int:
+        key = value_key(value)
+        index = self._value_indexes.get(key)
+        if index is None:
+            index = self._value_indexes[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def _node(
+        self,
+        kind: NodeKind,
+        token: Token,
+        children: Iterable[int] = (),
+        value: float | str | None = None,
+    ) -> int:
+        index = len(self.kinds)
+        self.kinds.append(kind)
+        self.operands.append(NO_NODE if value is None else self._value(value))
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+        previous = NO_NODE
+        for child in children:
+            if previous == NO_NODE:
+                self.first_child[index] = child
+            else:
+                self.next_sibling[previous] = child
+            previous = child
+        return index
+
+    def _peek(self, offset: int = 0) -> Token | None:
+        position = self._position + offset
+        if position < len(self._tokens):
+            return self._tokens[position]
+        return None
+
+    def _where(self, token: Token | None) -> str:
+        if token is None:
+            if not self._tokens:
+                return "at end of program"
+            token = self._tokens[-1]
+        return f"at line {token.line}:{token.column}"
+
+    def _advance(self) -> Token:
+        token = self._peek()
+        if token is None:
+            raise JoySyntaxError(f"Unexpected end of program {self._where(None)}")
+        self._position += 1
+        return token
+
+    def _expect(self, type: TokenType, description: str) -> Token:
+        token = self._peek()
+        if token is None or token.type != type:
+            found = "end of program" if token is None else f"'{token.token}'"
+            raise JoySyntaxError(
+                f"Expected {description} {self._where(token)}, got {found}"
+            )
+        self._position += 1
+        return token
+
+    def _is_assignment(self, token: Token | None) -> bool:
+        return (
+            token is not None
+            and token.type == TokenType.OPERATOR
+            and token.token == "="
+        )
+
+    def _is_keyword(self, token: Token | None, keyword: str) -> bool:
+        return (
+            token is not None
+            and token.type == TokenType.KEYWORD
+            and token.token == keyword
+        )
+
+    def _end_statement(self) -> None:
+        token = self._peek()
+        if token is None or token.type == TokenType.SCOPE_CLOSE:
+            return
+        _ = self._expect(TokenType.END_OF_STATEMENT, "';'")
+
+    def _statement(self) -> int:
+        token = self._advance()
+        match token.type:
+            case TokenType.END_OF_STATEMENT:
+                return NO_NODE
+            case TokenType.SCOPE_OPEN:
+                self._position -= 1
+                return self._block()
+            case TokenType.KEYWORD if token.token == "var":
+                return self._declaration(token)
+            case TokenType.KEYWORD if token.token == "print":
+                return self._print(token)
+            case TokenType.KEYWORD if token.token == "if":
+                return self._if(token)
+            case TokenType.KEYWORD if token.token == "while":
+                return self._while(token)
+            case TokenType.KEYWORD:
+                raise JoySyntaxError(
+                    f"Unexpected keyword '{token.token}' {self._where(token)}"
+                )
+            case TokenType.SYMBOL if self._is_assignment(self._peek()):
+                self._position += 1
+                value = self._expression()
+                self._end_statement()
+                return self._node(NodeKind.ASSIGNMENT, token, [value], token.token)
+        self._position -= 1
+        expression = self._expression()
+        self._end_statement()
+        return self._node(NodeKind.EXPRESSION_STATEMENT, token, [expression])
+
+    def _block(self) -> int:
+        opening = self._expect(TokenType.SCOPE_OPEN, "'{'")
+        statements: list[int] = []
+        while True:
+            token = self._peek()
+            if token is None:
+                raise JoySyntaxError(f"Expected '}}' {self._where(None)}")
+            if token.type == TokenType.SCOPE_CLOSE:
+                self._position += 1
+                return self._node(NodeKind.BLOCK, opening, statements)
+            statement = self._statement()
+            if statement != NO_NODE:
+                statements.append(statement)
+
+    def _declaration(self, keyword: Token) -> int:
+        name = self._peek()
+        if name is not None and name.type == TokenType.KEYWORD:
+            raise VariableIllegalName(
+                f"Variable illegal name containing keywords {name.token}"
+            )
+        if name is None or name.type != TokenType.SYMBOL:
+            raise VariableEmptyName(f"Variable name is empty {self._where(keyword)}")
+        self._position += 1
+        children: list[int] = []
+        if self._is_assignment(self._peek()):
+            self._position += 1
+            children.append(self._expression())
+        self._end_statement()
+        return self._node(NodeKind.DECLARATION, name, children, name.token)
+
+    def _print(self, keyword: Token) -> int:
+        _ = self._expect(TokenType.PARENTHESIS_OPEN, "'(' after print")
+        argument = self._peek()
+        following = self._peek(1)
+        if (
+            argument is not None
+            and argument.type == TokenType.STRING
+            and following is not None
+            and following.type == TokenType.PARENTHESIS_CLOSE
+        ):
+            self._position += 1
+            value = self._node(NodeKind.STRING, argument, value=argument.token)
+        else:
+            value = self._expression()
+        _ = self._expect(TokenType.PARENTHESIS_CLOSE, "')'")
+        self._end_statement()
+        return self._node(NodeKind.PRINT, keyword, [value])
+
+    def _if(self, keyword: Token) -> int:
+        _ = self._expect(TokenType.PARENTHESIS_OPEN, "'(' after if")
+        children = [self._expression()]
+        _ = self._expect(TokenType.PARENTHESIS_CLOSE, "')'")
+        children.append(self._block())
+        if self._is_keyword(self._peek(), "else"):
+            self._position += 1
+            chained = self._peek()
+            if self._is_keyword(chained, "if"):
+                self._position += 1
+                children.append(self._if(chained))
+            else:
+                children.append(self._block())
+        return self._node(NodeKind.IF, keyword, children)
+
+    def _while(self, keyword: Token) -> int:
+        _ = self._expect(TokenType.PARENTHESIS_OPEN, "'(' after while")
+        condition = self._expression()
+        _ = self._expect(TokenType.PARENTHESIS_CLOSE, "')'")
+        return self._node(NodeKind.WHILE, keyword, [condition, self._block()])
+
+    def _expression(self) -> int:
+        """
+        Pratt parser over the operator tables the evaluator uses, so trees
+        group like its RPN: higher precedence binds tighter and equal
+        precedence associates to the left. Operators waiting for their right
+        operand are kept on a stack rather than in recursive calls, so deep
+        nesting costs memory, not Python frames.
+        """
+        operands: list[int] = []
+        # operators waiting for operands, an open parenthesis with no kind
+        operators: list[tuple[Token, NodeKind | None, int]] = []
+        while True:
+            token = self._peek()
+            if token is None:
+                raise ExpressionError(f"Expected operand {self._where(None)}")
+            self._position += 1
+            match token.type:
+                case TokenType.NUMBER:
+                    value = parse_number(token.token)
+                    operands.append(self._node(NodeKind.NUMBER, token, value=value))
+                case TokenType.SYMBOL:
+                    operands.append(self._node(NodeKind.NAME, token, value=token.token))
+                case TokenType.PARENTHESIS_OPEN:
+                    operators.append((token, None, 0))
+                    continue
+                case TokenType.OPERATOR if token.token in _PREFIX_PRECEDENCE:
+                    precedence = _PREFIX_PRECEDENCE[token.token]
+                    operators.append((token, NodeKind.UNARY, precedence))
+                    continue
+                case _:
+                    raise ExpressionError(
+                        f"Expected operand {self._where(token)}, got '{token.token}'"
+                    )
+            # after an operand comes an infix operator, or the end of the
+            # innermost parenthesis or of the whole expression
+            while True:
+                token = self._peek()
+                precedence = 0
+                if token is not None and token.type == TokenType.OPERATOR:
+                    precedence = _INFIX_PRECEDENCE.get(token.token, 0)
+                if operators and operators[-1][2] >= precedence:
+                    self._reduce(operands, operators, precedence)
+                if precedence:
+                    self._position += 1
+                    operators.append((token, NodeKind.BINARY, precedence))
+                    break
+                if not operators:
+                    return operands.pop()
+                _ = self._expect(TokenType.PARENTHESIS_CLOSE, "')'")
+                _ = operators.pop()
+
+    def _reduce(
+        self,
+        operands: list[int],
+        operators: list[tuple[Token, NodeKind | None, int]],
+        precedence: int,
+    ) -> None:
+        """
+        Builds the nodes of the pending operators binding at least as
+        tightly as precedence, stopping at the innermost open parenthesis,
+        whose entries have precedence 0.
+        """
+        while operators and operators[-1][2] and operators[-1][2] >= precedence:
+            token, kind, _ = operators.pop()
+            operand = operands.pop()
+            if kind == NodeKind.BINARY:
+                children = [operands.pop(), operand]
+            else:
+                children = [operand]
+            assert kind is not None
+            operands.append(self._node(kind, token, children, token.token))
 
-    def _parse_line(self, tokens: list[Token]) -> Node:
-        stack = []
-        for token in tokens:
-            # create precedence list for keywords
-            # and create tree based on that
-            pass
+    def _label(self, index: int) -> str:
+        kind = self.kind(index)
+        if self.operands[index] == NO_NODE:
+            return kind.name.lower()
+        return f"{kind.name.lower()} {self.value(index)!r}"
 
     @override
     def __str__(self) -> str:
-        return f"{self.root}"
+        if self.root == NO_NODE:
+            return "()"
+        parts: list[str] = []
+        # pending entries are node indexes, or NO_NODE to close a parenthesis
+        pending = [self.root]
+        while pending:
+            index = pending.pop()
+            if index == NO_NODE:
+                parts.append(")")
+                continue
+            parts.append(f" ({self._label(index)}" if parts else f"({self._label(index)}")
+            pending.append(NO_NODE)
+            pending.extend(reversed(list(self.children(index))))
+        return "".join(parts)
 
     @override
     def __repr__(self) -> str:
-        return f"AbstractSyntaxTree({self.root})"
+        return f"AbstractSyntaxTree({self})"
 
     @override
     def __eq__(self, value: object, /) -> bool:
-        if isinstance(value, AbstractSyntaxTree):
-            return self.root == value.root
-        return False
+        if not isinstance(value, AbstractSyntaxTree):
+            return False
+        if (self.root == NO_NODE) != (value.root == NO_NODE):
+            return False
+        if self.root == NO_NODE:
+            return True
+        pending = [(self.root, value.root)]
+        while pending:
+            mine, theirs = pending.pop()
+            if self.kinds[mine] != value.kinds[theirs]:
+                return False
+            if (self.operands[mine] == NO_NODE) != (value.operands[theirs] == NO_NODE):
+                return False
+            if self.operands[mine] != NO_NODE and self.value(mine) != value.value(
+                theirs
+            ):
+                return False
+            mine, theirs = self.first_child[mine], value.first_child[theirs]
+            while mine != NO_NODE and theirs != NO_NODE:
+                pending.append((mine, theirs))
+                mine, theirs = self.next_sibling[mine], value.next_sibling[theirs]
+            if mine != theirs:
+                return False
+        return True
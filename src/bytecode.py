@@ -0,0 +1,234 @@
+from __future__ import annotations
+import marshal
+from array import array
+from collections.abc import Iterator
+from enum import IntEnum
+from typing import override
+
+from src.exceptions.BytecodeError import BytecodeError
+
+BYTECODE_MAGIC = b"JOYB"
+BYTECODE_VERSION = 3
+
+
+class OpCode(IntEnum):
+    LOAD_CONST = 0
+    LOAD_VAR = 1
+    STORE_VAR = 2
+    POP = 3
+    ADD = 4
+    SUBTRACT = 5
+    MULTIPLY = 6
+    DIVIDE = 7
+    MODULO = 8
+    EQUAL = 9
+    NOT_EQUAL = 10
+    LESS = 11
+    LESS_EQUAL = 12
+    GREATER = 13
+    GREATER_EQUAL = 14
+    NEGATE = 15
+    POSITIVE = 16
+    JUMP = 17
+    JUMP_IF_FALSE = 18
+    PRINT = 19
+    # superinstructions made by the peephole pass, arguments a pair are
+    # packed by pack_arguments
+    LOAD_VAR_VAR = 20
+    LOAD_VAR_CONST = 21
+    ADD_CONST = 22
+    MULTIPLY_CONST = 23
+    INCREMENT_VAR = 24
+    STORE_CONST = 25
+    # a comparison and a JUMP_IF_FALSE on its result, jumping unless it holds
+    JUMP_UNLESS_EQUAL = 26
+    JUMP_UNLESS_NOT_EQUAL = 27
+    JUMP_UNLESS_LESS = 28
+    JUMP_UNLESS_LESS_EQUAL = 29
+    JUMP_UNLESS_GREATER = 30
+    JUMP_UNLESS_GREATER_EQUAL = 31
+    # the backward jump closing a while loop, the back edge the JIT counts
+    LOOP = 32
+    # a branch compiled on its first run, see Compiler.compile_branch
+    LAZY_BRANCH = 33
+    # the end of a program whose lazily compiled branches follow it
+    HALT = 34
+
+
+BINARY_OPCODES: dict[str, OpCode] = {
+    "+": OpCode.ADD,
+    "-": OpCode.SUBTRACT,
+    "*": OpCode.MULTIPLY,
+    "/": OpCode.DIVIDE,
+    "%": OpCode.MODULO,
+    "==": OpCode.EQUAL,
+    "!=": OpCode.NOT_EQUAL,
+    "<": OpCode.LESS,
+    "<=": OpCode.LESS_EQUAL,
+    ">": OpCode.GREATER,
+    ">=": OpCode.GREATER_EQUAL,
+}
+
+UNARY_OPCODES: dict[str, OpCode] = {
+    "-": OpCode.NEGATE,
+    "+": OpCode.POSITIVE,
+}
+
+COMPARE_JUMP_OPCODES: dict[OpCode, OpCode] = {
+    OpCode.EQUAL: OpCode.JUMP_UNLESS_EQUAL,
+    OpCode.NOT_EQUAL: OpCode.JUMP_UNLESS_NOT_EQUAL,
+    OpCode.LESS: OpCode.JUMP_UNLESS_LESS,
+    OpCode.LESS_EQUAL: OpCode.JUMP_UNLESS_LESS_EQUAL,
+    OpCode.GREATER: OpCode.JUMP_UNLESS_GREATER,
+    OpCode.GREATER_EQUAL: OpCode.JUMP_UNLESS_GREATER_EQUAL,
+}
+_COMPARISONS = {fused: plain for plain, fused in COMPARE_JUMP_OPCODES.items()}
+
+JUMP_OPCODES = frozenset(
+    [OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.LOOP, *COMPARE_JUMP_OPCODES.values()]
+)
+
+# bits of the second argument of a pair, the pair fits a 32 bit word
+ARGUMENT_BITS = 15
+ARGUMENT_LIMIT = 1 << ARGUMENT_BITS
+
+
+def pack_arguments(first: int, second: int) -> int:
+    return first | second << ARGUMENT_BITS
+
+
+def unpack_arguments(arg: int) -> tuple[int, int]:
+    return arg & (ARGUMENT_LIMIT - 1), arg >> ARGUMENT_BITS
+
+
+def expand(op: OpCode, arg: int) -> list[tuple[OpCode, int]]:
+    """The plain instructions a superinstruction stands for."""
+    first, second = unpack_arguments(arg)
+    match op:
+        case OpCode.LOAD_VAR_VAR:
+            return [(OpCode.LOAD_VAR, first), (OpCode.LOAD_VAR, second)]
+        case OpCode.LOAD_VAR_CONST:
+            return [(OpCode.LOAD_VAR, first), (OpCode.LOAD_CONST, second)]
+        case OpCode.ADD_CONST:
+            return [(OpCode.LOAD_CONST, arg), (OpCode.ADD, 0)]
+        case OpCode.MULTIPLY_CONST:
+            return [(OpCode.LOAD_CONST, arg), (OpCode.MULTIPLY, 0)]
+        case OpCode.INCREMENT_VAR:
+            return [
+                (OpCode.LOAD_VAR, first),
+                (OpCode.LOAD_CONST, second),
+                (OpCode.ADD, 0),
+                (OpCode.STORE_VAR, first),
+            ]
+        case OpCode.STORE_CONST:
+            return [(OpCode.LOAD_CONST, second), (OpCode.STORE_VAR, first)]
+    if op in _COMPARISONS:
+        return [(_COMPARISONS[op], 0), (OpCode.JUMP_IF_FALSE, arg)]
+    return [(op, arg)]
+
+
+class Bytecode:
+    """
+    Compiled Joy program.
+
+    code holds two words per instruction, an opcode and its argument, so the
+    instruction at index i starts at code[2 * i]. Jump arguments are
+    instruction indexes. lines holds the source line of every instruction.
+    """
+
+    code: array
+    consts: list[float | str]
+    names: list[str]
+    lines: array
+
+    def __init__(
+        self,
+        code: array | None = None,
+        consts: list[float | str] | None = None,
+        names: list[str] | None = None,
+        lines: array | None = None,
+    ) -> None:
+        self.code = code if code is not None else array("l")
+        self.consts = consts if consts is not None else []
+        self.names = names if names is not None else []
+        self.lines = lines if lines is not None else array("l")
+
+    def emit(self, op: OpCode, arg: int = 0, line: int = 0) -> int:
+        """Appends an instruction and returns its index."""
+        self.code.append(op)
+        self.code.append(arg)
+        self.lines.append(line)
+        return len(self.lines) - 1
+
+    def patch(self, index: int, arg: int) -> None:
+        self.code[2 * index + 1] = arg
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def instructions(self) -> Iterator[tuple[int, OpCode, int]]:
+        code = self.code
+        for index in range(len(self.lines)):
+            yield index, OpCode(code[2 * index]), code[2 * index + 1]
+
+    def disassemble(self) -> str:
+        rows = []
+        for index, op, arg in self.instructions():
+            details = []
+            for plain, plain_arg in expand(op, arg):
+                if plain is OpCode.LOAD_CONST:
+                    details.append(repr(self.consts[plain_arg]))
+                elif plain in (OpCode.LOAD_VAR, OpCode.STORE_VAR):
+                    details.append(self.names[plain_arg])
+            detail = f"({', '.join(dict.fromkeys(details))})" if details else ""
+            row = f"{self.lines[index]:>5} {index:>6} {op.name:<26}{arg:>6} {detail}"
+            rows.append(row.rstrip())
+        return "\n".join(rows)
+
+    def to_bytes(self) -> bytes:
+        if OpCode.LAZY_BRANCH in self.code[::2]:
+            raise BytecodeError("Bytecode has branches that are not compiled yet")
+        body = marshal.dumps(
+            (
+                self.code.tobytes(),
+                tuple(self.consts),
+                tuple(self.names),
+                self.lines.tobytes(),
+            )
+        )
+        return BYTECODE_MAGIC + BYTECODE_VERSION.to_bytes(2, "little") + body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Bytecode:
+        header = len(BYTECODE_MAGIC) + 2
+        if data[: len(BYTECODE_MAGIC)] != BYTECODE_MAGIC:
+            raise BytecodeError("Not a Joy bytecode file")
+        version = int.from_bytes(data[len(BYTECODE_MAGIC) : header], "little")
+        if version != BYTECODE_VERSION:
+            raise BytecodeError(
+                f"Bytecode version {version} does not match {BYTECODE_VERSION}"
+            )
+        try:
+            code_bytes, consts, names, line_bytes = marshal.loads(data[header:])
+        except (EOFError, ValueError, TypeError) as e:
+            raise BytecodeError(f"Corrupted bytecode: {e}") from e
+        code = array("l")
+        code.frombytes(code_bytes)
+        lines = array("l")
+        lines.frombytes(line_bytes)
+        return cls(code, list(consts), list(names), lines)
+
+    @override
+    def __eq__(self, value: object, /) -> bool:
+        if isinstance(value, Bytecode):
+            return (
+                self.code == value.code
+                and self.consts == value.consts
+                and self.names == value.names
+                and self.lines == value.lines
+            )
+        return False
+
+    @override
+    def __repr__(self) -> str:
+        return f"Bytecode({len(self)} instructions, {len(self.names)} names)"
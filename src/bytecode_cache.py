@@ -0,0 +1,174 @@
+import contextlib
+import hashlib
+import os
+import secrets
+import time
+from pathlib import Path
+
+from src.bytecode import BYTECODE_VERSION, Bytecode
+from src.compiler import COMPILER_VERSION
+from src.constants.other import (
+    BYTECODE_FILE_EXTENSION,
+    CACHE_DIRECTORY_ENVIRONMENT_VARIABLE,
+    CACHE_MAX_AGE_SECONDS,
+    CACHE_MAX_ENTRIES,
+)
+from src.exceptions.BytecodeError import BytecodeError
+
+_TEMPORARY_SUFFIX = ".tmp"
+
+
+def default_cache_directory() -> Path:
+    directory = os.environ.get(CACHE_DIRECTORY_ENVIRONMENT_VARIABLE)
+    if directory:
+        return Path(directory)
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home:
+        return Path(cache_home) / "joy"
+    return Path.home() / ".cache" / "joy"
+
+
+def write_atomically(path: Path, data: bytes) -> None:
+    """
+    Writes data to a temporary file next to path and renames it over path,
+    so readers see either the old file or the whole new one. The file gets
+    the permissions open would give it, which mkstemp narrows to the owner.
+    """
+    temporary = path.with_name(
+        f".{path.stem}.{secrets.token_hex(8)}{_TEMPORARY_SUFFIX}"
+    )
+    descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            _ = f.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+        raise
+
+
+class BytecodeCache:
+    """
+    Directory of compiled .bcj files keyed by a hash of the source and the
+    compiler version. Entries are written atomically, so concurrent runners
+    only ever see whole files, and the least recently used ones are pruned.
+    """
+
+    directory: Path
+    max_entries: int
+    max_age: float
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_age: float = CACHE_MAX_AGE_SECONDS,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError(f"Cache must hold at least one entry, got {max_entries}")
+        self.directory = (
+            Path(directory) if directory is not None else default_cache_directory()
+        )
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+    @staticmethod
+    def key(source: bytes, backend: bytes = b"") -> str:
+        """Hashes source with the versions of what compiles it, and backend."""
+        versions = f"{BYTECODE_VERSION}.{COMPILER_VERSION}\0".encode()
+        return hashlib.sha256(versions + backend + b"\0" + source).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{BYTECODE_FILE_EXTENSION}"
+
+    def load(self, key: str) -> Bytecode | None:
+        data = self.load_data(key)
+        if data is None:
+            return None
+        try:
+            return Bytecode.from_bytes(data)
+        except BytecodeError:
+            self.discard(key)
+            return None
+
+    def store(self, key: str, bytecode: Bytecode) -> Path | None:
+        return self.store_data(key, bytecode.to_bytes())
+
+    def load_data(self, key: str) -> bytes | None:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            # the modification time doubles as the last use for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def store_data(self, key: str, data: bytes) -> Path | None:
+        """
+        Writes data under key and prunes stale entries. Returns None when
+        the cache directory is not writable, caching is best effort.
+        """
+        path = self.path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            write_atomically(path, data)
+        except OSError:
+            return None
+        _ = self.prune()
+        return path
+
+    def prune(self) -> int:
+        """
+        Removes entries unused for longer than max_age, then the least
+        recently used ones above max_entries. Returns how many were removed.
+        """
+        now = time.time()
+        entries: list[tuple[float, Path]] = []
+        removed = 0
+        try:
+            paths = list(self.directory.iterdir())
+        except OSError:
+            return 0
+        for path in paths:
+            try:
+                used = path.stat().st_mtime
+            except OSError:
+                continue
+            if path.name.endswith(_TEMPORARY_SUFFIX):
+                # left behind by a writer that died, live ones finish quickly
+                if now - used > 60 * 60:
+                    removed += self._remove(path)
+                continue
+            if path.suffix != BYTECODE_FILE_EXTENSION:
+                continue
+            if now - used > self.max_age:
+                removed += self._remove(path)
+                continue
+            entries.append((used, path))
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries :]:
+            removed += self._remove(path)
+        return removed
+
+    def discard(self, key: str) -> None:
+        """Removes the entry under key, for entries that failed to load."""
+        _ = self._remove(self.path(key))
+
+    def clear(self) -> None:
+        for path in self.directory.glob(f"*{BYTECODE_FILE_EXTENSION}"):
+            _ = self._remove(path)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob(f"*{BYTECODE_FILE_EXTENSION}"))
+
+    def _remove(self, path: Path) -> int:
+        try:
+            path.unlink()
+        except OSError:
+            return 0
+        return 1
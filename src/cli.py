@@ -0,0 +1,224 @@
+import argparse
+import os
+import sys
+from typing import TYPE_CHECKING
+
+from src.constants.other import VERSION
+from src.exceptions.BytecodeError import BytecodeError
+from src.exceptions.ExpressionError import ExpressionError
+from src.exceptions.FileEmptyError import FileEmptyError
+from src.exceptions.FileWrongTypeError import FileWrongTypeError
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.exceptions.TokenizerValueError import TokenizerValueError
+from src.exceptions.VariableDuplicateName import VariableDuplicateName
+from src.exceptions.VariableEmptyName import VariableEmptyName
+from src.exceptions.VariableIllegalName import VariableIllegalName
+from src.exceptions.VariableWhitespaceName import VariableWhitespaceName
+
+if TYPE_CHECKING:
+    from src.profiler import Profiler
+
+# kept here rather than read from interpreter.Backend, importing the
+# interpreter pulls in the whole compiler just to print the help
+_BACKENDS = ("vm", "python")
+# errors in what the user asked for, reported as one line without a traceback
+_USER_ERRORS = (
+    OSError,
+    BytecodeError,
+    ExpressionError,
+    FileEmptyError,
+    FileWrongTypeError,
+    JoySyntaxError,
+    TokenizerValueError,
+    VariableDuplicateName,
+    VariableEmptyName,
+    VariableIllegalName,
+    VariableWhitespaceName,
+    ZeroDivisionError,
+)
+
+
+def _run(args: argparse.Namespace) -> None:
+    if args.profile or args.profile_json:
+        from src.interpreter import profile
+        from src.profiler import Profiler
+
+        profiler = Profiler()
+        _ = profile(args.source, profiler, args.backend)
+        _report(profiler, args)
+        return
+    from src.interpreter import run
+
+    _ = run(args.source, args.output, not args.no_cache, args.cache_dir, args.backend)
+
+
+def _compile(args: argparse.Namespace) -> None:
+    if os.path.isdir(args.source):
+        from src.parallel_compile import compile_directory
+
+        summary = compile_directory(args.source, args.jobs, args.output)
+        _ = sys.stdout.write(f"{summary.report()}\n")
+        if summary.errors:
+            raise SystemExit(1)
+        return
+    from src.bytecode_cache import BytecodeCache
+    from src.interpreter import compile
+
+    cache = None if args.no_cache else BytecodeCache(args.cache_dir)
+    _ = compile(args.source, args.output, cache)
+
+
+def _eval(args: argparse.Namespace) -> None:
+    from src.evaluator import Evaluator
+
+    profiler = None
+    if args.profile or args.profile_json:
+        from src.profiler import Profiler
+
+        profiler = Profiler()
+    write = sys.stdout.write
+    for result in Evaluator().evaluate_program(args.code, profiler):
+        _ = write(f"{result}\n")
+    if profiler is not None:
+        _report(profiler, args)
+
+
+def _serve(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from src.server import EvaluationServer, serve
+
+    server = EvaluationServer(args.batch_window)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+def _report(profiler: "Profiler", args: argparse.Namespace) -> None:
+    if args.profile:
+        _ = sys.stderr.write(f"{profiler.report()}\n")
+    if args.profile_json:
+        with open(args.profile_json, "w") as f:
+            _ = f.write(profiler.to_json())
+
+
+def _add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    _ = parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time spent per phase and source line to stderr, "
+        "compiling from source without the bytecode cache",
+    )
+    _ = parser.add_argument(
+        "--profile-json", help="write the profile as JSON to this file"
+    )
+
+
+def _add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    _ = parser.add_argument(
+        "-o",
+        "--output",
+        help="also write the bytecode to this .bcj file, or for a directory the "
+        "directory to write its .bcj files below",
+    )
+    _ = parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always compile from source and leave the bytecode cache alone",
+    )
+    _ = parser.add_argument(
+        "--cache-dir", help="bytecode cache directory, defaults to ~/.cache/joy"
+    )
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="joy")
+    _ = parser.add_argument("--version", action="version", version=f"joy {VERSION}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_command = commands.add_parser("run", help="compile and run a program")
+    _ = run_command.add_argument("source", help="Joy source or compiled .bcj file")
+    _add_cache_arguments(run_command)
+    _ = run_command.add_argument(
+        "--backend",
+        choices=_BACKENDS,
+        default=_BACKENDS[0],
+        help="run on the bytecode VM or as compiled Python",
+    )
+    _add_profile_arguments(run_command)
+    run_command.set_defaults(handler=_run)
+
+    compile_command = commands.add_parser("compile", help="compile without running")
+    _ = compile_command.add_argument(
+        "source", help="Joy source file, or a directory to compile every file of"
+    )
+    _add_cache_arguments(compile_command)
+    _ = compile_command.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="processes compiling a directory, defaults to one per core",
+    )
+    compile_command.set_defaults(handler=_compile)
+
+    eval_command = commands.add_parser(
+        "eval", help="evaluate expressions separated by ';' and print their results"
+    )
+    _ = eval_command.add_argument("code", help="expressions to evaluate")
+    _add_profile_arguments(eval_command)
+    eval_command.set_defaults(handler=_eval)
+
+    serve_command = commands.add_parser(
+        "serve", help="evaluate expressions sent as JSON lines over a socket"
+    )
+    _ = serve_command.add_argument("--socket", help="listen on this Unix socket")
+    _ = serve_command.add_argument("--host", default="127.0.0.1")
+    _ = serve_command.add_argument("--port", type=int, default=7474)
+    _ = serve_command.add_argument(
+        "--batch-window",
+        type=float,
+        default=0.0,
+        help="seconds to collect requests for, same expressions run as one batch",
+    )
+    serve_command.set_defaults(handler=_serve)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Entry point of the joy command. Every subcommand imports what it runs
+    only once it is chosen, so `joy --version` and `joy eval` never load
+    the compiler, the backends or NumPy. Errors in the program or the
+    files given are printed as one line and exit with status 1.
+    """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if (
+        args.command == "run"
+        and (args.profile or args.profile_json)
+        and (args.output is not None or args.cache_dir is not None)
+    ):
+        # profiling always compiles from source and writes nothing
+        parser.error(
+            "--profile and --profile-json cannot be used with -o or --cache-dir"
+        )
+    if args.command == "run" and args.backend == "python" and args.output is not None:
+        # the Python backend compiles to Python code, it has no bytecode to write
+        parser.error("-o cannot be used with --backend python")
+    if (
+        args.command == "compile"
+        and (args.no_cache or args.cache_dir is not None)
+        and os.path.isdir(args.source)
+    ):
+        # a directory is always compiled from source into -o or beside it
+        parser.error("--no-cache and --cache-dir cannot be used with a directory")
+    try:
+        args.handler(args)
+    except _USER_ERRORS as e:
+        _ = sys.stderr.write(f"joy: {e}\n")
+        raise SystemExit(1) from None
+
+
+if __name__ == "__main__":
+    main()
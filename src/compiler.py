@@ -0,0 +1,314 @@
+from array import array
+from collections.abc import Callable, Iterable, Mapping
+
+from src.abstract_syntax_tree import NO_NODE, AbstractSyntaxTree, NodeKind
+from src.bytecode import (
+    BINARY_OPCODES,
+    COMPARE_JUMP_OPCODES,
+    JUMP_OPCODES,
+    UNARY_OPCODES,
+    Bytecode,
+    OpCode,
+)
+from src.evaluator import Evaluator
+from src.exceptions.ExpressionError import ExpressionError
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.exceptions.VariableDuplicateName import VariableDuplicateName
+from src.joyTypes.Symbol import (
+    Symbol,
+    SymbolType,
+    binary_operators,
+    unary_operators,
+)
+from src.joyTypes.Token import Token
+from src.peephole import PeepholeReport, optimize_bytecode
+from src.joyTypes.Types import ValueKey, parse_number, value_key
+from src.rpn_optimizer import fold_constants
+from src.type_inference import infer_types
+
+# bump whenever the bytecode emitted for the same source changes, so cached
+# .bcj files from older compilers are not reused
+COMPILER_VERSION = 6
+
+
+def flatten_expression(
+    tree: AbstractSyntaxTree,
+    node: int,
+    check_name: Callable[[str, int], object],
+    optimize: bool = True,
+    types: Mapping[str, type | None] | None = None,
+) -> list[Symbol]:
+    """
+    Flattens the expression at node to the Evaluator's RPN, folded when
+    optimize is set. check_name is called with every name and its node, to
+    report undeclared names where they appear. types, from infer_types, lets
+    the folding drop no-ops on variables, which are of unknown type without.
+    """
+    rpn: list[Symbol] = []
+    # post-order walk, a negative entry marks a node whose children are done
+    pending = [node]
+    while pending:
+        index = pending.pop()
+        if index < 0:
+            index = ~index
+            operator = str(tree.value(index))
+            if tree.kind(index) == NodeKind.BINARY:
+                rpn.append(binary_operators[operator])
+            else:
+                rpn.append(unary_operators[operator])
+            continue
+        match tree.kind(index):
+            case NodeKind.NUMBER:
+                rpn.append(Symbol(str(tree.value(index)), SymbolType.NUMBER, 0))
+            case NodeKind.NAME:
+                name = str(tree.value(index))
+                _ = check_name(name, index)
+                rpn.append(Symbol.interned(name, SymbolType.SYMBOL, 0))
+            case NodeKind.BINARY | NodeKind.UNARY:
+                pending.append(~index)
+                pending.extend(reversed(list(tree.children(index))))
+            case kind:
+                raise ExpressionError(
+                    f"Node {kind.name} can't be compiled {tree.where(index)}"
+                )
+    if optimize:
+        folded, _ = fold_constants(
+            rpn,
+            Evaluator.operations,
+            Evaluator.unary_operations,
+            (types if types is not None else {}).get,
+        )
+        rpn = list(folded)
+    return rpn
+
+
+class Compiler:
+    """
+    Compiles an AbstractSyntaxTree into Bytecode. Expressions are flattened
+    to the Evaluator's RPN so they are folded by the same optimizer pass,
+    and the bytecode goes through the peephole pass, both when optimize is
+    set.
+
+    When lazy is set, the branches of an if outside of any loop are left as
+    LAZY_BRANCH instructions, compiled by compile_branch the first time they
+    run, so code that never runs is never compiled. Loop bodies are compiled
+    up front, their branches are likely to run and the JIT traces them.
+    """
+
+    optimize: bool
+    lazy: bool
+    bytecode: Bytecode
+    peephole_report: PeepholeReport | None
+    _tree: AbstractSyntaxTree
+    _slots: dict[str, int]
+    # node of every variable's declaration, names are only usable after it
+    _declarations: dict[str, int]
+    _types: dict[str, type | None]
+    _constants: dict[ValueKey, int]
+    _loops: int
+    _branches: list[int]
+
+    def __init__(self, optimize: bool = True, lazy: bool = False) -> None:
+        self.optimize = optimize
+        self.lazy = lazy
+        self._reset(AbstractSyntaxTree())
+
+    def _reset(self, tree: AbstractSyntaxTree) -> None:
+        self.bytecode = Bytecode()
+        self.peephole_report = None
+        self._tree = tree
+        self._slots = {}
+        self._declarations = {}
+        self._types = infer_types(tree)
+        self._constants = {}
+        self._loops = 0
+        self._branches = []
+        # slots are given up front, as a branch compiled late may declare one
+        kinds = tree.kinds
+        for node in range(len(tree)):
+            if kinds[node] == NodeKind.DECLARATION:
+                self._declare(str(tree.value(node)), node)
+
+    def compile(self, tokens: Iterable[Token]) -> Bytecode:
+        tree = AbstractSyntaxTree()
+        _ = tree.parse_tokens(tokens)
+        return self.compile_tree(tree)
+
+    def compile_tree(self, tree: AbstractSyntaxTree) -> Bytecode:
+        self._reset(tree)
+        if tree.root != NO_NODE:
+            for statement in tree.children(tree.root):
+                self._statement(statement)
+        if self.optimize:
+            self.bytecode, self.peephole_report = optimize_bytecode(self.bytecode)
+        if self._branches:
+            # branches compiled later go after the end of the program
+            _ = self.bytecode.emit(OpCode.HALT, 0, max(tree.lines, default=0))
+        return self.bytecode
+
+    def compile_branch(self, stub: int) -> int:
+        """
+        Compiles the branch of the LAZY_BRANCH instruction at index stub to
+        the end of the bytecode, followed by a jump back to where the branch
+        ends, and turns the stub into a jump to it. Returns where it starts.
+        """
+        bytecode = self.bytecode
+        node = self._branches[bytecode.code[2 * stub + 1]]
+        line = self._tree.lines[node]
+        start = len(bytecode)
+        resume = stub + 1
+        if bytecode.code[2 * resume] == OpCode.JUMP:
+            resume = bytecode.code[2 * resume + 1]
+        # compiled on its own, jumps out of the branch go to its end
+        self.bytecode = Bytecode(consts=list(bytecode.consts), names=bytecode.names)
+        try:
+            self._statement(node)
+            branch = self.bytecode
+            if self.optimize:
+                branch, _ = optimize_bytecode(branch)
+        finally:
+            self.bytecode = bytecode
+        code = array("l", branch.code)
+        for index in range(0, len(code), 2):
+            if code[index] in JUMP_OPCODES:
+                code[index + 1] += start
+        bytecode.code.extend(code)
+        bytecode.lines.extend(branch.lines)
+        bytecode.consts.extend(branch.consts[len(bytecode.consts) :])
+        _ = bytecode.emit(OpCode.JUMP, resume, line)
+        bytecode.code[2 * stub] = OpCode.JUMP
+        bytecode.patch(stub, start)
+        return start
+
+    def _constant(self, value: float | str) -> int:
+        key = value_key(value)
+        index = self._constants.get(key)
+        if index is None:
+            index = self._constants[key] = len(self.bytecode.consts)
+            self.bytecode.consts.append(value)
+        return index
+
+    def _slot(self, name: str, node: int) -> int:
+        slot = self._slots.get(name)
+        # nodes are numbered in source order, children before their parent
+        if slot is None or self._declarations[name] > node:
+            raise JoySyntaxError(
+                f"Variable {name} is not declared {self._tree.where(node)}"
+            )
+        return slot
+
+    def _zero(self, name: str) -> float:
+        # an int variable starts at an int zero, so its arithmetic stays exact
+        return 0 if self._types.get(name) is int else 0.0
+
+    def _declare(self, name: str, node: int) -> int:
+        if name in self._slots:
+            raise VariableDuplicateName(
+                f"Variable name {name} already registered {self._tree.where(node)}"
+            )
+        slot = self._slots[name] = len(self.bytecode.names)
+        self._declarations[name] = node
+        self.bytecode.names.append(name)
+        return slot
+
+    def _statement(self, node: int) -> None:
+        tree = self._tree
+        emit = self.bytecode.emit
+        line = tree.lines[node]
+        children = list(tree.children(node))
+        match tree.kind(node):
+            case NodeKind.BLOCK:
+                for statement in children:
+                    self._statement(statement)
+            case NodeKind.DECLARATION:
+                if children:
+                    self._expression(children[0])
+                else:
+                    zero = self._zero(str(tree.value(node)))
+                    _ = emit(OpCode.LOAD_CONST, self._constant(zero), line)
+                _ = emit(OpCode.STORE_VAR, self._slots[str(tree.value(node))], line)
+            case NodeKind.ASSIGNMENT:
+                slot = self._slot(str(tree.value(node)), node)
+                self._expression(children[0])
+                _ = emit(OpCode.STORE_VAR, slot, line)
+            case NodeKind.PRINT:
+                self._expression(children[0])
+                _ = emit(OpCode.PRINT, 0, line)
+            case NodeKind.EXPRESSION_STATEMENT:
+                self._expression(children[0])
+                _ = emit(OpCode.POP, 0, line)
+            case NodeKind.IF:
+                self._if(node, children)
+            case NodeKind.WHILE:
+                self._while(node, children)
+            case kind:
+                raise JoySyntaxError(f"Node {kind.name} is not a statement")
+
+    def _if(self, node: int, children: list[int]) -> None:
+        condition, then, *otherwise = children
+        skip_then = self._jump_unless(condition, self._tree.lines[node])
+        self._branch(then)
+        if not otherwise:
+            self.bytecode.patch(skip_then, len(self.bytecode))
+            return
+        skip_else = self.bytecode.emit(OpCode.JUMP, 0, self._tree.lines[node])
+        self.bytecode.patch(skip_then, len(self.bytecode))
+        self._branch(otherwise[0])
+        self.bytecode.patch(skip_else, len(self.bytecode))
+
+    def _while(self, node: int, children: list[int]) -> None:
+        condition, body = children
+        line = self._tree.lines[node]
+        start = len(self.bytecode)
+        leave = self._jump_unless(condition, line)
+        self._loops += 1
+        self._statement(body)
+        self._loops -= 1
+        _ = self.bytecode.emit(OpCode.LOOP, start, line)
+        self.bytecode.patch(leave, len(self.bytecode))
+
+    def _jump_unless(self, condition: int, line: int) -> int:
+        """
+        Compiles condition and a jump taken when it is false, to be patched.
+        A comparison and the jump become one instruction, so its result
+        decides the branch without being pushed as 0 or 1.
+        """
+        self._expression(condition)
+        code = self.bytecode.code
+        fused = COMPARE_JUMP_OPCODES.get(code[-2]) if code else None
+        if fused is None:
+            return self.bytecode.emit(OpCode.JUMP_IF_FALSE, 0, line)
+        code[-2] = fused
+        return len(self.bytecode) - 1
+
+    def _branch(self, node: int) -> None:
+        if not self.lazy or self._loops:
+            self._statement(node)
+            return
+        line = self._tree.lines[node]
+        _ = self.bytecode.emit(OpCode.LAZY_BRANCH, len(self._branches), line)
+        self._branches.append(node)
+
+    def _expression(self, node: int) -> None:
+        tree = self._tree
+        if tree.kind(node) == NodeKind.STRING:
+            _ = self.bytecode.emit(
+                OpCode.LOAD_CONST, self._constant(tree.value(node)), tree.lines[node]
+            )
+            return
+        rpn = flatten_expression(tree, node, self._slot, self.optimize, self._types)
+        self._emit_rpn(rpn, node)
+
+    def _emit_rpn(self, rpn: Iterable[Symbol], node: int) -> None:
+        emit = self.bytecode.emit
+        line = self._tree.lines[node]
+        for symbol in rpn:
+            if symbol.type == SymbolType.NUMBER:
+                constant = self._constant(parse_number(symbol.value))
+                _ = emit(OpCode.LOAD_CONST, constant, line)
+            elif symbol.type == SymbolType.SYMBOL:
+                _ = emit(OpCode.LOAD_VAR, self._slot(symbol.value, node), line)
+            elif symbol.argument_count == 2:
+                _ = emit(BINARY_OPCODES[symbol.value], 0, line)
+            else:
+                _ = emit(UNARY_OPCODES[symbol.value], 0, line)
@@ -0,0 +1,7 @@
+NUMBERS = ".0123456789"
+HEX_NUMBERS = "0123456789abcdefABCDEF"  # prefix 0x
+BIN_NUMBERS = "01"  # prefix 0b
+SYMBOL_NAMES = "abcdefghijklmnoprstuwvxyz.ABCDEFGHIJKLMNOPRSTUWVXYZ_0123456789"
+OPERATOR_DIGITS = "!$%^&*+-=#@?|`/\\<>~"
+OPERATORS = ["+", "-", "/", "*", "%", "=", ">", ">=", "<", "<=", "==", "!="]
+KEYWORDS = ["var", "if", "else", "while", "print"]
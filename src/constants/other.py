@@ -1,2 +1,8 @@
+VERSION = "0.1.0"
 SOURCE_CODE_FILE_EXTENSION = ".joy"
 BYTECODE_FILE_EXTENSION = ".bcj"
+READ_CHUNK_SIZE = 64 * 1024
+CACHE_DIRECTORY_ENVIRONMENT_VARIABLE = "JOY_CACHE_DIR"
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+JIT_HOT_LOOP_THRESHOLD = 64
@@ -1,7 +1,12 @@
+import io
 from collections import deque
-from typing import Callable, override
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, Callable, override
 
 from src.exceptions.ExpressionError import ExpressionError
+from src.expression_cache import DEFAULT_CACHE_SIZE, ExpressionCache
+from src.rpn_compiler import CompiledFunction, compile_rpn
+from src.rpn_optimizer import FoldReport, fold_constants
 from src.joyTypes.Symbol import (
     Symbol,
     SymbolType,
@@ -10,14 +15,90 @@ from src.joyTypes.Symbol import (
     unary_operators,
 )
 from src.joyTypes.Token import Token, TokenType
+from src.profiler import Profiler
 from src.tokenizer import Tokenizer
+from src.variable_slots import VariableSlots
 
 MAX_PRECEDENCE = 100
 
+_START_SYMBOL = Symbol.interned("0", SymbolType.NUMBER, 0)
+_CLOSE_SYMBOL = Symbol.interned(")", SymbolType.PARENTHESIS_CLOSE, 0)
+
+# instructions of a ResolvedRPN
+_CONSTANT = 0
+_LOAD = 1
+_BINARY = 2
+_UNARY = 3
+_NO_SLOT = -1
+
+
+class ResolvedRPN:
+    """
+    RPN with every name replaced by its slot in one VariableSlots table and
+    every operator by its function. Stack depth is checked while resolving,
+    so solving needs no checks of its own.
+    """
+
+    __slots__ = ("instructions", "target", "table")
+
+    instructions: list[tuple[int, Any]]
+    target: int
+    table: VariableSlots
+
+    def __init__(
+        self, instructions: list[tuple[int, Any]], target: int, table: VariableSlots
+    ) -> None:
+        self.instructions = instructions
+        self.target = target
+        self.table = table
+
+
+def _binary_zero(x: float, y: float) -> float:
+    return 0
+
+
+def _unary_zero(x: float) -> float:
+    return 0
+
+
+def _statements(tokens: list[Token]) -> Iterator[tuple[int, int]]:
+    """Bounds of the non-empty statements of tokens, split on ';'."""
+    start = 0
+    for stop, token in enumerate(tokens):
+        if token.type == TokenType.END_OF_STATEMENT:
+            if stop > start:
+                yield start, stop
+            start = stop + 1
+    if len(tokens) > start:
+        yield start, len(tokens)
+
+
+class CompiledExpression:
+    __slots__ = ("rpn", "names", "function", "report", "resolved")
+
+    rpn: deque[Symbol]
+    names: tuple[str, ...]
+    function: CompiledFunction | None
+    report: FoldReport | None
+    resolved: ResolvedRPN | None
+
+    def __init__(self, rpn: deque[Symbol], report: FoldReport | None = None) -> None:
+        self.rpn = rpn
+        self.function = None
+        self.report = report
+        self.resolved = None
+        self.names = tuple(
+            dict.fromkeys(
+                symbol.value for symbol in rpn if symbol.type == SymbolType.SYMBOL
+            )
+        )
+
 
 class Evaluator:
     operator_stack: list[Token]
-    variables: dict[str, float]
+    _variables: VariableSlots
+    cache: ExpressionCache[CompiledExpression]
+    optimize: bool
 
     operations: dict[str, Callable[[float, float], float]] = {
         "!=": lambda x, y: int(x != y),
@@ -28,6 +109,7 @@ class Evaluator:
         ">": lambda x, y: int(x > y),
         "/": lambda x, y: x / y,
         "*": lambda x, y: x * y,
+        "%": lambda x, y: x % y,
         "+": lambda x, y: x + y,
         "-": lambda x, y: x - y,
     }
@@ -41,16 +123,45 @@ class Evaluator:
         self,
         operator_stack: list[Token] | None = None,
         variables: dict[str, float] | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache: ExpressionCache[CompiledExpression] | None = None,
+        optimize: bool = True,
     ):
         self.operator_stack = operator_stack if operator_stack else []
-        self.variables = variables if variables else {}
+        self._variables = VariableSlots(variables)
+        self.cache = cache if cache is not None else ExpressionCache(cache_size)
+        self.optimize = optimize
+
+    @property
+    def variables(self) -> VariableSlots:
+        return self._variables
+
+    @variables.setter
+    def variables(self, variables: Mapping[str, float]) -> None:
+        # refill the same table, so resolved expressions keep their slots
+        self._variables.replace(variables)
 
     def _create_rpn_from_tokens(self, tokens: list[Token]) -> deque[Symbol]:
-        holding_stack: deque[Symbol] = deque()
-        output_stack: deque[Symbol] = deque()
-        previous_symbol: Symbol = Symbol("0", SymbolType.NUMBER, 0)
+        return self._fill_rpn(tokens, 0, len(tokens), deque(), deque())
 
-        for i, c in enumerate(tokens):
+    def _fill_rpn(
+        self,
+        tokens: list[Token],
+        start: int,
+        stop: int,
+        holding_stack: deque[Symbol],
+        output_stack: deque[Symbol],
+    ) -> deque[Symbol]:
+        """
+        Converts tokens[start:stop] to RPN in output_stack, using both given
+        deques from empty so a caller converting many statements reuses them.
+        """
+        holding_stack.clear()
+        output_stack.clear()
+        previous_symbol: Symbol = _START_SYMBOL
+
+        for i in range(start, stop):
+            c = tokens[i]
             if c.type == TokenType.NUMBER:
                 _sym = Symbol(str(c.value), SymbolType.NUMBER, 0)
                 output_stack.append(_sym)
@@ -58,7 +169,7 @@ class Evaluator:
                 continue
 
             if c.type == TokenType.PARENTHESIS_OPEN:
-                _sym = Symbol(c.token, SymbolType.PARENTHESIS_OPEN, 0)
+                _sym = Symbol.interned(c.token, SymbolType.PARENTHESIS_OPEN, 0)
                 holding_stack.appendleft(_sym)
                 previous_symbol = _sym
                 continue
@@ -76,19 +187,18 @@ class Evaluator:
                     and holding_stack[0].type is SymbolType.PARENTHESIS_OPEN
                 ):
                     _ = holding_stack.popleft()
-                previous_symbol = Symbol(")", SymbolType.PARENTHESIS_CLOSE, 0)
+                previous_symbol = _CLOSE_SYMBOL
                 continue
 
             if c.type == TokenType.SYMBOL:
-                if c.token not in self.variables:
-                    self.variables[c.token] = 0.0
-                _sym = Symbol(str(c.token), SymbolType.SYMBOL, 0)
+                _ = self._variables.register(c.token)
+                _sym = Symbol.interned(c.token, SymbolType.SYMBOL, 0)
                 output_stack.append(_sym)
                 previous_symbol = _sym
                 continue
 
             if c.type == TokenType.KEYWORD:
-                _sym = Symbol(str(c.token), SymbolType.KEYWORD, 0)
+                _sym = Symbol.interned(c.token, SymbolType.KEYWORD, 0)
                 output_stack.append(_sym)
                 previous_symbol = _sym
                 continue
@@ -112,7 +222,7 @@ class Evaluator:
                 and c.token == "="
                 and previous_symbol.type == SymbolType.SYMBOL
             ):
-                _sym = Symbol(str(c.token), SymbolType.ASSIGNMENT, 0)
+                _sym = Symbol.interned(c.token, SymbolType.ASSIGNMENT, 0)
                 holding_stack.append(_sym)
                 previous_symbol = _sym
                 continue
@@ -129,7 +239,6 @@ class Evaluator:
             ):
                 raise ExpressionError(f"Symbol {c} is not a valid symbol.")
 
-            new_operator = Symbol(c.token, SymbolType.OPERATOR, 2)
             if (c.token == "-" or c.token == "+") and (
                 previous_symbol.type
                 not in [
@@ -137,10 +246,13 @@ class Evaluator:
                     SymbolType.PARENTHESIS_CLOSE,
                     SymbolType.SYMBOL,
                 ]
-                or i == 0
+                or i == start
             ):
-                new_operator.precedence = MAX_PRECEDENCE
-                new_operator.argument_count = 1
+                new_operator = unary_operators[c.token]
+            elif c.token in binary_operators:
+                new_operator = binary_operators[c.token]
+            else:
+                new_operator = Symbol.interned(c.token, SymbolType.OPERATOR, 2)
 
             while (
                 holding_stack and holding_stack[0].type != SymbolType.PARENTHESIS_OPEN
@@ -153,49 +265,47 @@ class Evaluator:
                     output_stack.append(_sym)
                     continue
                 break
-            _sym = Symbol(
-                c.token,
-                SymbolType.OPERATOR,
-                new_operator.argument_count,
-                new_operator.precedence,
-            )
-            holding_stack.appendleft(_sym)
-            previous_symbol = _sym
+            holding_stack.appendleft(new_operator)
+            previous_symbol = new_operator
         while holding_stack:
             output_stack.append(holding_stack.popleft())
 
         return output_stack
 
-    def _solve_rpn(self, stack: deque[Symbol]) -> float:
-        output: deque[float] = deque()
+    def _resolve_rpn(self, stack: Iterable[Symbol], register: bool) -> ResolvedRPN:
+        """
+        Resolves RPN against this evaluator's variables, raising the errors
+        solving it would. With register, every name read gets a slot, else
+        names without a value are taken as the assignment target.
+        """
+        table = self._variables
+        instructions: list[tuple[int, Any]] = []
+        depth = 0
         _is_var = False
         _variable_name = None
         _is_assignment = False
 
         for symbol in stack:
-            args: list[float] = []
             if symbol.type == SymbolType.KEYWORD:
                 if symbol.value == "var":
                     _is_var = True
                 continue
             if symbol.type == SymbolType.NUMBER:
-                output.appendleft(float(symbol.value))
+                instructions.append((_CONSTANT, float(symbol.value)))
+                depth += 1
                 continue
             if symbol.type == SymbolType.OPERATOR:
                 if symbol.value == "=":
                     _is_assignment = True
                     continue
-                args = []
-                for _ in range(symbol.argument_count):
-                    if not output:
-                        raise ExpressionError(
-                            f"Expression invalid, expected {symbol.argument_count} got {len(output)}, left {symbol.argument_count - len(args)} {symbol}"
-                        )
-                    args.append(output.popleft())
+                if depth < symbol.argument_count:
+                    raise ExpressionError(
+                        f"Expression invalid, expected {symbol.argument_count} got 0, left {symbol.argument_count - depth} {symbol}"
+                    )
             if symbol.type == SymbolType.SYMBOL:
-                if symbol.value in self.variables and not _is_var:
-                    value = self.variables[symbol.value]
-                    output.appendleft(value)
+                if not _is_var and (register or symbol.value in table):
+                    instructions.append((_LOAD, table.slot(symbol.value)))
+                    depth += 1
                     continue
                 if _variable_name and _is_var:
                     raise ExpressionError(
@@ -204,24 +314,24 @@ class Evaluator:
                 _variable_name = symbol.value
                 continue
 
-            result: float = 0
             match symbol.argument_count:
                 case 2:
                     if symbol.value not in binary_operators:
                         raise ExpressionError(
                             f"Unknown operator '{symbol.value}' for {symbol.argument_count}"
                         )
-                    if symbol.value == "(":
-                        continue
-                    if symbol.value in self.operations:
-                        result = self.operations[symbol.value](args[1], args[0])
+                    operation = self.operations.get(symbol.value, _binary_zero)
+                    instructions.append((_BINARY, operation))
+                    depth -= 1
+                    continue
                 case 1:
                     if symbol.value not in unary_operators.keys():
                         raise ExpressionError(
                             f"Unknown operator '{symbol.value}' for {symbol.argument_count}"
                         )
-                    if symbol.value in self.unary_operations:
-                        result = self.unary_operations[symbol.value](args[0])
+                    operation = self.unary_operations.get(symbol.value, _unary_zero)
+                    instructions.append((_UNARY, operation))
+                    continue
                 case 0:
                     if symbol.value == "var":
                         _is_var = True
@@ -233,21 +343,152 @@ class Evaluator:
                     raise ExpressionError(
                         f"Symbol {symbol} expected {symbol.argument_count}"
                     )
-            output.appendleft(result)
+            instructions.append((_CONSTANT, 0))
+            depth += 1
+
+        target = _NO_SLOT
+        if _is_var and _variable_name and _is_assignment:
+            target = table.slot(_variable_name)
+        return ResolvedRPN(instructions, target, table)
+
+    def _solve_resolved(self, resolved: ResolvedRPN) -> float:
+        values = resolved.table.values
+        output: list[float] = []
+        push = output.append
+        pop = output.pop
+
+        for op, argument in resolved.instructions:
+            if op == _LOAD:
+                value = values[argument]
+                if value is None:
+                    # emptied since resolving, reads register it like a new name
+                    value = values[argument] = 0.0
+                push(value)
+            elif op == _CONSTANT:
+                push(argument)
+            elif op == _BINARY:
+                right = pop()
+                output[-1] = argument(output[-1], right)
+            else:
+                output[-1] = argument(output[-1])
 
         if len(output) != 1:
-            raise ExpressionError(f"Expression led to no result {output}")
-        if len(output) == 1 and _is_var and _variable_name and _is_assignment:
-            self.variables[_variable_name] = output.popleft()
-            return self.variables[_variable_name]
-        return output.popleft()
+            raise ExpressionError(
+                f"Expression led to no result {deque(reversed(output))}"
+            )
+        if resolved.target != _NO_SLOT:
+            values[resolved.target] = output[0]
+        return output[0]
+
+    def _solve_rpn(self, stack: deque[Symbol]) -> float:
+        return self._solve_resolved(self._resolve_rpn(stack, register=False))
+
+    def _compile_expression(self, code_line: str) -> CompiledExpression:
+        compiled = self.cache.get(code_line)
+        if compiled is None:
+            tokenizer = Tokenizer()
+            tokens = tokenizer.tokenize(code_line)
+            rpn = self._create_rpn_from_tokens(tokens)
+            report = None
+            if self.optimize:
+                rpn, report = fold_constants(
+                    rpn, self.operations, self.unary_operations
+                )
+            return self.cache.put(code_line, CompiledExpression(rpn, report))
+        return compiled
+
+    def fold_report(self, code_line: str) -> FoldReport | None:
+        """Returns what constant folding removed from code_line, if enabled."""
+        return self._compile_expression(code_line).report
 
     def evaluate(self, code_line: str = "") -> float:
-        tokenizer = Tokenizer()
-        tokens = tokenizer.tokenize(code_line)
-        rpn = self._create_rpn_from_tokens(tokens)
-        result = self._solve_rpn(rpn)
-        return result
+        compiled = self._compile_expression(code_line)
+        resolved = compiled.resolved
+        if resolved is None or resolved.table is not self._variables:
+            # a cache shared between evaluators re-resolves on each switch
+            resolved = compiled.resolved = self._resolve_rpn(compiled.rpn, True)
+        return self._solve_resolved(resolved)
+
+    def evaluate_program(
+        self, source: str, profiler: Profiler | None = None
+    ) -> list[float]:
+        """
+        Evaluates every statement of source, separated by ';', against this
+        evaluator's variables and returns their results in order, each the
+        same evaluate would give. The whole program is tokenized once and
+        every statement goes through the same RPN buffers. Statements run
+        once, so they are neither folded nor cached.
+
+        An enabled profiler gets the tokenize, rpn, resolve and solve phases
+        and the time of every statement charged to its line.
+        """
+        if profiler is not None and profiler.enabled:
+            with profiler.phase("tokenize"):
+                tokens = list(Tokenizer().iter_tokens(io.StringIO(source)))
+            return self._evaluate_profiled(tokens, profiler)
+        tokens = list(Tokenizer().iter_tokens(io.StringIO(source)))
+        holding_stack: deque[Symbol] = deque()
+        rpn: deque[Symbol] = deque()
+        results: list[float] = []
+        for start, stop in _statements(tokens):
+            try:
+                _ = self._fill_rpn(tokens, start, stop, holding_stack, rpn)
+                resolved = self._resolve_rpn(rpn, register=True)
+                results.append(self._solve_resolved(resolved))
+            except ExpressionError as e:
+                raise ExpressionError(f"{e} at line {tokens[start].line}") from e
+            except ZeroDivisionError as e:
+                raise ZeroDivisionError(f"{e} at line {tokens[start].line}") from e
+        return results
+
+    def _evaluate_profiled(
+        self, tokens: list[Token], profiler: Profiler
+    ) -> list[float]:
+        # the same loop as evaluate_program's, kept apart so that one pays
+        # nothing for profiling
+        holding_stack: deque[Symbol] = deque()
+        rpn: deque[Symbol] = deque()
+        results: list[float] = []
+        for start, stop in _statements(tokens):
+            try:
+                with profiler.line(tokens[start].line):
+                    with profiler.phase("rpn"):
+                        _ = self._fill_rpn(tokens, start, stop, holding_stack, rpn)
+                    with profiler.phase("resolve"):
+                        resolved = self._resolve_rpn(rpn, register=True)
+                    with profiler.phase("solve"):
+                        results.append(self._solve_resolved(resolved))
+            except ExpressionError as e:
+                raise ExpressionError(f"{e} at line {tokens[start].line}") from e
+            except ZeroDivisionError as e:
+                raise ZeroDivisionError(f"{e} at line {tokens[start].line}") from e
+        return results
+
+    def compile(self, code_line: str) -> CompiledFunction:
+        """
+        Compiles code_line into a Python function of a variables mapping
+        returning the same result as evaluate. Names missing from the mapping
+        read as 0.0, and a var assignment is stored into the mapping.
+        """
+        compiled = self._compile_expression(code_line)
+        if compiled.function is None:
+            compiled.function = compile_rpn(compiled.rpn, code_line)
+        return compiled.function
+
+    def evaluate_batch(self, code_line: str, columns: Mapping[str, Any]) -> Any:
+        """
+        Evaluates code_line once per row of columns, a mapping of variable
+        names to equal-length arrays, and returns the results as a NumPy
+        array. Comparisons give 0.0/1.0. Requires NumPy.
+        """
+        try:
+            from src.vectorized import solve_rpn_batch
+        except ImportError as e:
+            raise ImportError(
+                "Evaluator.evaluate_batch requires numpy, install joy[numpy]"
+            ) from e
+        compiled = self._compile_expression(code_line)
+        return solve_rpn_batch(compiled.rpn, columns, self.variables)
 
     @override
     def __str__(self) -> str:
@@ -0,0 +1,2 @@
+class BytecodeError(Exception):
+    pass
@@ -0,0 +1,2 @@
+class JoySyntaxError(Exception):
+    pass
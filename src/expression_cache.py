@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from typing import override
+
+DEFAULT_CACHE_SIZE = 512
+
+
+class ExpressionCache[T]:
+    """
+    Bounded least-recently-used cache keyed by expression source.
+    A maxsize of 0 disables caching.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    _entries: OrderedDict[str, T]
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 0:
+            raise ValueError(f"Cache size must not be negative, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> T | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: T) -> T:
+        if self.maxsize == 0:
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            _ = self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Drops one entry, or every entry when key is None."""
+        if key is None:
+            self._entries.clear()
+            return
+        _ = self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    @override
+    def __repr__(self) -> str:
+        return f"ExpressionCache({self.stats()})"
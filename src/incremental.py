@@ -0,0 +1,281 @@
+import io
+from bisect import bisect_right
+from itertools import accumulate, compress, count, repeat
+from operator import ne
+
+from src.abstract_syntax_tree import NO_NODE, AbstractSyntaxTree, NodeKind
+from src.exceptions.TokenizerValueError import TokenizerValueError
+from src.joyTypes.Token import Token, TokenType
+from src.tokenizer import Tokenizer
+
+# lines a region grows to before it is cut, fewer re-parse less around an
+# edit but cost more per region when the tree is put together
+_REGION_LINES = 16
+
+
+class _Region:
+    """
+    Whole source lines holding whole top-level statements, parsed on their
+    own. A region starts where the lexer and the parser are both at rest, no
+    string, parenthesis or scope open, so its tokens and tree depend on its
+    text alone and only its line numbers move when lines above it change.
+    """
+
+    text: str
+    lines: int
+    tree: AbstractSyntaxTree
+    statements: list[int]
+    parsed_line: int
+    empty: bool
+
+    def __init__(
+        self, text: str, tree: AbstractSyntaxTree, parsed_line: int, empty: bool
+    ) -> None:
+        self.text = text
+        self.lines = text.count("\n") + (not text.endswith("\n") and text != "")
+        self.tree = tree
+        self.statements = list(tree.children(tree.root))
+        self.parsed_line = parsed_line
+        self.empty = empty
+
+
+def _closes_statement(tokens: list[Token], index: int, depth: int) -> bool:
+    """Whether tokens[index] ends a top-level statement, depth after it."""
+    token = tokens[index]
+    if depth != 0:
+        return False
+    if token.type == TokenType.END_OF_STATEMENT:
+        return True
+    if token.type != TokenType.SCOPE_CLOSE:
+        return False
+    following = tokens[index + 1] if index + 1 < len(tokens) else None
+    return not (
+        following is not None
+        and following.type == TokenType.KEYWORD
+        and following.token == "else"
+    )
+
+
+def _split(tokens: list[Token]) -> list[int] | None:
+    """
+    Token indexes the regions of tokens start at, cut after top-level
+    statements ending a line once a region spans _REGION_LINES lines. None
+    when the last statement is left open.
+    """
+    starts = [0]
+    region_line = tokens[0].line if tokens else 0
+    depth = 0
+    closed = True
+    for index, token in enumerate(tokens):
+        if token.type == TokenType.SCOPE_OPEN:
+            depth += 1
+        elif token.type == TokenType.SCOPE_CLOSE:
+            depth -= 1
+        closed = _closes_statement(tokens, index, depth)
+        if (
+            closed
+            and index + 1 < len(tokens)
+            and tokens[index + 1].line > token.line
+            and token.line - region_line + 1 >= _REGION_LINES
+        ):
+            starts.append(index + 1)
+            region_line = tokens[index + 1].line
+    return starts if closed or not tokens else None
+
+
+def _split_lines(text: str) -> list[str]:
+    """Lines of text with their "\n", the only line break the tokenizer counts."""
+    lines = text.splitlines(keepends=True)
+    if len(lines) == text.count("\n") + (not text.endswith("\n") and text != ""):
+        # splitlines also breaks at "\r" and others, with as many lines as
+        # "\n" gives it broke at the same places
+        return lines
+    lines = list(map(str.__add__, text.split("\n"), repeat("\n")))
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        _ = lines.pop()
+    return lines
+
+
+class IncrementalParser:
+    """
+    Front end keeping a program parsed across edits. The source is cut into
+    regions of whole lines and whole top-level statements, each tokenized
+    and parsed on its own and kept by its text. An edit re-tokenizes and
+    re-parses the regions it touches, growing that window while the edit
+    leaves a string, block or statement open past it, and keeps every
+    other region's tokens and tree, so the work follows the edit's size.
+
+    tree() joins the regions' trees into one AbstractSyntaxTree equal to
+    parsing the whole source, with array copies rather than parsing.
+    """
+
+    regions: list[_Region]
+    _lines: list[str]
+    _cache: dict[str, _Region]
+
+    def __init__(self, source: str = "") -> None:
+        self.regions = []
+        self._lines = []
+        self._cache = {}
+        self.update(source)
+
+    @property
+    def source(self) -> str:
+        return "".join(self._lines)
+
+    def update(self, source: str) -> None:
+        """Moves to a new version of the whole source, parsing what changed."""
+        lines = _split_lines(source)
+        old = self._lines
+        if not self.regions:
+            self._replace(0, 0, lines)
+            return
+        limit = min(len(old), len(lines))
+        # the first differing line counted from each end, zip stops at limit
+        prefix = next(compress(count(), map(ne, old, lines)), limit)
+        if prefix == len(old) == len(lines):
+            return
+        suffix = next(
+            compress(count(), map(ne, reversed(old), reversed(lines))), limit
+        )
+        suffix = min(suffix, limit - prefix)
+        self._replace(prefix, len(old) - suffix, lines[prefix : len(lines) - suffix])
+
+    def replace_lines(self, start: int, stop: int, text: str) -> None:
+        """
+        Replaces source lines start up to stop, counted from 0 like a slice,
+        with text, as an editor reports a change.
+        """
+        if not 0 <= start <= stop <= len(self._lines):
+            raise ValueError(
+                f"Lines {start} to {stop} are outside the {len(self._lines)} lines"
+            )
+        self._replace(start, stop, _split_lines(text))
+
+    def _replace(self, start: int, stop: int, lines: list[str]) -> None:
+        starts = list(accumulate((region.lines for region in self.regions), initial=0))
+        first = min(bisect_right(starts, start) - 1, max(0, len(self.regions) - 1))
+        # text put before a region may continue the one above it, an else
+        # after its closing brace for one
+        if starts[first] == start and first > 0:
+            first -= 1
+        last = bisect_right(starts, max(start, stop - 1)) - 1
+        last = min(max(first, last), len(self.regions) - 1)
+        before = self._lines[starts[first] : start]
+        growth = 1
+        while True:
+            after = self._lines[stop : starts[last + 1]]
+            text = "".join(before + lines + after)
+            regions = self._parse_window(text, starts[first] + 1)
+            if regions is not None:
+                break
+            if last + 1 >= len(self.regions):
+                # nothing left to take in, parse it again for the error
+                regions = self._parse_window(text, starts[first] + 1, final=True)
+                break
+            # the edit opened something the next regions may close, take in
+            # more of them each time so a long open stretch stays linear
+            last = min(last + growth, len(self.regions) - 1)
+            growth *= 2
+
+        assert regions is not None
+        self.regions[first : last + 1] = regions
+        self._lines[start:stop] = lines
+        for region in regions:
+            self._cache[region.text] = region
+        if len(self._cache) > 2 * len(self.regions) + 64:
+            self._cache = {region.text: region for region in self.regions}
+
+    def _parse_window(
+        self, text: str, first_line: int, final: bool = False
+    ) -> list[_Region] | None:
+        """
+        Cuts text starting at first_line into parsed regions, or None when
+        it ends inside a string, a block or a statement, unless final.
+        """
+        try:
+            tokens = list(
+                Tokenizer().iter_tokens(io.StringIO(text), first_line=first_line)
+            )
+        except TokenizerValueError:
+            if final:
+                raise
+            return None
+        cuts = _split(tokens)
+        if cuts is None:
+            if not final:
+                return None
+            cuts = [0]
+        lines = _split_lines(text)
+        regions = []
+        for index, cut in enumerate(cuts):
+            end = cuts[index + 1] if index + 1 < len(cuts) else len(tokens)
+            line = tokens[cut].line if index else first_line
+            next_line = (
+                tokens[end].line if end < len(tokens) else first_line + len(lines)
+            )
+            region_text = "".join(
+                lines[line - first_line : next_line - first_line]
+            )
+            cached = self._cache.get(region_text)
+            if cached is not None:
+                regions.append(cached)
+                continue
+            tree = AbstractSyntaxTree()
+            _ = tree.parse_tokens(tokens[cut:end])
+            regions.append(_Region(region_text, tree, line, cut == end))
+        return regions
+
+    def tree(self) -> AbstractSyntaxTree:
+        """The whole program's tree, as AbstractSyntaxTree.parse would give."""
+        result = AbstractSyntaxTree()
+        kinds, operands = result.kinds, result.operands
+        first_child, next_sibling = result.first_child, result.next_sibling
+        lines, columns = result.lines, result.columns
+        line = 1
+        program_line, program_column = 1, 1
+        found_token = False
+        first_statement = NO_NODE
+        previous_statement = NO_NODE
+        for region in self.regions:
+            tree = region.tree
+            shift = line - region.parsed_line
+            line += region.lines
+            if region.empty:
+                continue
+            offset = len(kinds)
+            count = len(tree.kinds) - 1  # all but the region's program node
+            if not found_token:
+                found_token = True
+                program_line = tree.lines[tree.root] + shift
+                program_column = tree.columns[tree.root]
+            # lookup tables mapping the region's indexes, their last entry
+            # is what NO_NODE, index -1, maps to
+            values = [result._value(value) for value in tree.values]
+            values.append(NO_NODE)
+            nodes = list(range(offset, offset + count))
+            nodes.append(NO_NODE)
+            kinds.extend(tree.kinds[:count])
+            operands.extend(map(values.__getitem__, tree.operands[:count]))
+            first_child.extend(map(nodes.__getitem__, tree.first_child[:count]))
+            next_sibling.extend(map(nodes.__getitem__, tree.next_sibling[:count]))
+            if shift:
+                lines.extend(map(shift.__add__, tree.lines[:count]))
+            else:
+                lines.extend(tree.lines[:count])
+            columns.extend(tree.columns[:count])
+            if region.statements:
+                if previous_statement == NO_NODE:
+                    first_statement = offset + region.statements[0]
+                else:
+                    next_sibling[previous_statement] = offset + region.statements[0]
+                previous_statement = offset + region.statements[-1]
+        result.root = len(kinds)
+        kinds.append(NodeKind.PROGRAM)
+        operands.append(NO_NODE)
+        first_child.append(first_statement)
+        next_sibling.append(NO_NODE)
+        lines.append(program_line)
+        columns.append(program_column)
+        return result
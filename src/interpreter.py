@@ -1,40 +1,156 @@
+import io
 from decimal import DivisionByZero
+from enum import Enum
 from os.path import isdir, exists
 from pathlib import Path
+from types import CodeType
 
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.bytecode import Bytecode
+from src.bytecode_cache import BytecodeCache, write_atomically
+from src.compiler import Compiler
 from src.exceptions.VariableDuplicateName import VariableDuplicateName
 from src.exceptions.VariableEmptyName import VariableEmptyName
 from src.exceptions.VariableIllegalName import VariableIllegalName
 from src.exceptions.VariableWhitespaceName import VariableWhitespaceName
 from src.joyTypes.Variable import Variable
+from src.profiler import Profiler
 from src.exceptions.FileEmptyError import FileEmptyError
 from src.constants import keywords, other
 from src.exceptions.FileWrongTypeError import FileWrongTypeError
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
 
 
-def run(source_path: str, target_path: str = "./output"):
-    compile(source_path, target_path)
+class Backend(Enum):
+    VM = "vm"
+    PYTHON = "python"
 
 
-def compile(source_path: str, target_path: str):
-    syntax_tree = create_syntax_tree(source_path)
-    bytecode = convert_syntax_tree_to_byte_code(syntax_tree)
-
-
-def create_syntax_tree(source_path: str):
-    variables = {}
-    source_file_lines = read_source_file(source_path)
-    for line in source_file_lines:
-        if line.startswith(keywords.VARIABLE):
-            name = get_variable_name(line)
-            register_variable(name, variables)
-        if line.split(" ", 1)[0] in variables.keys():
-            name, value = line.split(" ", 1)[0], line.split(keywords.ASSIGNMENT, 1)[-1]
-            assign_value_to_variable(value, name, variables)
-    pass
-
-
-def read_source_file(source_path: str):
+def run(
+    source_path: str,
+    target_path: str | None = None,
+    use_cache: bool = True,
+    cache_directory: str | None = None,
+    backend: Backend | str = Backend.VM,
+):
+    if Backend(backend) == Backend.PYTHON:
+        if target_path is not None:
+            raise ValueError("The Python backend writes no bytecode file")
+        from src.python_backend import run_code
+
+        cache = BytecodeCache(cache_directory) if use_cache else None
+        return run_code(compile_python(source_path, cache))
+    if source_path.endswith(other.BYTECODE_FILE_EXTENSION):
+        bytecode = read_bytecode_file(source_path)
+    elif not use_cache and target_path is None:
+        # nothing is written out, so branches can wait until they run
+        compiler = Compiler(lazy=True)
+        bytecode = compiler.compile_tree(create_syntax_tree(source_path))
+        return VirtualMachine().run(bytecode, compiler.compile_branch)
+    else:
+        cache = BytecodeCache(cache_directory) if use_cache else None
+        bytecode = compile(source_path, target_path, cache)
+    return VirtualMachine().run(bytecode)
+
+
+def profile(
+    source_path: str,
+    profiler: Profiler,
+    backend: Backend | str = Backend.VM,
+) -> dict[str, float | str]:
+    """
+    Runs source_path like run without a cache, timing every phase in
+    profiler. Source lines are only profiled on the Python backend, whose
+    code carries them, timing single VM instructions would cost more than
+    running them.
+    """
+    with profiler.phase("read"):
+        validate_source_file(source_path)
+        source = Path(source_path).read_bytes()
+    with profiler.phase("tokenize"):
+        tokens = list(Tokenizer().iter_tokens(io.TextIOWrapper(io.BytesIO(source))))
+    syntax_tree = AbstractSyntaxTree()
+    with profiler.phase("parse"):
+        _ = syntax_tree.parse_tokens(tokens)
+    if Backend(backend) == Backend.PYTHON:
+        from src.python_backend import compile_program, run_code
+
+        with profiler.phase("compile"):
+            code = compile_program(syntax_tree, source_path)
+        with profiler.phase("run"), profiler.trace_code(code):
+            return run_code(code)
+    with profiler.phase("compile"):
+        bytecode = convert_syntax_tree_to_byte_code(syntax_tree)
+    with profiler.phase("run"):
+        return VirtualMachine().run(bytecode)
+
+
+def compile(
+    source_path: str,
+    target_path: str | None = None,
+    cache: BytecodeCache | None = None,
+) -> Bytecode:
+    if cache is None:
+        syntax_tree = create_syntax_tree(source_path)
+        bytecode = convert_syntax_tree_to_byte_code(syntax_tree)
+    else:
+        bytecode = compile_cached(source_path, cache)
+    if target_path is not None:
+        write_bytecode_file(bytecode, target_path)
+    return bytecode
+
+
+def compile_cached(source_path: str, cache: BytecodeCache) -> Bytecode:
+    validate_source_file(source_path)
+    source = Path(source_path).read_bytes()
+    key = cache.key(source)
+    bytecode = cache.load(key)
+    if bytecode is None:
+        bytecode = convert_syntax_tree_to_byte_code(_parse_source(source))
+        _ = cache.store(key, bytecode)
+    return bytecode
+
+
+def compile_python(source_path: str, cache: BytecodeCache | None = None) -> CodeType:
+    """Compiles source_path to a CPython code object for run_code."""
+    # the Python backend is imported on first use, most runs are on the VM
+    from src.python_backend import CACHE_BACKEND, compile_program, dump_code, load_code
+
+    validate_source_file(source_path)
+    source = Path(source_path).read_bytes()
+    key = BytecodeCache.key(source, CACHE_BACKEND)
+    if cache is not None:
+        data = cache.load_data(key)
+        code = load_code(data) if data is not None else None
+        if code is not None:
+            return code
+        if data is not None:
+            cache.discard(key)
+    syntax_tree = _parse_source(source)
+    code = compile_program(syntax_tree, source_path)
+    if cache is not None:
+        _ = cache.store_data(key, dump_code(code))
+    return code
+
+
+def _parse_source(source: bytes) -> AbstractSyntaxTree:
+    # tokenize the bytes that were hashed, the file may change meanwhile
+    syntax_tree = AbstractSyntaxTree()
+    _ = syntax_tree.parse_tokens(
+        Tokenizer().iter_tokens(io.TextIOWrapper(io.BytesIO(source)))
+    )
+    return syntax_tree
+
+
+def create_syntax_tree(source_path: str) -> AbstractSyntaxTree:
+    validate_source_file(source_path)
+    syntax_tree = AbstractSyntaxTree()
+    _ = syntax_tree.parse(source_path)
+    return syntax_tree
+
+
+def validate_source_file(source_path: str):
     if not exists(source_path):
         raise FileNotFoundError(f"File not found in path {source_path}")
     if isdir(source_path):
@@ -46,6 +162,10 @@ def read_source_file(source_path: str):
     if Path(source_path).stat().st_size <= 0:
         raise FileEmptyError(f"File is empty {source_path}")
 
+
+def read_source_file(source_path: str):
+    validate_source_file(source_path)
+
     source_file: list[str] = []
     try:
         with open(source_path, "r") as f:
@@ -127,8 +247,17 @@ arithmetic_function_map = {
 }
 
 
-def convert_syntax_tree_to_byte_code(syntax_tree):
-    pass
+def convert_syntax_tree_to_byte_code(syntax_tree: AbstractSyntaxTree) -> Bytecode:
+    return Compiler().compile_tree(syntax_tree)
+
+
+def write_bytecode_file(bytecode: Bytecode, target_path: str):
+    if not target_path.endswith(other.BYTECODE_FILE_EXTENSION):
+        target_path += other.BYTECODE_FILE_EXTENSION
+    write_atomically(Path(target_path), bytecode.to_bytes())
+
 
+def read_bytecode_file(source_path: str) -> Bytecode:
+    with open(source_path, "rb") as f:
+        return Bytecode.from_bytes(f.read())
 
-run("examples/hello.joy")
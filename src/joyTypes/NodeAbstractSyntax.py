@@ -2,6 +2,8 @@ from typing import override
 
 
 class NodeAbstractSyntax:
+    __slots__ = ("value", "left_child", "right_child")
+
     def __init__(
         self,
         value: str = "",
@@ -1,3 +1,4 @@
+from __future__ import annotations
 from enum import Enum
 from typing import override
 
@@ -14,6 +15,8 @@ class SymbolType(Enum):
 
 
 class Symbol:
+    __slots__ = ("value", "type", "argument_count", "precedence")
+
     value: str
     type: SymbolType | None
     argument_count: int
@@ -36,6 +39,26 @@ class Symbol:
                 _precedence = _precedence.precedence
         self.precedence = _precedence
 
+    @classmethod
+    def interned(
+        cls,
+        value: str,
+        type: SymbolType | None = SymbolType.UNKNOWN,
+        argument_count: int = 2,
+        precedence: int = -1,
+    ) -> Symbol:
+        """
+        Returns a shared Symbol for the given fields, created on first use.
+        Interned symbols must not be mutated.
+        """
+        key = (value, type, argument_count, precedence)
+        interned = _interned_symbols.get(key)
+        if interned is None:
+            interned = _interned_symbols[key] = cls(
+                value, type, argument_count, precedence
+            )
+        return interned
+
     @override
     def __eq__(self, value: object, /) -> bool:
         if isinstance(value, Symbol):
@@ -56,8 +79,10 @@ class Symbol:
         return f"Symbol({self.value}, {self.type}, {self.argument_count})"
 
 
+_interned_symbols: dict[tuple[str, SymbolType | None, int, int], Symbol] = {}
+
 binary_operators: dict[str, Symbol] = {
-    "!=": Symbol("==", SymbolType.OPERATOR, 2, 9),
+    "!=": Symbol("!=", SymbolType.OPERATOR, 2, 9),
     "==": Symbol("==", SymbolType.OPERATOR, 2, 8),
     "<=": Symbol("<=", SymbolType.OPERATOR, 2, 7),
     "<": Symbol("<", SymbolType.OPERATOR, 2, 6),
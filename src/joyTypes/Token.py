@@ -1,3 +1,4 @@
+from __future__ import annotations
 from enum import Enum
 from typing import override
 
@@ -20,16 +21,39 @@ class TokenType(Enum):
 
 
 class Token:
+    __slots__ = ("token", "type", "value", "line", "column")
+
     token: str
     type: TokenType
     value: float
+    line: int
+    column: int
 
     def __init__(
-        self, token: str = "", type: TokenType = TokenType.STRING, value: float = 0
+        self,
+        token: str = "",
+        type: TokenType = TokenType.STRING,
+        value: float = 0,
+        line: int = 0,
+        column: int = 0,
     ):
         self.token = token
         self.type = type
         self.value = value
+        self.line = line
+        self.column = column
+
+    @classmethod
+    def interned(cls, token: str, type: TokenType) -> Token:
+        """
+        Returns the shared instance for an operator, keyword or punctuation
+        token. Interned tokens carry no position and must not be mutated.
+        """
+        key = (token, type)
+        interned = _interned_tokens.get(key)
+        if interned is None:
+            interned = _interned_tokens[key] = cls(token, type)
+        return interned
 
     @override
     def __eq__(self, value: object, /) -> bool:
@@ -48,3 +72,6 @@ class Token:
     @override
     def __repr__(self) -> str:
         return self.__str__()
+
+
+_interned_tokens: dict[tuple[str, TokenType], Token] = {}
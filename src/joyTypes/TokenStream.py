@@ -0,0 +1,83 @@
+from array import array
+from collections.abc import Iterator
+from typing import override
+
+from src.joyTypes.Token import Token, TokenType
+
+_TOKEN_TYPES: list[TokenType] = list(TokenType)
+_TOKEN_TYPE_INDEX: dict[TokenType, int] = {
+    token_type: i for i, token_type in enumerate(_TOKEN_TYPES)
+}
+
+_VALUE_TYPES = frozenset([TokenType.NUMBER, TokenType.SYMBOL, TokenType.STRING])
+
+
+def _token_view(token: str, type: TokenType, value: float) -> Token:
+    if type in _VALUE_TYPES:
+        return Token(token, type, value)
+    return Token.interned(token, type)
+
+
+class TokenStream:
+    """
+    Tokens of a source string stored in parallel arrays.
+
+    Only the kind, the source offsets and the numeric value of each token are
+    kept, token text is read from the source on access. Iterating yields
+    Token views, so the stream can be passed anywhere a list of tokens is read.
+    """
+
+    source: str
+    kinds: array
+    starts: array
+    ends: array
+    values: array
+
+    def __init__(self, source: str = "") -> None:
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.values = array("d")
+
+    def append(self, type: TokenType, start: int, end: int, value: float = 0) -> None:
+        self.kinds.append(_TOKEN_TYPE_INDEX[type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.values.append(value)
+
+    def type_at(self, index: int) -> TokenType:
+        return _TOKEN_TYPES[self.kinds[index]]
+
+    def span(self, index: int) -> tuple[int, int]:
+        return self.starts[index], self.ends[index]
+
+    def text(self, index: int) -> str:
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Token:
+        return _token_view(
+            self.source[self.starts[index] : self.ends[index]],
+            _TOKEN_TYPES[self.kinds[index]],
+            self.values[index],
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        source = self.source
+        for kind, start, end, value in zip(
+            self.kinds, self.starts, self.ends, self.values
+        ):
+            yield _token_view(source[start:end], _TOKEN_TYPES[kind], value)
+
+    @override
+    def __eq__(self, value: object, /) -> bool:
+        if isinstance(value, TokenStream):
+            return list(self) == list(value)
+        return False
+
+    @override
+    def __repr__(self) -> str:
+        return f"TokenStream({len(self)} tokens)"
@@ -1,2 +1,29 @@
+import math
+
 type Type = int | str | bool | None
 type TypeOfTypes = "int | str | bool"
+type Number = int | float
+type ValueKey = tuple[type, Number | str, bool]
+
+
+def parse_number(text: str) -> Number:
+    """
+    Value of a number literal, or of the repr of a number. Literals without
+    a decimal point are exact ints, 0x and 0b prefixed ones included.
+    """
+    if text[:2] in ("0x", "0b"):
+        return int(text, 0)
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def value_key(value: Number | str) -> ValueKey:
+    """
+    Key pooling equal values of one type. -0.0 equals 0.0 but prints
+    differently, so a float's sign is part of its key.
+    """
+    if isinstance(value, float):
+        return (float, value, math.copysign(1.0, value) < 0)
+    return (type(value), value, False)
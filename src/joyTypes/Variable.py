@@ -3,6 +3,8 @@ from src.joyTypes.Types import Type, TypeOfTypes
 
 
 class Variable:
+    __slots__ = ("value", "type")
+
     value: Type
     type: TypeOfTypes
 
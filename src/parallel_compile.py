@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from time import perf_counter
+from typing import override
+
+from src.bytecode_cache import write_atomically
+from src.constants.other import BYTECODE_FILE_EXTENSION, SOURCE_CODE_FILE_EXTENSION
+
+# chunks handed out per worker, more chunks balance better but each one
+# is a round trip to the pool
+_CHUNKS_PER_WORKER = 4
+
+
+class FileResult:
+    """Outcome of compiling one file, error is None when it compiled."""
+
+    source: str
+    target: str
+    seconds: float
+    instructions: int
+    error: str | None
+
+    def __init__(
+        self,
+        source: str,
+        target: str,
+        seconds: float,
+        instructions: int = 0,
+        error: str | None = None,
+    ) -> None:
+        self.source = source
+        self.target = target
+        self.seconds = seconds
+        self.instructions = instructions
+        self.error = error
+
+    @override
+    def __repr__(self) -> str:
+        outcome = self.error if self.error is not None else "ok"
+        return f"FileResult({self.source}, {self.seconds * 1e3:.2f}ms, {outcome})"
+
+
+class CompileSummary:
+    """Results of compiling a directory, in the order the files finished."""
+
+    results: list[FileResult]
+    jobs: int
+    seconds: float
+
+    def __init__(self, results: list[FileResult], jobs: int, seconds: float) -> None:
+        self.results = results
+        self.jobs = jobs
+        self.seconds = seconds
+
+    @property
+    def errors(self) -> list[FileResult]:
+        return [result for result in self.results if result.error is not None]
+
+    def report(self, slowest: int = 10) -> str:
+        compile_seconds = sum(result.seconds for result in self.results)
+        rows = [
+            f"compiled {len(self.results) - len(self.errors)} of "
+            f"{len(self.results)} files with {self.jobs} jobs in "
+            f"{self.seconds:.2f}s, {compile_seconds:.2f}s of compiling"
+        ]
+        ranked = sorted(self.results, key=lambda result: result.seconds, reverse=True)
+        for result in ranked[:slowest]:
+            rows.append(f"{result.seconds * 1e3:>10.2f}ms {result.source}")
+        for result in self.errors:
+            rows.append(f"error {result.source}: {result.error}")
+        return "\n".join(rows)
+
+
+def _compile_file(source: str, target: str) -> FileResult:
+    from src.interpreter import compile
+
+    start = perf_counter()
+    try:
+        bytecode = compile(source)
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(Path(target), bytecode.to_bytes())
+    except Exception as e:
+        return FileResult(source, target, perf_counter() - start, error=str(e))
+    return FileResult(source, target, perf_counter() - start, len(bytecode))
+
+
+def _compile_chunk(files: list[tuple[str, str]]) -> list[FileResult]:
+    return [_compile_file(source, target) for source, target in files]
+
+
+def find_sources(directory: str | Path) -> list[Path]:
+    """Every Joy source below directory, in a stable order."""
+    return sorted(Path(directory).rglob(f"*{SOURCE_CODE_FILE_EXTENSION}"))
+
+
+def chunk_by_size(
+    files: list[tuple[str, str]], sizes: list[int], chunks: int
+) -> list[list[tuple[str, str]]]:
+    """
+    Splits files into about chunks lists of similar total size, largest
+    files first, so the big ones start early and the small ones fill the
+    gaps at the end.
+    """
+    order = sorted(range(len(files)), key=lambda index: sizes[index], reverse=True)
+    budget = max(1, sum(sizes) // max(1, chunks))
+    result: list[list[tuple[str, str]]] = []
+    current: list[tuple[str, str]] = []
+    current_size = 0
+    for index in order:
+        current.append(files[index])
+        current_size += sizes[index]
+        if current_size >= budget:
+            result.append(current)
+            current, current_size = [], 0
+    if current:
+        result.append(current)
+    return result
+
+
+def compile_directory(
+    directory: str | Path,
+    jobs: int | None = None,
+    target_directory: str | Path | None = None,
+) -> CompileSummary:
+    """
+    Compiles every .joy file below directory to a .bcj file next to it, or
+    at the same relative path below target_directory, with jobs worker
+    processes, one per core by default. Workers take the next chunk of
+    files whenever they finish one. Files that fail are reported in the
+    summary and do not stop the others.
+    """
+    jobs = jobs if jobs is not None else os.cpu_count() or 1
+    start = perf_counter()
+    sources = find_sources(directory)
+    files = []
+    for source in sources:
+        target = source.with_suffix(BYTECODE_FILE_EXTENSION)
+        if target_directory is not None:
+            target = Path(target_directory) / target.relative_to(directory)
+        files.append((str(source), str(target)))
+
+    if jobs <= 1 or len(files) <= 1:
+        results = _compile_chunk(files)
+        return CompileSummary(results, 1, perf_counter() - start)
+
+    sizes = [source.stat().st_size for source in sources]
+    chunks = chunk_by_size(files, sizes, jobs * _CHUNKS_PER_WORKER)
+    results: list[FileResult] = []
+    with ProcessPoolExecutor(jobs) as executor:
+        pending = {executor.submit(_compile_chunk, chunk) for chunk in chunks}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.extend(future.result())
+    return CompileSummary(results, jobs, perf_counter() - start)
@@ -0,0 +1,279 @@
+import math
+from array import array
+from typing import override
+
+from src.bytecode import (
+    ARGUMENT_LIMIT,
+    JUMP_OPCODES,
+    Bytecode,
+    OpCode,
+    pack_arguments,
+)
+from src.joyTypes.Types import ValueKey, value_key
+
+# jumps followed through chains of jumps before giving up on a cycle
+_MAX_THREADING = 16
+# rounds of the whole pass, removing jumps may expose more to remove
+_MAX_ROUNDS = 4
+
+
+class PeepholeReport:
+    rewrites: list[str]
+    instructions_before: int
+    instructions_after: int
+
+    def __init__(self, instructions_before: int = 0) -> None:
+        self.rewrites = []
+        self.instructions_before = instructions_before
+        self.instructions_after = instructions_before
+
+    @override
+    def __str__(self) -> str:
+        return (
+            f"{self.instructions_before} -> {self.instructions_after} instructions: "
+            + "; ".join(self.rewrites)
+        )
+
+    @override
+    def __repr__(self) -> str:
+        return f"PeepholeReport({self.rewrites})"
+
+
+class _Instruction:
+    __slots__ = ("op", "arg", "line")
+
+    op: OpCode
+    arg: int
+    line: int
+
+    def __init__(self, op: OpCode, arg: int, line: int) -> None:
+        self.op = op
+        self.arg = arg
+        self.line = line
+
+
+def _is_number(value: float | str) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_power_of_two(value: float | str) -> bool:
+    if not _is_number(value) or value == 0 or not math.isfinite(value):
+        return False
+    mantissa, _ = math.frexp(value)
+    return abs(mantissa) == 0.5
+
+
+class _Pass:
+    """One round of rewrites over the instructions of a Bytecode."""
+
+    consts: list[float | str]
+    report: PeepholeReport
+    jumps_changed: bool
+    _constants: dict[ValueKey, int]
+
+    def __init__(self, consts: list[float | str], report: PeepholeReport) -> None:
+        self.consts = consts
+        self.report = report
+        self.jumps_changed = False
+        self._constants = {value_key(value): i for i, value in enumerate(consts)}
+
+    def _constant(self, value: float | str) -> int:
+        key = value_key(value)
+        index = self._constants.get(key)
+        if index is None:
+            index = self._constants[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def run(self, instructions: list[_Instruction]) -> list[_Instruction]:
+        self._thread_jumps(instructions)
+        targets = {i.arg for i in instructions if i.op in _JUMPS}
+        output: list[_Instruction] = []
+        # where every old index went, removed ones going to the next kept one
+        moved: list[int] = []
+        index = 0
+        while index < len(instructions):
+            if index not in targets and output and _ends_block(output[-1]):
+                self.report.rewrites.append(f"unreachable at {index}")
+                self.jumps_changed = True
+                moved.append(len(output))
+                index += 1
+                continue
+            replacement, used = self._match(instructions, index, targets)
+            if not replacement and index in targets:
+                # jumps here now land on what follows, which stays reachable
+                targets.add(index + used)
+            moved.extend([len(output)] * used)
+            output.extend(replacement)
+            index += used
+        moved.append(len(output))
+        for instruction in output:
+            if instruction.op in _JUMPS:
+                instruction.arg = moved[instruction.arg]
+        return output
+
+    def _thread_jumps(self, instructions: list[_Instruction]) -> None:
+        # a forward jump landing on a forward JUMP goes straight to its target,
+        # a LOOP stays the single back edge of its loop
+        for index, instruction in enumerate(instructions):
+            if instruction.op not in _JUMPS:
+                continue
+            target = instruction.arg
+            for _ in range(_MAX_THREADING):
+                if target >= len(instructions) or target <= index:
+                    break
+                landing = instructions[target]
+                if landing.op != OpCode.JUMP or landing.arg <= target:
+                    break
+                target = landing.arg
+            if target != instruction.arg:
+                self.report.rewrites.append(
+                    f"thread {instruction.arg} -> {target} at {index}"
+                )
+                instruction.arg = target
+                self.jumps_changed = True
+
+    def _match(
+        self, instructions: list[_Instruction], index: int, targets: set[int]
+    ) -> tuple[list[_Instruction], int]:
+        """Returns what replaces the instructions at index and how many."""
+        first = instructions[index]
+        if first.op not in _PATTERN_STARTS:
+            return [first], 1
+        window = [first]
+        for following in range(index + 1, min(index + 4, len(instructions))):
+            if following in targets:
+                break
+            window.append(instructions[following])
+        ops = [instruction.op for instruction in window]
+        consts = self.consts
+        line = first.line
+
+        if first.op == OpCode.JUMP and first.arg == index + 1:
+            self.report.rewrites.append(f"jump to next at {index}")
+            self.jumps_changed = True
+            return [], 1
+        if (
+            len(window) == 4
+            and ops[0] == OpCode.LOAD_VAR
+            and ops[1] == OpCode.LOAD_CONST
+            and ops[2] in (OpCode.ADD, OpCode.SUBTRACT)
+            and ops[3] == OpCode.STORE_VAR
+            and first.arg == window[3].arg
+            and _is_number(consts[window[1].arg])
+        ):
+            step = self._step(window[1].arg, ops[2])
+            if first.arg < ARGUMENT_LIMIT and step < ARGUMENT_LIMIT:
+                self.report.rewrites.append(f"increment at {index}")
+                return [
+                    _Instruction(
+                        OpCode.INCREMENT_VAR, pack_arguments(first.arg, step), line
+                    )
+                ], 4
+        if len(window) >= 2:
+            second = window[1]
+            if (
+                first.op == OpCode.LOAD_VAR
+                and second.op == OpCode.STORE_VAR
+                and first.arg == second.arg
+            ):
+                self.report.rewrites.append(f"self assignment at {index}")
+                return [], 2
+            if first.op in (OpCode.LOAD_VAR, OpCode.LOAD_CONST) and (
+                second.op == OpCode.POP
+            ):
+                self.report.rewrites.append(f"unused load at {index}")
+                return [], 2
+            if first.op == OpCode.LOAD_CONST and _fuses_with_constant(
+                consts[first.arg], second.op
+            ):
+                value = consts[first.arg]
+                match second.op:
+                    case OpCode.ADD | OpCode.SUBTRACT:
+                        op, arg = OpCode.ADD_CONST, self._step(first.arg, second.op)
+                    case OpCode.MULTIPLY:
+                        op, arg = OpCode.MULTIPLY_CONST, first.arg
+                    case _:
+                        # exact, the reciprocal of a power of two is one too
+                        op, arg = OpCode.MULTIPLY_CONST, self._constant(1 / value)
+                self.report.rewrites.append(
+                    f"{_NAMES[second.op]} {value!r} -> "
+                    f"{_NAMES[op]} {consts[arg]!r} at {index}"
+                )
+                return [_Instruction(op, arg, line)], 2
+            if (
+                first.op == OpCode.LOAD_VAR
+                and second.op == OpCode.LOAD_CONST
+                and len(window) > 2
+                and _fuses_with_constant(consts[second.arg], ops[2])
+            ):
+                # leave the constant to the operation, dividing by a power of
+                # two gets cheaper and the dispatches are the same
+                return [first], 1
+            if first.arg < ARGUMENT_LIMIT and second.arg < ARGUMENT_LIMIT:
+                pair = _PAIRS.get((first.op, second.op))
+                if pair is not None:
+                    self.report.rewrites.append(f"{_NAMES[pair]} at {index}")
+                    if pair == OpCode.STORE_CONST:
+                        arg = pack_arguments(second.arg, first.arg)
+                    else:
+                        arg = pack_arguments(first.arg, second.arg)
+                    return [_Instruction(pair, arg, line)], 2
+        return [first], 1
+
+    def _step(self, constant: int, op: OpCode) -> int:
+        # x - c is x + -c exactly, so subtraction becomes an addition
+        if op == OpCode.SUBTRACT:
+            return self._constant(-self.consts[constant])
+        return constant
+
+
+_JUMPS = JUMP_OPCODES
+_NAMES = {op: op.name.lower() for op in OpCode}
+_PATTERN_STARTS = frozenset([OpCode.LOAD_VAR, OpCode.LOAD_CONST, OpCode.JUMP])
+_PAIRS: dict[tuple[OpCode, OpCode], OpCode] = {
+    (OpCode.LOAD_VAR, OpCode.LOAD_VAR): OpCode.LOAD_VAR_VAR,
+    (OpCode.LOAD_VAR, OpCode.LOAD_CONST): OpCode.LOAD_VAR_CONST,
+    (OpCode.LOAD_CONST, OpCode.STORE_VAR): OpCode.STORE_CONST,
+}
+
+
+def _fuses_with_constant(value: float | str, op: OpCode) -> bool:
+    if not _is_number(value):
+        return False
+    if op == OpCode.DIVIDE:
+        return _is_power_of_two(value)
+    return op in (OpCode.ADD, OpCode.SUBTRACT, OpCode.MULTIPLY)
+
+
+def _ends_block(instruction: _Instruction) -> bool:
+    return instruction.op in (OpCode.JUMP, OpCode.LOOP)
+
+
+def optimize_bytecode(bytecode: Bytecode) -> tuple[Bytecode, PeepholeReport]:
+    """
+    Rewrites bytecode to run with fewer dispatches and gives the rewrites
+    made. Frequent sequences become superinstructions, jumps to jumps are
+    threaded, unreachable code is dropped, subtracting a constant becomes
+    adding its negation and dividing by a power of two multiplying by its
+    reciprocal, both exact. Nothing is fused across a jump target.
+    """
+    report = PeepholeReport(len(bytecode))
+    consts = list(bytecode.consts)
+    instructions = [
+        _Instruction(op, arg, bytecode.lines[index])
+        for index, op, arg in bytecode.instructions()
+    ]
+    for _ in range(_MAX_ROUNDS):
+        rewrite = _Pass(consts, report)
+        instructions = rewrite.run(instructions)
+        if not rewrite.jumps_changed:
+            break
+    code = array("l")
+    lines = array("l")
+    for instruction in instructions:
+        code.append(instruction.op)
+        code.append(instruction.arg)
+        lines.append(instruction.line)
+    report.instructions_after = len(instructions)
+    return Bytecode(code, consts, list(bytecode.names), lines), report
@@ -0,0 +1,159 @@
+import json
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from types import CodeType
+from typing import Any, ContextManager, override
+
+# one shared context for every phase of a disabled profiler
+_DISABLED_PHASE = nullcontext()
+
+
+class PhaseStats:
+    """
+    Totals of one phase or source line. allocations counts the memory
+    blocks allocated and not yet freed when the phase ended, so a phase
+    building a structure counts it and one churning through temporaries
+    counts little.
+    """
+
+    calls: int
+    seconds: float
+    allocations: int
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.allocations = 0
+
+    def add(self, seconds: float, allocations: int) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.allocations += allocations
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "allocations": self.allocations,
+        }
+
+    @override
+    def __repr__(self) -> str:
+        return (
+            f"PhaseStats({self.calls} calls, {self.seconds * 1e3:.3f}ms, "
+            f"{self.allocations} allocations)"
+        )
+
+
+class Profiler:
+    """
+    Collects wall time, calls and allocations per phase of running a Joy
+    program, tokenize, parse, compile and so on, and per Joy source line.
+
+    A Profiler made with enabled=False hands out one shared do-nothing
+    context from phase and line, so code can always wrap its phases and
+    pays only the with statement when nobody is profiling.
+    """
+
+    enabled: bool
+    phases: dict[str, PhaseStats]
+    lines: dict[int, PhaseStats]
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases = {}
+        self.lines = {}
+
+    def phase(self, name: str) -> ContextManager[None]:
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return self._measure(self.phases, name)
+
+    def line(self, line: int) -> ContextManager[None]:
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return self._measure(self.lines, line)
+
+    @contextmanager
+    def _measure[K](self, totals: dict[K, PhaseStats], key: K) -> Iterator[None]:
+        blocks = sys.getallocatedblocks()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            seconds = perf_counter() - start
+            if key not in totals:
+                totals[key] = PhaseStats()
+            totals[key].add(seconds, sys.getallocatedblocks() - blocks)
+
+    @contextmanager
+    def trace_code(self, code: CodeType) -> Iterator[None]:
+        """
+        Charges the time and allocations of running code, and the code
+        objects nested in it, to their source lines, which for code from
+        python_backend.compile_program are the Joy program's lines.
+        """
+        if not self.enabled:
+            yield
+            return
+        monitoring = sys.monitoring
+        tool = monitoring.PROFILER_ID
+        monitoring.use_tool_id(tool, "joy")
+        codes = _nested_codes(code)
+        current: list = [None, 0.0, 0]
+
+        def charge(now: float, blocks: int) -> None:
+            line, start, start_blocks = current
+            if line is not None:
+                if line not in self.lines:
+                    self.lines[line] = PhaseStats()
+                self.lines[line].add(now - start, blocks - start_blocks)
+
+        def on_line(_code: CodeType, line: int) -> None:
+            now, blocks = perf_counter(), sys.getallocatedblocks()
+            charge(now, blocks)
+            current[:] = line, now, blocks
+
+        _ = monitoring.register_callback(tool, monitoring.events.LINE, on_line)
+        for nested in codes:
+            monitoring.set_local_events(tool, nested, monitoring.events.LINE)
+        try:
+            yield
+        finally:
+            charge(perf_counter(), sys.getallocatedblocks())
+            for nested in codes:
+                monitoring.set_local_events(tool, nested, 0)
+            _ = monitoring.register_callback(tool, monitoring.events.LINE, None)
+            monitoring.free_tool_id(tool)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+            "lines": {str(line): stats.to_dict() for line, stats in self.lines.items()},
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def report(self) -> str:
+        """Phases, then source lines, each sorted by time spent."""
+        rows = [f"{'':<16}{'calls':>10}{'total ms':>12}{'allocations':>14}"]
+        for title, totals in [("phase", self.phases), ("line", self.lines)]:
+            for key, stats in sorted(
+                totals.items(), key=lambda item: item[1].seconds, reverse=True
+            ):
+                rows.append(
+                    f"{f'{title} {key}':<16}{stats.calls:>10}"
+                    f"{stats.seconds * 1e3:>12.3f}{stats.allocations:>14}"
+                )
+        return "\n".join(rows)
+
+
+def _nested_codes(code: CodeType) -> list[CodeType]:
+    codes = [code]
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            codes.extend(_nested_codes(const))
+    return codes
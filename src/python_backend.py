@@ -0,0 +1,269 @@
+import ast
+import marshal
+import sys
+from importlib.util import MAGIC_NUMBER
+from types import CodeType
+from typing import TextIO
+
+from src.abstract_syntax_tree import NO_NODE, AbstractSyntaxTree, NodeKind
+from src.compiler import flatten_expression
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.exceptions.VariableDuplicateName import VariableDuplicateName
+from src.joyTypes.Symbol import SymbolType
+from src.joyTypes.Types import parse_number
+from src.rpn_compiler import MAX_DEPTH, lower_binary, lower_comparison, lower_unary
+from src.type_inference import infer_types
+
+# cache entries hold marshalled code, which only this CPython version reads
+CACHE_BACKEND = b"python" + MAGIC_NUMBER
+_CACHE_HEADER = b"JOYP"
+
+_COMPARISONS = frozenset(["!=", "==", "<=", "<", ">=", ">"])
+_FUNCTION = "program"
+_WRITE = "write"
+
+
+class _Lowering:
+    """
+    Lowers a parsed program to a module defining one function of a write
+    callable. Variables become locals named by their slot, initialized to
+    0.0 like the VM's slots, and the function returns them by name.
+    """
+
+    tree: AbstractSyntaxTree
+    slots: dict[str, int]
+    types: dict[str, type | None]
+    temporaries: int
+
+    def __init__(self, tree: AbstractSyntaxTree) -> None:
+        self.tree = tree
+        self.slots = {}
+        self.types = infer_types(tree)
+        self.temporaries = 0
+
+    def module(self) -> ast.Module:
+        tree = self.tree
+        body: list[ast.stmt] = []
+        if tree.root != NO_NODE:
+            for statement in tree.children(tree.root):
+                body.extend(self._statement(statement))
+
+        local_names = [f"v{slot}" for slot in range(len(self.slots))]
+        prologue: list[ast.stmt] = []
+        if local_names:
+            prologue.append(
+                ast.Assign(
+                    targets=[ast.Name(name, ast.Store()) for name in local_names],
+                    value=ast.Constant(0.0),
+                    lineno=1,
+                    end_lineno=1,
+                )
+            )
+        last_line = max(tree.lines, default=1)
+        epilogue = ast.Return(
+            ast.Dict(
+                keys=[ast.Constant(name) for name in self.slots],
+                values=[ast.Name(name, ast.Load()) for name in local_names],
+            ),
+            lineno=last_line,
+            end_lineno=last_line,
+        )
+        function = ast.FunctionDef(
+            name=_FUNCTION,
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg(_WRITE)],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=[*prologue, *body, epilogue],
+            decorator_list=[],
+            type_params=[],
+            lineno=1,
+            end_lineno=last_line,
+        )
+        module = ast.Module(body=[function], type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    def _slot(self, name: str, node: int) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            raise JoySyntaxError(
+                f"Variable {name} is not declared {self.tree.where(node)}"
+            )
+        return slot
+
+    def _local(self, node: int, context: ast.expr_context) -> ast.Name:
+        return ast.Name(f"v{self._slot(str(self.tree.value(node)), node)}", context)
+
+    def _statement(self, node: int) -> list[ast.stmt]:
+        tree = self.tree
+        line = tree.lines[node]
+        children = list(tree.children(node))
+        statements: list[ast.stmt] = []
+        match tree.kind(node):
+            case NodeKind.BLOCK:
+                for statement in children:
+                    statements.extend(self._statement(statement))
+                return statements
+            case NodeKind.DECLARATION:
+                name = str(tree.value(node))
+                # the Compiler's typed zero, 0 for an int variable
+                zero = 0 if self.types.get(name) is int else 0.0
+                value = (
+                    self._expression(children[0]) if children else ast.Constant(zero)
+                )
+                if name in self.slots:
+                    raise VariableDuplicateName(
+                        f"Variable name {name} already registered {tree.where(node)}"
+                    )
+                self.slots[name] = len(self.slots)
+                target = self._local(node, ast.Store())
+                statements.append(
+                    ast.Assign(
+                        targets=[target], value=value, lineno=line, end_lineno=line
+                    )
+                )
+            case NodeKind.ASSIGNMENT:
+                target = self._local(node, ast.Store())
+                value = self._expression(children[0])
+                statements.append(
+                    ast.Assign(
+                        targets=[target], value=value, lineno=line, end_lineno=line
+                    )
+                )
+            case NodeKind.PRINT:
+                text = ast.JoinedStr(
+                    [
+                        ast.FormattedValue(self._expression(children[0]), -1),
+                        ast.Constant("\n"),
+                    ]
+                )
+                call = ast.Call(ast.Name(_WRITE, ast.Load()), [text], [])
+                statements.append(ast.Expr(call, lineno=line, end_lineno=line))
+            case NodeKind.EXPRESSION_STATEMENT:
+                value = self._expression(children[0])
+                statements.append(ast.Expr(value, lineno=line, end_lineno=line))
+            case NodeKind.IF:
+                condition, then, *otherwise = children
+                statements.append(
+                    ast.If(
+                        test=self._expression(condition, branch=True),
+                        body=self._statement(then)
+                        or [ast.Pass(lineno=line, end_lineno=line)],
+                        orelse=self._statement(otherwise[0]) if otherwise else [],
+                        lineno=line,
+                        end_lineno=line,
+                    )
+                )
+            case NodeKind.WHILE:
+                condition, body = children
+                statements.append(
+                    ast.While(
+                        test=self._expression(condition, branch=True),
+                        body=self._statement(body)
+                        or [ast.Pass(lineno=line, end_lineno=line)],
+                        orelse=[],
+                        lineno=line,
+                        end_lineno=line,
+                    )
+                )
+            case kind:
+                raise JoySyntaxError(f"Node {kind.name} is not a statement")
+        return statements
+
+    def _expression(self, node: int, branch: bool = False) -> ast.expr:
+        """
+        Lowers the expression at node. The condition of a branch ending in a
+        comparison is the bare comparison, whose truth is all that is used.
+        Subexpressions nested past MAX_DEPTH are assigned to temporaries
+        with :=, in a tuple evaluated before the rest, which is safe as Joy
+        expressions have no side effects and nothing short-circuits.
+        """
+        tree = self.tree
+        if tree.kind(node) == NodeKind.STRING:
+            return ast.Constant(tree.value(node))
+        # lower the RPN the VM compiles, so folding gives the same values
+        rpn = flatten_expression(tree, node, self._slot, types=self.types)
+        values: list[ast.expr] = []
+        depths: list[int] = []
+        hoisted: list[ast.expr] = []
+        for index, symbol in enumerate(rpn):
+            if symbol.type == SymbolType.NUMBER:
+                values.append(ast.Constant(parse_number(symbol.value)))
+                depths.append(1)
+                continue
+            if symbol.type == SymbolType.SYMBOL:
+                values.append(ast.Name(f"v{self.slots[symbol.value]}", ast.Load()))
+                depths.append(1)
+                continue
+            if symbol.argument_count == 2:
+                right = values.pop()
+                right_depth = depths.pop()
+                # a comparison lowers to int() of a Compare, two levels
+                depths[-1] = max(depths[-1], right_depth) + 2
+                if branch and index == len(rpn) - 1 and symbol.value in _COMPARISONS:
+                    values[-1] = lower_comparison(symbol.value, values[-1], right)
+                else:
+                    values[-1] = lower_binary(symbol.value, values[-1], right)
+            else:
+                depths[-1] += 1
+                values[-1] = lower_unary(symbol.value, values[-1])
+            if depths[-1] > MAX_DEPTH and index < len(rpn) - 1:
+                name = f"t{self.temporaries}"
+                self.temporaries += 1
+                hoisted.append(ast.NamedExpr(ast.Name(name, ast.Store()), values[-1]))
+                values[-1] = ast.Name(name, ast.Load())
+                depths[-1] = 1
+        if not hoisted:
+            return values[0]
+        return ast.Subscript(
+            value=ast.Tuple([*hoisted, values[0]], ast.Load()),
+            slice=ast.Constant(len(hoisted)),
+            ctx=ast.Load(),
+        )
+
+
+def lower_program(tree: AbstractSyntaxTree) -> ast.Module:
+    """
+    Lowers a parsed program to a Python module with the semantics of the
+    bytecode VM: int arithmetic exact, comparisons giving 0 or 1, and print
+    writing str of the value. Line numbers are those of the Joy source.
+    """
+    return _Lowering(tree).module()
+
+
+def compile_program(tree: AbstractSyntaxTree, filename: str = "<joy>") -> CodeType:
+    return compile(lower_program(tree), filename, "exec")
+
+
+def dump_code(code: CodeType) -> bytes:
+    return _CACHE_HEADER + marshal.dumps(code)
+
+
+def load_code(data: bytes) -> CodeType | None:
+    if not data.startswith(_CACHE_HEADER):
+        return None
+    try:
+        code = marshal.loads(data[len(_CACHE_HEADER) :])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return code if isinstance(code, CodeType) else None
+
+
+def run_code(code: CodeType, output: TextIO | None = None) -> dict[str, float | str]:
+    """Runs code from compile_program and returns every variable by name."""
+    write = (output if output is not None else sys.stdout).write
+    namespace: dict[str, object] = {}
+    exec(code, namespace)
+    try:
+        return namespace[_FUNCTION](write)
+    except ZeroDivisionError as e:
+        traceback = e.__traceback__
+        line = None
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == code.co_filename:
+                line = traceback.tb_lineno
+            traceback = traceback.tb_next
+        raise ZeroDivisionError(f"{e} at line {line}") from e
@@ -0,0 +1,196 @@
+import ast
+from collections.abc import Callable, Iterable, MutableMapping
+
+from src.exceptions.ExpressionError import ExpressionError
+from src.joyTypes.Symbol import Symbol, SymbolType, binary_operators, unary_operators
+
+type CompiledFunction = Callable[[MutableMapping[str, float]], float]
+
+_VARIABLES = "variables"
+# nesting a lowered expression may reach before a subexpression moves to a
+# temporary, ast and compile() recurse once per level
+MAX_DEPTH = 64
+
+# Python equivalents of Evaluator.operations and Evaluator.unary_operations
+_BINARY_OPERATORS: dict[str, type[ast.operator]] = {
+    "+": ast.Add,
+    "-": ast.Sub,
+    "*": ast.Mult,
+    "/": ast.Div,
+    "%": ast.Mod,
+}
+_COMPARE_OPERATORS: dict[str, type[ast.cmpop]] = {
+    "!=": ast.NotEq,
+    "==": ast.Eq,
+    "<=": ast.LtE,
+    "<": ast.Lt,
+    ">=": ast.GtE,
+    ">": ast.Gt,
+}
+_UNARY_OPERATORS: dict[str, type[ast.unaryop]] = {
+    "+": ast.UAdd,
+    "-": ast.USub,
+}
+
+
+def _read_variable(name: str) -> ast.expr:
+    return ast.Call(
+        func=ast.Attribute(
+            value=ast.Name(_VARIABLES, ast.Load()), attr="get", ctx=ast.Load()
+        ),
+        args=[ast.Constant(name), ast.Constant(0.0)],
+        keywords=[],
+    )
+
+
+def _discard(args: list[ast.expr], result: ast.expr) -> ast.expr:
+    # evaluates args for their errors, then yields result, like _solve_rpn
+    # does for operators without an implementation
+    return ast.Subscript(
+        value=ast.Tuple([*args, result], ast.Load()),
+        slice=ast.Constant(len(args)),
+        ctx=ast.Load(),
+    )
+
+
+def lower_binary(value: str, left: ast.expr, right: ast.expr) -> ast.expr:
+    """Python expression for a binary operator, comparisons giving 0 or 1."""
+    if value in _BINARY_OPERATORS:
+        return ast.BinOp(left, _BINARY_OPERATORS[value](), right)
+    if value in _COMPARE_OPERATORS:
+        return ast.Call(
+            func=ast.Name("int", ast.Load()),
+            args=[lower_comparison(value, left, right)],
+            keywords=[],
+        )
+    return _discard([left, right], ast.Constant(0))
+
+
+def lower_comparison(value: str, left: ast.expr, right: ast.expr) -> ast.Compare:
+    """Bare Python comparison giving a bool, for conditions."""
+    return ast.Compare(left, [_COMPARE_OPERATORS[value]()], [right])
+
+
+def lower_unary(value: str, operand: ast.expr) -> ast.expr:
+    return ast.UnaryOp(_UNARY_OPERATORS[value](), operand)
+
+
+def lower_rpn(rpn: Iterable[Symbol]) -> ast.Module:
+    """
+    Lowers RPN from Evaluator._create_rpn_from_tokens to a module defining
+    one function of a variables mapping, following Evaluator._solve_rpn.
+    Errors _solve_rpn raises for a malformed expression are raised here.
+    Subexpressions nested past MAX_DEPTH are assigned to temporaries with
+    :=, in a tuple evaluated before the result.
+    """
+    stack: list[ast.expr] = []
+    depths: list[int] = []
+    hoisted: list[ast.expr] = []
+    _is_var = False
+    _variable_name = None
+    _is_assignment = False
+
+    for symbol in rpn:
+        if symbol.type == SymbolType.KEYWORD:
+            if symbol.value == "var":
+                _is_var = True
+            continue
+        if symbol.type == SymbolType.NUMBER:
+            stack.append(ast.Constant(float(symbol.value)))
+            depths.append(1)
+            continue
+        if symbol.type == SymbolType.SYMBOL:
+            if not _is_var:
+                stack.append(_read_variable(symbol.value))
+                depths.append(3)
+                continue
+            if _variable_name and _is_var:
+                raise ExpressionError(f"Got two variable names in assignment {symbol}")
+            _variable_name = symbol.value
+            continue
+
+        args: list[ast.expr] = []
+        if symbol.type == SymbolType.OPERATOR:
+            if symbol.value == "=":
+                _is_assignment = True
+                continue
+            for _ in range(symbol.argument_count):
+                if not stack:
+                    raise ExpressionError(
+                        f"Expression invalid, expected {symbol.argument_count} got {len(stack)}, left {symbol.argument_count - len(args)} {symbol}"
+                    )
+                args.append(stack.pop())
+        depth = max((depths.pop() for _ in args), default=0)
+
+        result: ast.expr = ast.Constant(0)
+        match symbol.argument_count:
+            case 2:
+                if symbol.value not in binary_operators:
+                    raise ExpressionError(
+                        f"Unknown operator '{symbol.value}' for {symbol.argument_count}"
+                    )
+                result = lower_binary(symbol.value, args[1], args[0])
+                depth += 2
+            case 1:
+                if symbol.value not in unary_operators.keys():
+                    raise ExpressionError(
+                        f"Unknown operator '{symbol.value}' for {symbol.argument_count}"
+                    )
+                result = lower_unary(symbol.value, args[0])
+                depth += 1
+            case 0:
+                if symbol.value == "=":
+                    _is_assignment = True
+                    continue
+            case _:
+                raise ExpressionError(
+                    f"Symbol {symbol} expected {symbol.argument_count}"
+                )
+        if depth > MAX_DEPTH:
+            name = f"t{len(hoisted)}"
+            hoisted.append(ast.NamedExpr(ast.Name(name, ast.Store()), result))
+            result = ast.Name(name, ast.Load())
+            depth = 1
+        stack.append(result)
+        depths.append(depth)
+
+    if len(stack) != 1:
+        raise ExpressionError(f"Expression led to no result {len(stack)} values")
+
+    value = stack[0]
+    if hoisted:
+        value = _discard(hoisted, value)
+    body: list[ast.stmt] = [ast.Return(value)]
+    if _is_var and _variable_name and _is_assignment:
+        target = ast.Subscript(
+            value=ast.Name(_VARIABLES, ast.Load()),
+            slice=ast.Constant(_variable_name),
+            ctx=ast.Store(),
+        )
+        result_name = ast.Name("result", ast.Store())
+        body = [
+            ast.Assign(targets=[result_name, target], value=value),
+            ast.Return(ast.Name("result", ast.Load())),
+        ]
+
+    function = ast.FunctionDef(
+        name="expression",
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(_VARIABLES)],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=body,
+        decorator_list=[],
+        type_params=[],
+    )
+    return ast.fix_missing_locations(ast.Module(body=[function], type_ignores=[]))
+
+
+def compile_rpn(rpn: Iterable[Symbol], source: str = "<joy>") -> CompiledFunction:
+    module = lower_rpn(rpn)
+    namespace: dict[str, object] = {}
+    exec(compile(module, source, "exec"), namespace)
+    return namespace["expression"]
@@ -0,0 +1,213 @@
+from collections import deque
+from collections.abc import Callable, Iterable
+from typing import override
+
+from src.joyTypes.Symbol import Symbol, SymbolType, unary_operators
+from src.joyTypes.Types import Number, parse_number
+
+# (constant, neutral operand side) pairs that make a binary operator a no-op,
+# side 0 being the left operand
+_IDENTITIES: dict[str, list[tuple[float, int]]] = {
+    "+": [(0.0, 0), (0.0, 1)],
+    "-": [(0.0, 1)],
+    "*": [(1.0, 0), (1.0, 1)],
+    "/": [(1.0, 1)],
+}
+_COMPARISONS = frozenset(["!=", "==", "<=", "<", ">=", ">"])
+# types of symbols that are no values, passed through unfolded, any other
+# type leaves the RPN as it is
+_NON_VALUES = frozenset(
+    [SymbolType.KEYWORD, SymbolType.SYMBOL, SymbolType.ASSIGNMENT, SymbolType.OPERATOR]
+)
+
+
+class FoldReport:
+    removed: list[str]
+    symbols_before: int
+    symbols_after: int
+
+    def __init__(self, symbols_before: int = 0) -> None:
+        self.removed = []
+        self.symbols_before = symbols_before
+        self.symbols_after = symbols_before
+
+    @override
+    def __str__(self) -> str:
+        return (
+            f"{self.symbols_before} -> {self.symbols_after} symbols: "
+            + "; ".join(self.removed)
+        )
+
+    @override
+    def __repr__(self) -> str:
+        return f"FoldReport({self.removed})"
+
+
+class _Operand:
+    __slots__ = ("start", "constant", "kind")
+
+    start: int
+    constant: Number | None
+    # int or float when the value is known to have that type, else None
+    kind: type | None
+
+    def __init__(
+        self, start: int, constant: Number | None = None, kind: type | None = None
+    ) -> None:
+        self.start = start
+        self.constant = constant
+        self.kind = type(constant) if constant is not None else kind
+
+
+def _number(value: Number) -> Symbol:
+    return Symbol(repr(value), SymbolType.NUMBER, 0)
+
+
+def _float_operand(name: str) -> type | None:
+    # the Evaluator stores every variable as a float
+    return float
+
+
+def _result_kind(operator: str, left: type | None, right: type | None) -> type | None:
+    if operator in _COMPARISONS:
+        return int
+    if operator == "/":
+        return float
+    if float in (left, right):
+        return float
+    if left is int and right is int:
+        return int
+    return None
+
+
+def _describe(symbols: Iterable[Symbol]) -> str:
+    return " ".join(str(symbol) for symbol in symbols)
+
+
+def _expression(output: list[Symbol], start: int, operator: Symbol) -> str:
+    # described only for what is folded, describing every operator would
+    # cost the length of its operands, quadratic in a long chain
+    return _describe([*output[start:], operator])
+
+
+def fold_constants(
+    rpn: Iterable[Symbol],
+    operations: dict[str, Callable[[float, float], float]],
+    unary_operations: dict[str, Callable[[float], float]],
+    operand_type: Callable[[str], type | None] = _float_operand,
+) -> tuple[deque[Symbol], FoldReport]:
+    """
+    Folds constant subexpressions of RPN from Evaluator._create_rpn_from_tokens
+    and drops no-op arithmetic (x + 0, x * 1, x / 1, - - x, + x).
+
+    Folded values keep the type the operation gives, so int literals stay
+    exact. operand_type gives the type of a variable, int, float or None
+    when unknown, and a no-op is only dropped when that keeps the type of
+    the result: x / 1 is a float even when x is an int.
+
+    Division or modulo by a constant zero is left in place to raise when solved. RPN the
+    pass does not understand is returned unchanged, so _solve_rpn still
+    reports the error.
+    """
+    original = deque(rpn)
+    report = FoldReport(len(original))
+    output: list[Symbol] = []
+    operands: list[_Operand] = []
+    barrier = 0  # operands never extend below a keyword, name or assignment
+    _is_var = False
+
+    for symbol in original:
+        if symbol.type == SymbolType.NUMBER:
+            operands.append(_Operand(len(output), parse_number(symbol.value)))
+            output.append(symbol)
+            continue
+        if symbol.type == SymbolType.SYMBOL and not _is_var:
+            operands.append(_Operand(len(output), kind=operand_type(symbol.value)))
+            output.append(symbol)
+            continue
+        if symbol.type != SymbolType.OPERATOR or symbol.value == "=":
+            if symbol.type not in _NON_VALUES:
+                return original, FoldReport(len(original))
+            _is_var = _is_var or symbol.value == "var"
+            output.append(symbol)
+            barrier = len(output)
+            continue
+
+        argument_count = symbol.argument_count
+        if argument_count not in (1, 2) or len(operands) < argument_count:
+            return original, FoldReport(len(original))
+        args = operands[-argument_count:]
+        del operands[-argument_count:]
+        start = args[0].start
+        if start < barrier:
+            return original, FoldReport(len(original))
+
+        if argument_count == 1:
+            operand = args[0]
+            if operand.constant is not None and symbol.value in unary_operations:
+                value = unary_operations[symbol.value](operand.constant)
+                expression = _expression(output, start, symbol)
+                report.removed.append(f"{expression} -> {value!r}")
+                del output[start:]
+                operands.append(_Operand(start, value))
+                output.append(_number(value))
+                continue
+            if symbol.value == "+" or (
+                symbol.value == "-" and output[-1] == unary_operators["-"]
+            ):
+                expression = _expression(output, start, symbol)
+                if symbol.value == "-":
+                    _ = output.pop()
+                report.removed.append(f"{expression} -> {_describe(output[start:])}")
+                operands.append(operand)
+                continue
+            operands.append(operand)
+            output.append(symbol)
+            continue
+
+        left, right = args
+        if (
+            left.constant is not None
+            and right.constant is not None
+            and symbol.value in operations
+            and not (symbol.value in ("/", "%") and right.constant == 0)
+        ):
+            value = operations[symbol.value](left.constant, right.constant)
+            report.removed.append(f"{_expression(output, start, symbol)} -> {value!r}")
+            del output[start:]
+            operands.append(_Operand(start, value))
+            output.append(_number(value))
+            continue
+
+        identity = _identity(symbol.value, left, right)
+        if identity is not None:
+            expression = _expression(output, start, symbol)
+            if identity == 0:
+                del output[left.start : right.start]
+            else:
+                del output[right.start :]
+            report.removed.append(f"{expression} -> {_describe(output[start:])}")
+            kept = right if identity == 0 else left
+            operands.append(_Operand(start, kind=kept.kind))
+            continue
+
+        operands.append(
+            _Operand(start, kind=_result_kind(symbol.value, left.kind, right.kind))
+        )
+        output.append(symbol)
+
+    report.symbols_after = len(output)
+    return deque(output), report
+
+
+def _identity(operator: str, left: _Operand, right: _Operand) -> int | None:
+    """Returns which operand is a neutral constant for operator, if any."""
+    for neutral, side in _IDENTITIES.get(operator, []):
+        operand, other = (left, right) if side == 0 else (right, left)
+        if operand.constant != neutral or other.constant is not None:
+            continue
+        # the result has the other operand's type, unless the constant or
+        # the operator makes it a float
+        if other.kind is float or (operand.kind is int and operator != "/"):
+            return side
+    return None
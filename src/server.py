@@ -0,0 +1,311 @@
+import asyncio
+import json
+from collections import deque
+from collections.abc import Iterable, Mapping
+from time import perf_counter
+from typing import Any
+
+from src.evaluator import CompiledExpression, Evaluator
+from src.expression_cache import ExpressionCache
+from src.joyTypes.Symbol import Symbol, SymbolType
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7474
+# latencies kept for the percentiles of the stats request
+_LATENCY_WINDOW = 10_000
+_PERCENTILES = (50, 90, 99)
+# operators giving an int whatever their operands, as Evaluator.operations does
+_INT_OPERATORS = frozenset(["!=", "==", "<=", "<", ">=", ">"])
+
+
+def _gives_int(rpn: Iterable[Symbol]) -> bool:
+    """
+    Whether Evaluator.evaluate gives an int for rpn: comparisons and
+    operators without an implementation give ints, numbers and variables
+    are floats, and every other operator keeps ints only when all of its
+    operands are ints, except division.
+    """
+    binary, unary = Evaluator.operations, Evaluator.unary_operations
+    ints: list[bool] = []
+    for symbol in rpn:
+        value = symbol.value
+        if symbol.type in (SymbolType.NUMBER, SymbolType.SYMBOL):
+            ints.append(False)
+        elif symbol.argument_count == 2:
+            right = ints.pop()
+            if value in _INT_OPERATORS or value not in binary:
+                ints[-1] = True
+            else:
+                ints[-1] = ints[-1] and right and value != "/"
+        elif symbol.argument_count == 1 and value not in unary:
+            ints[-1] = True
+    return ints[-1]
+
+
+class _Request:
+    session: str
+    variables: Mapping[str, float]
+    future: asyncio.Future[float]
+
+    def __init__(
+        self,
+        session: str,
+        variables: Mapping[str, float],
+        future: asyncio.Future[float],
+    ) -> None:
+        self.session = session
+        self.variables = variables
+        self.future = future
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class EvaluationServer:
+    """
+    Evaluates expressions for clients over newline-delimited JSON, one
+    request per line:
+
+        {"id": 1, "session": "a", "expression": "x * 2", "variables": {"x": 3}}
+
+    answered by {"id": 1, "result": 6.0} or {"id": 1, "error": "..."}, and
+    {"op": "stats"} answered by the server's counters and latency
+    percentiles. A client may send many requests without waiting, their
+    answers come back as they finish and carry the request's id, and each
+    session's requests run in the order they were sent.
+
+    Every session keeps its own variables, given variables are stored
+    into them before the expression runs, but all sessions share one cache
+    of compiled expressions. Requests are queued for batch_window seconds,
+    the same expression requested more than once in that time is solved
+    once over arrays of every request's variables when NumPy is installed.
+    """
+
+    cache: ExpressionCache[CompiledExpression]
+    sessions: dict[str, Evaluator]
+    batch_window: float
+    latencies: deque[float]
+    requests: int
+    errors: int
+    batches: int
+    batched_requests: int
+    _pending: list[tuple[str, _Request]]
+    _flush_handle: asyncio.Handle | None
+
+    def __init__(self, batch_window: float = 0.0) -> None:
+        self.cache = ExpressionCache()
+        self.sessions = {}
+        self.batch_window = batch_window
+        self.latencies = deque(maxlen=_LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self._pending = []
+        self._flush_handle = None
+
+    def session(self, name: str) -> Evaluator:
+        evaluator = self.sessions.get(name)
+        if evaluator is None:
+            evaluator = self.sessions[name] = Evaluator(cache=self.cache)
+        return evaluator
+
+    def submit(
+        self, session: str, expression: str, variables: Mapping[str, float]
+    ) -> asyncio.Future[float]:
+        """Queues an expression, the future gets its result."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[float] = loop.create_future()
+        self._pending.append((expression, _Request(session, variables, future)))
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        pending = self._pending
+        self._pending = []
+        self._flush_handle = None
+        # requests are grouped by expression in rounds, a round ends where a
+        # session moves to another expression so its requests keep their order
+        groups: dict[str, list[_Request]] = {}
+        expressions: dict[str, str] = {}
+        for expression, request in pending:
+            current = expressions.get(request.session)
+            if current is not None and current != expression:
+                self._evaluate_groups(groups)
+                groups, expressions = {}, {}
+            expressions[request.session] = expression
+            groups.setdefault(expression, []).append(request)
+        self._evaluate_groups(groups)
+
+    def _evaluate_groups(self, groups: dict[str, list[_Request]]) -> None:
+        for expression, requests in groups.items():
+            if len(requests) > 1 and self._evaluate_batch(expression, requests):
+                continue
+            for request in requests:
+                self._evaluate(expression, request)
+
+    def _evaluate(self, expression: str, request: _Request) -> None:
+        evaluator = self.session(request.session)
+        try:
+            for name, value in request.variables.items():
+                evaluator.variables[name] = float(value)
+            request.future.set_result(evaluator.evaluate(expression))
+        except Exception as e:
+            request.future.set_exception(e)
+
+    def _evaluate_batch(self, expression: str, requests: list[_Request]) -> bool:
+        """
+        Solves expression for all requests at once, returns False leaving
+        them alone when it can't, without NumPy, for assignments, or when
+        any request fails so each one gets its own error.
+        """
+        try:
+            from src.vectorized import solve_rpn_batch
+        except ImportError:
+            return False
+        try:
+            compiled = self.session(requests[0].session)._compile_expression(
+                expression
+            )
+        except Exception:
+            return False
+        if any(
+            symbol.type == SymbolType.ASSIGNMENT or symbol.value in ("var", "=")
+            for symbol in compiled.rpn
+        ):
+            return False
+        # what each session's variables will be as its requests are applied
+        # in order, nothing is stored until the batch succeeded
+        overlays: dict[str, dict[str, float]] = {}
+        columns: dict[str, list[float]] = {name: [] for name in compiled.names}
+        for request in requests:
+            overlay = overlays.setdefault(request.session, {})
+            try:
+                overlay.update(
+                    (name, float(value)) for name, value in request.variables.items()
+                )
+            except (TypeError, ValueError):
+                return False
+            variables = self.session(request.session).variables
+            for name, column in columns.items():
+                column.append(overlay.get(name, variables.get(name, 0.0)))
+        try:
+            results = solve_rpn_batch(compiled.rpn, columns, {})
+        except Exception:
+            return False
+        for session, overlay in overlays.items():
+            variables = self.session(session).variables
+            for name in compiled.names:
+                if name not in variables:
+                    variables[name] = 0.0
+            for name, value in overlay.items():
+                variables[name] = value
+        answers = results.tolist()
+        if _gives_int(compiled.rpn):
+            # NumPy solves in floats, evaluate answers comparisons with ints
+            answers = [int(answer) for answer in answers]
+        for request, result in zip(requests, answers):
+            request.future.set_result(result)
+        self.batches += 1
+        self.batched_requests += len(requests)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        latency = {
+            f"p{percent}": percentile(latencies, percent) * 1e3
+            for percent in _PERCENTILES
+        }
+        latency["max"] = latencies[-1] * 1e3 if latencies else 0.0
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "sessions": len(self.sessions),
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "cache": self.cache.stats(),
+            "latency_ms": latency,
+        }
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves one client connection until it closes."""
+        tasks: set[asyncio.Task[None]] = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                _ = await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        start = perf_counter()
+        response = await self._respond(line)
+        writer.write(json.dumps(response).encode() + b"\n")
+        if "stats" not in response:
+            self.latencies.append(perf_counter() - start)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _respond(self, line: bytes) -> dict[str, Any]:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError as e:
+            self.errors += 1
+            return {"id": None, "error": f"Invalid request: {e}"}
+        if request.get("op") == "stats":
+            return {"id": request.get("id"), "stats": self.stats()}
+        self.requests += 1
+        try:
+            expression = request["expression"]
+            variables = request.get("variables", {})
+            if not isinstance(expression, str) or not isinstance(variables, dict):
+                raise TypeError("expression must be a string, variables an object")
+            result = await self.submit(
+                str(request.get("session", "")), expression, variables
+            )
+        except KeyError as e:
+            self.errors += 1
+            return {"id": request.get("id"), "error": f"Missing field {e}"}
+        except Exception as e:
+            self.errors += 1
+            return {"id": request.get("id"), "error": str(e)}
+        return {"id": request.get("id"), "result": result}
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        socket_path: str | None = None,
+    ) -> asyncio.Server:
+        """Listens on socket_path when given, otherwise on host and port."""
+        if socket_path is not None:
+            return await asyncio.start_unix_server(self.handle, socket_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(
+    server: EvaluationServer,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+) -> None:
+    listener = await server.start(host, port, socket_path)
+    async with listener:
+        await listener.serve_forever()
@@ -0,0 +1,229 @@
+import re
+
+from src.constants.characters import (
+    BIN_NUMBERS,
+    HEX_NUMBERS,
+    KEYWORDS,
+    NUMBERS,
+    OPERATOR_DIGITS,
+    OPERATORS,
+    SYMBOL_NAMES,
+)
+from src.exceptions.TokenizerValueError import TokenizerValueError
+from src.joyTypes.Token import TokenType
+
+type RawToken = tuple[TokenType, int, int, float]
+
+_SPACE = 0
+_NUMBER = 1
+_ZERO = 2
+_OPERATOR = 3
+_QUOTE = 4
+_SYMBOL = 5
+_PUNCTUATION = 6
+
+_PUNCTUATION_TYPES: dict[str, TokenType] = {
+    "(": TokenType.PARENTHESIS_OPEN,
+    ")": TokenType.PARENTHESIS_CLOSE,
+    "{": TokenType.SCOPE_OPEN,
+    "}": TokenType.SCOPE_CLOSE,
+    ",": TokenType.COMMA,
+    ";": TokenType.END_OF_STATEMENT,
+}
+
+
+def _classify(char: str) -> int:
+    if char.isspace():
+        return _SPACE
+    if char == "0":
+        return _ZERO
+    if char in NUMBERS:
+        return _NUMBER
+    if char in OPERATOR_DIGITS:
+        return _OPERATOR
+    if char in _PUNCTUATION_TYPES:
+        return _PUNCTUATION
+    if char == '"':
+        return _QUOTE
+    return _SYMBOL
+
+
+_CHAR_CLASSES: list[int] = [_classify(chr(code)) for code in range(128)]
+_SYMBOL_NAME_SET = frozenset(SYMBOL_NAMES)
+_OPERATOR_DIGIT_SET = frozenset(OPERATOR_DIGITS)
+_OPERATOR_SET = frozenset(OPERATORS)
+_KEYWORD_SET = frozenset(KEYWORDS)
+
+_NUMBER_RUN = re.compile(f"[{re.escape(NUMBERS)}]*")
+_HEX_RUN = re.compile(f"[{re.escape(HEX_NUMBERS)}]*")
+_BIN_RUN = re.compile(f"[{re.escape(BIN_NUMBERS)}]*")
+_SYMBOL_RUN = re.compile(f"[{re.escape(SYMBOL_NAMES)}]*")
+
+
+class TableLexer:
+    """
+    Lexer backend built on a precomputed character-class table.
+
+    Produces the same tokens as the state machine in src.tokenizer, but scans
+    whole numbers and names with compiled character-set patterns instead of
+    growing a string one character at a time.
+    """
+
+    parenthesis_balance: int
+    scope_balance: int
+    in_string: bool
+
+    def __init__(self) -> None:
+        self.parenthesis_balance = 0
+        self.scope_balance = 0
+        self.in_string = False
+
+    def scan(
+        self, text: str, pos: int = 0, final: bool = True
+    ) -> tuple[list[RawToken], int]:
+        """
+        Scans text from pos, returns raw (type, start, end, value) tokens
+        and the position scanning stopped at.
+
+        Scanning stops before a token that runs into the end of text, so a
+        streaming caller can append more input and resume from the returned
+        position. Once input is exhausted, call with final=True on text that
+        ends with whitespace, as Tokenizer.tokenize appends a trailing space.
+        """
+        tokens: list[RawToken] = []
+        append = tokens.append
+        classes = _CHAR_CLASSES
+        length = len(text)
+
+        while pos < length:
+            char = text[pos]
+            kind = classes[ord(char)] if char < "\x80" else _classify(char)
+
+            if kind == _SPACE:
+                pos += 1
+                continue
+
+            if kind == _SYMBOL:
+                end = _SYMBOL_RUN.match(text, pos + 1).end()
+                if end >= length:
+                    break
+                name = text[pos:end]
+                if name in _KEYWORD_SET:
+                    append((TokenType.KEYWORD, pos, end, 0))
+                else:
+                    append((TokenType.SYMBOL, pos, end, 0))
+                pos = end
+                continue
+
+            if kind == _NUMBER:
+                end, value = self._scan_decimal(text, pos)
+                if end == -1:
+                    break
+                append((TokenType.NUMBER, pos, end, value))
+                pos = end
+                continue
+
+            if kind == _OPERATOR:
+                end = self._scan_operator(text, pos)
+                if end == -1:
+                    break
+                append((TokenType.OPERATOR, pos, end, 0))
+                pos = end
+                continue
+
+            if kind == _PUNCTUATION:
+                if char == "(":
+                    self.parenthesis_balance += 1
+                elif char == ")":
+                    self.parenthesis_balance -= 1
+                elif char == "{":
+                    self.scope_balance += 1
+                elif char == "}":
+                    self.scope_balance -= 1
+                append((_PUNCTUATION_TYPES[char], pos, pos + 1, 0))
+                pos += 1
+                continue
+
+            if kind == _ZERO:
+                end, value = self._scan_prefixed_number(text, pos)
+                if end == -1:
+                    break
+                append((TokenType.NUMBER, pos, end, value))
+                pos = end
+                continue
+
+            # kind == _QUOTE
+            end = text.find('"', pos + 1)
+            if end == -1:
+                if not final:
+                    break
+                self.in_string = True
+                return tokens, length
+            append((TokenType.STRING, pos + 1, end, 0))
+            pos = end + 1
+
+        return tokens, pos
+
+    def finish(self) -> None:
+        if self.parenthesis_balance != 0:
+            raise TokenizerValueError(
+                f'Parenthesis "(" & ")" not balanced. Expected {self.parenthesis_balance} more'
+            )
+        if self.scope_balance != 0:
+            raise TokenizerValueError(
+                f'Scope "{" & "}" not balanced. Expected {self.scope_balance} more.'
+            )
+        if self.in_string:
+            raise TokenizerValueError("Missing quotation marks.")
+
+    def _scan_operator(self, text: str, pos: int) -> int:
+        operator = ""
+        length = len(text)
+        while pos < length:
+            char = text[pos]
+            if char in _OPERATOR_DIGIT_SET:
+                if operator + char in _OPERATOR_SET:
+                    operator += char
+                    pos += 1
+                    continue
+                if operator in _OPERATOR_SET:
+                    return pos
+                operator += char
+                pos += 1
+                continue
+            if operator in _OPERATOR_SET:
+                return pos
+            raise TokenizerValueError(f'Unrecognized operator "{operator}".')
+        return -1
+
+    def _scan_decimal(self, text: str, pos: int) -> tuple[int, float]:
+        end = _NUMBER_RUN.match(text, pos).end()
+        if end >= len(text):
+            return -1, 0
+        literal = text[pos:end]
+        if literal.count(".") > 1:
+            raise TokenizerValueError("Found more than one decimal point in float.")
+        if text[end] in _SYMBOL_NAME_SET:
+            raise TokenizerValueError("Got letters in number.")
+        return end, float(literal)
+
+    def _scan_prefixed_number(self, text: str, pos: int) -> tuple[int, float]:
+        length = len(text)
+        if pos + 1 >= length:
+            return -1, 0
+        prefix = text[pos + 1]
+        if prefix == "x":
+            end = _HEX_RUN.match(text, pos + 2).end()
+            if end >= length:
+                return -1, 0
+            if text[end] in _SYMBOL_NAME_SET:
+                raise TokenizerValueError(f"Expected hex got {text[end]}")
+            return end, float(int(text[pos + 2 : end], 16))
+        if prefix == "b":
+            end = _BIN_RUN.match(text, pos + 2).end()
+            if end >= length:
+                return -1, 0
+            if text[end] in _SYMBOL_NAME_SET:
+                raise TokenizerValueError(f"Expected binary got {text[end]}")
+            return end, float(int(text[pos + 2 : end], 2))
+        return self._scan_decimal(text, pos)
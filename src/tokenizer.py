@@ -1,9 +1,23 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from enum import Enum
-from typing import override
+from os import PathLike
+from typing import TextIO, override
+from src.constants.characters import (
+    BIN_NUMBERS,
+    HEX_NUMBERS,
+    KEYWORDS,
+    NUMBERS,
+    OPERATOR_DIGITS,
+    OPERATORS,
+    SYMBOL_NAMES,
+)
+from src.constants.other import READ_CHUNK_SIZE
 from src.exceptions.TokenizerValueError import TokenizerValueError
 from src.joyTypes.Token import Token, TokenType
+from src.joyTypes.TokenStream import TokenStream
+from src.table_lexer import TableLexer
 
 
 class TokenizerStateBase(ABC):
@@ -30,6 +44,25 @@ class TokenizerState(Enum):
     END_OF_STATEMENT = "end_of_statement"
 
 
+_INTERNED_TYPES = frozenset(
+    [
+        TokenType.OPERATOR,
+        TokenType.KEYWORD,
+        TokenType.PARENTHESIS_OPEN,
+        TokenType.PARENTHESIS_CLOSE,
+        TokenType.SCOPE_OPEN,
+        TokenType.SCOPE_CLOSE,
+        TokenType.COMMA,
+        TokenType.END_OF_STATEMENT,
+    ]
+)
+
+
+class TokenizerBackend(Enum):
+    STATE_MACHINE = "state_machine"
+    TABLE = "table"
+
+
 class Tokenizer:
     current_state: TokenizerStateBase
     next_state: TokenizerStateBase
@@ -45,45 +78,25 @@ class Tokenizer:
     _string: str
     char: str
     output: list[Token]
+    backend: TokenizerBackend
 
-    def __init__(self):
+    def __init__(self, backend: TokenizerBackend = TokenizerBackend.STATE_MACHINE):
+        self.backend = backend
         self.current_state = NewTokenState()
         self.next_state = NewTokenState()
         self.token_string = ""
         self.token_current = Token()
-        self.operator_digits = [
-            "!",
-            "$",
-            "%",
-            "^",
-            "&",
-            "*",
-            "+",
-            "-",
-            "=",
-            "#",
-            "@",
-            "?",
-            "|",
-            "`",
-            "/",
-            "\\",
-            "<",
-            ">",
-            "~",
-        ]
-        self.operators = ["+", "-", "/", "*", "=", ">", ">=", "<", "<=", "==", "!="]
+        self.operator_digits = list(OPERATOR_DIGITS)
+        self.operators = list(OPERATORS)
         self.parenthesis_balance = 0
         self.scope_balance = 0
-        self._numbers: str = ".0123456789"
-        self._hex_numbers: str = "0123456789abcdefABCDEF"  # prefix 0x
-        self._bin_numbers: str = "01"  # prefix 0b
-        self._symbol_names: str = (
-            "abcdefghijklmnoprstuwvxyz.ABCDEFGHIJKLMNOPRSTUWVXYZ_0123456789"
-        )
+        self._numbers: str = NUMBERS
+        self._hex_numbers: str = HEX_NUMBERS  # prefix 0x
+        self._bin_numbers: str = BIN_NUMBERS  # prefix 0b
+        self._symbol_names: str = SYMBOL_NAMES
         self.decimal_point_found = False
         self.fancy_numeric: str = ""
-        self.keywords = ["var", "if", "else", "print"]
+        self.keywords = list(KEYWORDS)
         self._i = 0
         self._string = ""
         self.char = ""
@@ -95,9 +108,11 @@ class Tokenizer:
             self.char = self._string[self._i]
 
     def tokenize(self, string: str) -> list[Token]:
+        if self.backend is TokenizerBackend.TABLE:
+            return self._tokenize_table(string)
         self._string = string + " "
         self.char = self._string[self._i]
-        while self._i in range(len(self._string)):
+        while self._i < len(self._string):
             self.current_state.handle(self)
             if self.next_state:
                 self.current_state = self.next_state
@@ -113,6 +128,99 @@ class Tokenizer:
             raise TokenizerValueError("Missing quotation marks.")
         return self.output
 
+    def _tokenize_table(self, string: str) -> list[Token]:
+        text = string + " "
+        lexer = TableLexer()
+        raw_tokens, _ = lexer.scan(text)
+        self.parenthesis_balance = lexer.parenthesis_balance
+        self.scope_balance = lexer.scope_balance
+        lexer.finish()
+        append = self.output.append
+        interned = Token.interned
+        for token_type, start, end, value in raw_tokens:
+            if token_type in _INTERNED_TYPES:
+                append(interned(text[start:end], token_type))
+            else:
+                append(Token(text[start:end], token_type, value))
+        return self.output
+
+    def tokenize_stream(self, string: str) -> TokenStream:
+        """
+        Tokenizes string with the table lexer into a compact TokenStream
+        instead of a list of Token objects.
+        """
+        lexer = TableLexer()
+        raw_tokens, _ = lexer.scan(string + " ")
+        self.parenthesis_balance = lexer.parenthesis_balance
+        self.scope_balance = lexer.scope_balance
+        lexer.finish()
+        stream = TokenStream(string)
+        append = stream.append
+        for token_type, start, end, value in raw_tokens:
+            append(token_type, start, end, value)
+        return stream
+
+    def iter_tokens(
+        self,
+        file_or_path: str | PathLike[str] | TextIO,
+        chunk_size: int = READ_CHUNK_SIZE,
+        first_line: int = 1,
+    ) -> Iterator[Token]:
+        """
+        Lazily tokenizes a whole source file, reading it chunk_size characters
+        at a time. Uses the table lexer regardless of backend, since it can
+        resume a token cut at a chunk boundary. Tokens carry 1-based line and
+        column of their first character, lines counted from first_line for
+        text taken from the middle of a file.
+        """
+        if isinstance(file_or_path, (str, PathLike)):
+            with open(file_or_path) as f:
+                yield from self._iter_chunks(f, chunk_size, first_line)
+            return
+        yield from self._iter_chunks(file_or_path, chunk_size, first_line)
+
+    def _iter_chunks(
+        self, f: TextIO, chunk_size: int, first_line: int = 1
+    ) -> Iterator[Token]:
+        lexer = TableLexer()
+        buffer = ""
+        offset = 0  # source offset of buffer[0]
+        counted = 0  # buffer index newlines were counted up to
+        line = first_line
+        line_start = 0
+        final = False
+        while not final:
+            chunk = f.read(chunk_size)
+            final = not chunk
+            buffer += chunk if chunk else " "
+            raw_tokens, stop = lexer.scan(buffer, 0, final)
+            self.parenthesis_balance = lexer.parenthesis_balance
+            self.scope_balance = lexer.scope_balance
+
+            for token_type, start, end, value in raw_tokens:
+                position = start - 1 if token_type is TokenType.STRING else start
+                newlines = buffer.count("\n", counted, position)
+                if newlines:
+                    line += newlines
+                    line_start = offset + buffer.rfind("\n", counted, position) + 1
+                counted = position
+                yield Token(
+                    buffer[start:end],
+                    token_type,
+                    value,
+                    line,
+                    offset + position - line_start + 1,
+                )
+
+            newlines = buffer.count("\n", counted, stop)
+            if newlines:
+                line += newlines
+                line_start = offset + buffer.rfind("\n", counted, stop) + 1
+            buffer = buffer[stop:]
+            offset += stop
+            counted = 0
+        lexer.finish()
+
 
 class NewTokenState(TokenizerStateBase):
     @override
@@ -173,13 +281,18 @@ class NewTokenState(TokenizerStateBase):
 class StringState(TokenizerStateBase):
     @override
     def handle(self, tokenizer: Tokenizer):
-        if tokenizer.char == '"':
-            tokenizer.next_char()
-            tokenizer.next_state = CompleteState()
-            tokenizer.token_current = Token(tokenizer.token_string, TokenType.STRING)
+        # take the string up to its closing quote in one slice, adding it a
+        # character at a time copies it over and over
+        end = tokenizer._string.find('"', tokenizer._i)
+        if end == -1:
+            tokenizer.token_string += tokenizer._string[tokenizer._i :]
+            tokenizer._i = len(tokenizer._string)
             return
-        tokenizer.token_string += tokenizer.char
+        tokenizer.token_string += tokenizer._string[tokenizer._i : end]
+        tokenizer._i = end
         tokenizer.next_char()
+        tokenizer.next_state = CompleteState()
+        tokenizer.token_current = Token(tokenizer.token_string, TokenType.STRING)
 
 
 class NumberState(TokenizerStateBase):
@@ -215,7 +328,8 @@ class FancyNumberState(TokenizerStateBase):
             tokenizer.next_state = BinNumberState()
             tokenizer.next_char()
             return
-        raise TokenizerValueError(f"Expected binary or hex got {tokenizer.char}")
+        # a leading zero without a 0x or 0b prefix is a plain decimal
+        tokenizer.next_state = NumberState()
 
 
 class HexNumberState(TokenizerStateBase):
@@ -265,7 +379,7 @@ class OperatorState(TokenizerStateBase):
                 tokenizer.next_char()
                 return
             if tokenizer.token_string in tokenizer.operators:
-                tokenizer.token_current = Token(
+                tokenizer.token_current = Token.interned(
                     tokenizer.token_string, TokenType.OPERATOR
                 )
                 tokenizer.next_state = CompleteState()
@@ -274,7 +388,9 @@ class OperatorState(TokenizerStateBase):
             tokenizer.next_char()
             return
         if tokenizer.token_string in tokenizer.operators:
-            tokenizer.token_current = Token(tokenizer.token_string, TokenType.OPERATOR)
+            tokenizer.token_current = Token.interned(
+                tokenizer.token_string, TokenType.OPERATOR
+            )
             tokenizer.next_state = CompleteState()
             return
         raise TokenizerValueError(f'Unrecognized operator "{tokenizer.token_string}".')
@@ -285,7 +401,7 @@ class OpenParenthesisState(TokenizerStateBase):
     def handle(self, tokenizer: Tokenizer):
         tokenizer.token_string += tokenizer.char
         tokenizer.parenthesis_balance += 1
-        tokenizer.token_current = Token(
+        tokenizer.token_current = Token.interned(
             tokenizer.token_string, TokenType.PARENTHESIS_OPEN
         )
         tokenizer.next_state = CompleteState()
@@ -297,7 +413,7 @@ class CloseParenthesisState(TokenizerStateBase):
     def handle(self, tokenizer: Tokenizer):
         tokenizer.token_string += tokenizer.char
         tokenizer.parenthesis_balance -= 1
-        tokenizer.token_current = Token(
+        tokenizer.token_current = Token.interned(
             tokenizer.token_string, TokenType.PARENTHESIS_CLOSE
         )
         tokenizer.next_state = CompleteState()
@@ -309,7 +425,9 @@ class OpenScopeState(TokenizerStateBase):
     def handle(self, tokenizer: Tokenizer):
         tokenizer.token_string += tokenizer.char
         tokenizer.scope_balance += 1
-        tokenizer.token_current = Token(tokenizer.token_string, TokenType.SCOPE_OPEN)
+        tokenizer.token_current = Token.interned(
+            tokenizer.token_string, TokenType.SCOPE_OPEN
+        )
         tokenizer.next_state = CompleteState()
         tokenizer.next_char()
 
@@ -319,7 +437,9 @@ class CloseScopeState(TokenizerStateBase):
     def handle(self, tokenizer: Tokenizer):
         tokenizer.token_string += tokenizer.char
         tokenizer.scope_balance -= 1
-        tokenizer.token_current = Token(tokenizer.token_string, TokenType.SCOPE_CLOSE)
+        tokenizer.token_current = Token.interned(
+            tokenizer.token_string, TokenType.SCOPE_CLOSE
+        )
         tokenizer.next_state = CompleteState()
         tokenizer.next_char()
 
@@ -328,7 +448,9 @@ class CommaState(TokenizerStateBase):
     @override
     def handle(self, tokenizer: Tokenizer):
         tokenizer.token_string += tokenizer.char
-        tokenizer.token_current = Token(tokenizer.token_string, TokenType.COMMA)
+        tokenizer.token_current = Token.interned(
+            tokenizer.token_string, TokenType.COMMA
+        )
         tokenizer.next_state = CompleteState()
         tokenizer.next_char()
 
@@ -337,7 +459,7 @@ class EndOfStatementState(TokenizerStateBase):
     @override
     def handle(self, tokenizer: Tokenizer):
         tokenizer.token_string += tokenizer.char
-        tokenizer.token_current = Token(
+        tokenizer.token_current = Token.interned(
             tokenizer.token_string, TokenType.END_OF_STATEMENT
         )
         tokenizer.next_state = CompleteState()
@@ -351,9 +473,12 @@ class SymbolNameState(TokenizerStateBase):
             tokenizer.token_string += tokenizer.char
             tokenizer.next_char()
             return
-        tokenizer.token_current = Token(tokenizer.token_string, TokenType.SYMBOL)
         if tokenizer.token_string in tokenizer.keywords:
-            tokenizer.token_current = Token(tokenizer.token_string, TokenType.KEYWORD)
+            tokenizer.token_current = Token.interned(
+                tokenizer.token_string, TokenType.KEYWORD
+            )
+        else:
+            tokenizer.token_current = Token(tokenizer.token_string, TokenType.SYMBOL)
         tokenizer.next_state = CompleteState()
 
 
@@ -0,0 +1,530 @@
+import ast
+import operator
+from collections.abc import Callable
+from typing import TextIO, override
+
+from src.bytecode import (
+    BINARY_OPCODES,
+    COMPARE_JUMP_OPCODES,
+    UNARY_OPCODES,
+    Bytecode,
+    OpCode,
+    expand,
+)
+from src.constants.other import JIT_HOT_LOOP_THRESHOLD
+from src.rpn_compiler import MAX_DEPTH, lower_binary, lower_comparison, lower_unary
+
+type TraceFunction = Callable[[list, Callable[[str], object]], int]
+
+# a trace returns this instead of an instruction when its type guards fail
+GUARD_FAILED = -1
+# traces recorded for a loop before it is left to the interpreter for good
+MAX_RECORDINGS = 3
+
+_SLOTS = "slots"
+_WRITE = "write"
+_ERROR = "error"
+
+_OPERATORS: dict[int, str] = {
+    **{op.value: value for value, op in BINARY_OPCODES.items()},
+    **{op.value: value for value, op in UNARY_OPCODES.items()},
+}
+_COMPARISONS = frozenset(["==", "!=", "<", "<=", ">", ">="])
+_STATEMENT_OPCODES = frozenset([OpCode.STORE_VAR, OpCode.POP, OpCode.PRINT])
+_COMPARE_JUMPS = {fused: plain for plain, fused in COMPARE_JUMP_OPCODES.items()}
+_FUNCTIONS: dict[int, Callable] = {
+    OpCode.ADD: operator.add,
+    OpCode.SUBTRACT: operator.sub,
+    OpCode.MULTIPLY: operator.mul,
+    OpCode.DIVIDE: operator.truediv,
+    OpCode.MODULO: operator.mod,
+    OpCode.EQUAL: lambda left, right: int(left == right),
+    OpCode.NOT_EQUAL: lambda left, right: int(left != right),
+    OpCode.LESS: lambda left, right: int(left < right),
+    OpCode.LESS_EQUAL: lambda left, right: int(left <= right),
+    OpCode.GREATER: lambda left, right: int(left > right),
+    OpCode.GREATER_EQUAL: lambda left, right: int(left >= right),
+    OpCode.NEGATE: operator.neg,
+    OpCode.POSITIVE: operator.pos,
+}
+
+
+class TraceStep:
+    """
+    One instruction executed while recording, with the type of the value
+    it pushed, or for JUMP_IF_FALSE whether it jumped.
+    """
+
+    index: int
+    op: int
+    arg: int
+    observed: type | bool | None
+
+    def __init__(
+        self, index: int, op: int, arg: int, observed: type | bool | None = None
+    ) -> None:
+        self.index = index
+        self.op = op
+        self.arg = arg
+        self.observed = observed
+
+    @override
+    def __repr__(self) -> str:
+        return f"TraceStep({self.index}, {OpCode(self.op).name}, {self.arg})"
+
+
+class Trace:
+    """
+    One recorded iteration of a loop compiled to a Python function of the
+    VM's slots and write. It runs the iteration over and over, returning
+    the instruction the interpreter resumes at when a guard fails.
+    """
+
+    header: int
+    steps: list[TraceStep]
+    entry_types: dict[int, type]
+    function: TraceFunction
+    source: str
+
+    def __init__(
+        self,
+        header: int,
+        steps: list[TraceStep],
+        entry_types: dict[int, type],
+        function: TraceFunction,
+        source: str,
+    ) -> None:
+        self.header = header
+        self.steps = steps
+        self.entry_types = entry_types
+        self.function = function
+        self.source = source
+
+
+class LoopStats:
+    """
+    Counters of one loop. back_edges counts the jumps back the interpreter
+    made, iterations run inside a trace are not counted.
+    """
+
+    header: int
+    line: int
+    back_edges: int
+    tier_ups: int
+    trace_runs: int
+    side_exits: int
+    guard_failures: int
+    aborts: int
+
+    def __init__(self, header: int, line: int) -> None:
+        self.header = header
+        self.line = line
+        self.back_edges = 0
+        self.tier_ups = 0
+        self.trace_runs = 0
+        self.side_exits = 0
+        self.guard_failures = 0
+        self.aborts = 0
+
+    @override
+    def __str__(self) -> str:
+        return (
+            f"loop at line {self.line} (instruction {self.header}): "
+            f"{self.back_edges} back edges, {self.tier_ups} tier-ups, "
+            f"{self.trace_runs} trace runs, {self.side_exits} side exits, "
+            f"{self.guard_failures} guard failures, {self.aborts} aborts"
+        )
+
+    @override
+    def __repr__(self) -> str:
+        return f"LoopStats({self})"
+
+
+class TracingJit:
+    """
+    Tracing tier of the VM. The VM reports every LOOP instruction, and once a
+    loop has jumped back threshold times its next iteration is recorded
+    while being executed. The recorded instructions become straight line
+    Python code over locals, branches turning into guards that write the
+    locals back and leave to the interpreter.
+
+    A trace is specialized to the types the loop's variables had when it
+    was recorded and checks them on entry. Recording is abandoned for loops
+    containing other loops, which get their own traces, and for loops whose
+    variables change type from one iteration to the next.
+    """
+
+    bytecode: Bytecode
+    threshold: int
+    stats: dict[int, LoopStats]
+    _traces: dict[int, Trace]
+    _hotness: dict[int, int]
+    _recordings: dict[int, int]
+    _blacklist: set[int]
+    _write: Callable[[str], object]
+
+    def __init__(
+        self,
+        bytecode: Bytecode,
+        output: TextIO,
+        threshold: int = JIT_HOT_LOOP_THRESHOLD,
+    ) -> None:
+        self.bytecode = bytecode
+        self.threshold = threshold
+        self.stats = {}
+        self._traces = {}
+        self._hotness = {}
+        self._recordings = {}
+        self._blacklist = set()
+        self._write = output.write
+
+    def trace(self, header: int) -> Trace | None:
+        return self._traces.get(header)
+
+    def report(self) -> str:
+        return "\n".join(str(stats) for _, stats in sorted(self.stats.items()))
+
+    def back_edge(self, header: int, jump: int, slots: list) -> int:
+        """
+        Called for the LOOP at index jump back to header, with an empty
+        stack. Returns the instruction the interpreter continues at.
+        """
+        stats = self.stats.get(header)
+        if stats is None:
+            stats = self.stats[header] = LoopStats(header, self.bytecode.lines[jump])
+        stats.back_edges += 1
+        trace = self._traces.get(header)
+        if trace is None:
+            hotness = self._hotness[header] = self._hotness.get(header, 0) + 1
+            if hotness < self.threshold or header in self._blacklist:
+                return header
+            trace, resume = self._record(stats, jump, slots)
+            if trace is None:
+                return resume
+            stats.tier_ups += 1
+            self._traces[header] = trace
+
+        resume = trace.function(slots, self._write)
+        stats.trace_runs += 1
+        if resume == GUARD_FAILED:
+            stats.guard_failures += 1
+            # re-record with the new types on the loop's next back edge
+            del self._traces[header]
+            self._hotness[header] = self.threshold - 1
+            return header
+        if resume != jump + 1:
+            stats.side_exits += 1
+        return resume
+
+    def _record(
+        self, stats: LoopStats, jump: int, slots: list
+    ) -> tuple[Trace | None, int]:
+        """
+        Executes one iteration of the loop from its header, recording it.
+        Returns the compiled trace or None, and where to resume.
+        """
+        header = stats.header
+        recordings = self._recordings.get(header, 0) + 1
+        self._recordings[header] = recordings
+        if recordings > MAX_RECORDINGS:
+            self._blacklist.add(header)
+            return None, header
+
+        code = self.bytecode.code
+        consts = self.bytecode.consts
+        steps: list[TraceStep] = []
+        entry_types: dict[int, type] = {}
+        stored: set[int] = set()
+        stack: list = []
+        index = statement = header
+        while True:
+            op = code[index << 1]
+            arg = code[(index << 1) + 1]
+            if op == OpCode.LOOP and index == jump:
+                break
+            if op == OpCode.LOOP or (op == OpCode.JUMP and arg > jump):
+                # an inner loop's back edge, or a jump out of this loop
+                stats.aborts += 1
+                self._blacklist.add(header)
+                return None, index
+            if op == OpCode.JUMP:
+                index = statement = arg
+                continue
+            if op in _COMPARE_JUMPS:
+                # recorded as the comparison and a JUMP_IF_FALSE on it
+                comparison = _COMPARE_JUMPS[op]
+                right = stack.pop()
+                try:
+                    result = _FUNCTIONS[comparison](stack.pop(), right)
+                except Exception:
+                    return None, statement
+                steps.append(TraceStep(index, comparison, 0, int))
+                stack.append(result)
+                op = OpCode.JUMP_IF_FALSE
+            if op == OpCode.JUMP_IF_FALSE:
+                jumped = not stack.pop()
+                steps.append(TraceStep(index, op, arg, jumped))
+                if jumped and not header < arg <= jump:
+                    # the loop ended while it was being recorded
+                    return None, arg
+                index = statement = arg if jumped else index + 1
+                continue
+            try:
+                # superinstructions are recorded as the instructions they fuse
+                for op, arg in expand(OpCode(op), arg):
+                    if op == OpCode.LOAD_CONST:
+                        stack.append(consts[arg])
+                    elif op == OpCode.LOAD_VAR:
+                        if arg not in stored and arg not in entry_types:
+                            entry_types[arg] = type(slots[arg])
+                        stack.append(slots[arg])
+                    elif op == OpCode.STORE_VAR:
+                        slots[arg] = stack.pop()
+                        stored.add(arg)
+                    elif op == OpCode.POP:
+                        _ = stack.pop()
+                    elif op == OpCode.PRINT:
+                        _ = self._write(f"{stack.pop()}\n")
+                    elif op in (OpCode.NEGATE, OpCode.POSITIVE):
+                        stack[-1] = _FUNCTIONS[op](stack[-1])
+                    else:
+                        right = stack[-1]
+                        result = _FUNCTIONS[op](stack[-2], right)
+                        del stack[-1]
+                        stack[-1] = result
+                    observed = None if op in _STATEMENT_OPCODES else type(stack[-1])
+                    steps.append(TraceStep(index, op, arg, observed))
+            except Exception:
+                # expressions have no side effects, the interpreter runs the
+                # statement again and reports the error
+                return None, statement
+            if op in _STATEMENT_OPCODES:
+                statement = index + 1
+            index += 1
+
+        for slot, entry_type in entry_types.items():
+            if type(slots[slot]) is not entry_type:
+                stats.aborts += 1
+                self._blacklist.add(header)
+                return None, header
+        function, source = _compile_trace(header, steps, entry_types, stored, consts)
+        return Trace(header, steps, entry_types, function, source), header
+
+
+def _local(slot: int, context: ast.expr_context) -> ast.Name:
+    return ast.Name(f"v{slot}", context)
+
+
+def _leave(stored: list[int], value: ast.expr, line: int) -> list[ast.stmt]:
+    statements: list[ast.stmt] = [
+        ast.Assign(
+            targets=[
+                ast.Subscript(
+                    ast.Name(_SLOTS, ast.Load()), ast.Constant(slot), ast.Store()
+                )
+            ],
+            value=_local(slot, ast.Load()),
+            lineno=line,
+            end_lineno=line,
+        )
+        for slot in stored
+    ]
+    statements.append(ast.Return(value, lineno=line, end_lineno=line))
+    return statements
+
+
+def _compile_trace(
+    header: int,
+    steps: list[TraceStep],
+    entry_types: dict[int, type],
+    stored: set[int],
+    consts: list[float | str],
+) -> tuple[TraceFunction, str]:
+    # the Python line of every statement is its first instruction plus one,
+    # so an error tells which statement the interpreter has to run again
+    written = sorted(stored)
+    used = sorted(stored | entry_types.keys())
+    first = header + 1
+    body: list[ast.stmt] = []
+    values: list[ast.expr] = []
+    comparisons: list[ast.Compare | None] = []
+    # nesting of every value, past MAX_DEPTH it is assigned to a temporary
+    # ahead of its statement, which is safe as expressions have no effects
+    depths: list[int] = []
+    temporaries = 0
+    statement = first
+    for step in steps:
+        op = step.op
+        line = statement
+        if op == OpCode.LOAD_CONST:
+            values.append(ast.Constant(consts[step.arg]))
+            comparisons.append(None)
+            depths.append(1)
+            continue
+        if op == OpCode.LOAD_VAR:
+            values.append(_local(step.arg, ast.Load()))
+            comparisons.append(None)
+            depths.append(1)
+            continue
+        if op == OpCode.JUMP_IF_FALSE:
+            condition = values.pop()
+            comparison = comparisons.pop()
+            _ = depths.pop()
+            if comparison is not None:
+                # the guard only needs the truth of the comparison, not 0 or 1
+                condition = comparison
+            if step.observed:
+                test, target = condition, step.index + 1
+            else:
+                test, target = ast.UnaryOp(ast.Not(), condition), step.arg
+            body.append(
+                ast.If(
+                    test=test,
+                    body=_leave(written, ast.Constant(target), line),
+                    orelse=[],
+                    lineno=line,
+                    end_lineno=line,
+                )
+            )
+            statement = (step.arg if step.observed else step.index + 1) + 1
+            continue
+        if op in _STATEMENT_OPCODES:
+            value = values.pop()
+            _ = comparisons.pop()
+            _ = depths.pop()
+            if op == OpCode.STORE_VAR:
+                body.append(
+                    ast.Assign(
+                        targets=[_local(step.arg, ast.Store())],
+                        value=value,
+                        lineno=line,
+                        end_lineno=line,
+                    )
+                )
+            elif op == OpCode.PRINT:
+                text = ast.JoinedStr(
+                    [ast.FormattedValue(value, -1), ast.Constant("\n")]
+                )
+                call = ast.Call(ast.Name(_WRITE, ast.Load()), [text], [])
+                body.append(ast.Expr(call, lineno=line, end_lineno=line))
+            else:
+                body.append(ast.Expr(value, lineno=line, end_lineno=line))
+            statement = step.index + 2
+            continue
+        value = _OPERATORS[op]
+        if op == OpCode.POSITIVE and step.observed in (int, float):
+            # unary plus does nothing to a number
+            continue
+        if op in (OpCode.NEGATE, OpCode.POSITIVE):
+            values[-1] = lower_unary(value, values[-1])
+            comparisons[-1] = None
+            depths[-1] += 1
+        else:
+            right = values.pop()
+            _ = comparisons.pop()
+            right_depth = depths.pop()
+            # a comparison lowers to int() of a Compare, two levels
+            depths[-1] = max(depths[-1], right_depth) + 2
+            if value in _COMPARISONS:
+                comparison = lower_comparison(value, values[-1], right)
+                values[-1] = ast.Call(ast.Name("int", ast.Load()), [comparison], [])
+                comparisons[-1] = comparison
+            else:
+                values[-1] = lower_binary(value, values[-1], right)
+                comparisons[-1] = None
+        if depths[-1] > MAX_DEPTH:
+            name = f"t{temporaries}"
+            temporaries += 1
+            body.append(
+                ast.Assign(
+                    targets=[ast.Name(name, ast.Store())],
+                    value=values[-1],
+                    lineno=line,
+                    end_lineno=line,
+                )
+            )
+            values[-1] = ast.Name(name, ast.Load())
+            comparisons[-1] = None
+            depths[-1] = 1
+
+    prologue: list[ast.stmt] = [
+        ast.Assign(
+            targets=[_local(slot, ast.Store())],
+            value=ast.Subscript(
+                ast.Name(_SLOTS, ast.Load()), ast.Constant(slot), ast.Load()
+            ),
+            lineno=first,
+            end_lineno=first,
+        )
+        for slot in used
+    ]
+    if entry_types:
+        guards = [
+            ast.Compare(
+                ast.Call(ast.Name("type", ast.Load()), [_local(slot, ast.Load())], []),
+                [ast.IsNot()],
+                [ast.Name(entry_type.__name__, ast.Load())],
+            )
+            for slot, entry_type in sorted(entry_types.items())
+        ]
+        prologue.append(
+            ast.If(
+                test=ast.BoolOp(ast.Or(), guards) if len(guards) > 1 else guards[0],
+                body=[ast.Return(ast.Constant(GUARD_FAILED))],
+                orelse=[],
+                lineno=first,
+                end_lineno=first,
+            )
+        )
+    error_line = ast.BinOp(
+        ast.Attribute(
+            ast.Attribute(ast.Name(_ERROR, ast.Load()), "__traceback__", ast.Load()),
+            "tb_lineno",
+            ast.Load(),
+        ),
+        ast.Sub(),
+        ast.Constant(1),
+    )
+    loop = ast.Try(
+        body=[
+            ast.While(
+                test=ast.Constant(True),
+                body=body or [ast.Pass()],
+                orelse=[],
+                lineno=first,
+                end_lineno=first,
+            )
+        ],
+        handlers=[
+            ast.ExceptHandler(
+                type=ast.Name("Exception", ast.Load()),
+                name=_ERROR,
+                body=_leave(written, error_line, first),
+                lineno=first,
+                end_lineno=first,
+            )
+        ],
+        orelse=[],
+        finalbody=[],
+        lineno=first,
+        end_lineno=first,
+    )
+    function = ast.FunctionDef(
+        name="trace",
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(_SLOTS), ast.arg(_WRITE)],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=[*prologue, loop],
+        decorator_list=[],
+        type_params=[],
+        lineno=first,
+        end_lineno=first,
+    )
+    module = ast.fix_missing_locations(ast.Module(body=[function], type_ignores=[]))
+    namespace: dict[str, object] = {}
+    exec(compile(module, f"<trace {header}>", "exec"), namespace)
+    return namespace["trace"], ast.unparse(module)
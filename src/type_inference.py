@@ -0,0 +1,117 @@
+from src.abstract_syntax_tree import NO_NODE, AbstractSyntaxTree, NodeKind
+
+_COMPARISONS = frozenset(["!=", "==", "<=", "<", ">=", ">"])
+
+
+def _join(left: type | None, right: type | None) -> type | None:
+    # None is "no value seen yet", object a variable holding both types
+    if left is None or left == right:
+        return right
+    if right is None:
+        return left
+    return object
+
+
+class _Inference:
+    """
+    Runs over the tree's node arrays in order, which visits the children of
+    a node before it as the parser creates them first, so one round types
+    every expression from the types of the variables so far.
+    """
+
+    tree: AbstractSyntaxTree
+    types: dict[str, type]
+
+    def __init__(self, tree: AbstractSyntaxTree) -> None:
+        self.tree = tree
+        self.types = {}
+
+    def run(self) -> dict[str, type | None]:
+        tree = self.tree
+        declarations = [
+            index for index in range(len(tree)) if tree.kinds[index] == _DECLARATION
+        ]
+        # types only ever widen, so this ends after a few rounds
+        while self._round():
+            pass
+        # a variable declared without a value and only ever given values
+        # computed from it holds the int zero it is declared with
+        unset = [
+            name
+            for index in declarations
+            if tree.first_child[index] == NO_NODE
+            and (name := str(tree.value(index))) not in self.types
+        ]
+        if unset:
+            self.types.update((name, int) for name in unset)
+            while self._round():
+                pass
+        types: dict[str, type | None] = {}
+        for index in declarations:
+            name = str(tree.value(index))
+            kind = self.types.get(name, int)
+            types[name] = None if kind is object else kind
+        return types
+
+    def _round(self) -> bool:
+        """Types every node once, returns whether a variable's type widened."""
+        tree = self.tree
+        kinds, first_child = tree.kinds, tree.first_child
+        next_sibling = tree.next_sibling
+        values, operands = tree.values, tree.operands
+        types = self.types
+        node_types: list[type | None] = [None] * len(kinds)
+        changed = False
+        for index, kind in enumerate(kinds):
+            child = first_child[index]
+            if kind == _NUMBER:
+                node_types[index] = type(values[operands[index]])
+            elif kind == _NAME:
+                node_types[index] = types.get(values[operands[index]])
+            elif kind == _UNARY:
+                node_types[index] = node_types[child]
+            elif kind == _BINARY:
+                operator = values[operands[index]]
+                if operator in _COMPARISONS:
+                    node_types[index] = int
+                elif operator == "/":
+                    node_types[index] = float
+                else:
+                    node_types[index] = _arithmetic(
+                        node_types[child], node_types[next_sibling[child]]
+                    )
+            elif kind in _STORES and child != NO_NODE:
+                name = values[operands[index]]
+                joined = _join(types.get(name), node_types[child])
+                if joined is not None and joined != types.get(name):
+                    types[name] = joined
+                    changed = True
+            else:
+                node_types[index] = object
+        return changed
+
+
+def _arithmetic(left: type | None, right: type | None) -> type | None:
+    if left is None or right is None:
+        return None
+    if left is object or right is object:
+        return object
+    return float if float in (left, right) else int
+
+
+_NUMBER = NodeKind.NUMBER.value
+_NAME = NodeKind.NAME.value
+_UNARY = NodeKind.UNARY.value
+_BINARY = NodeKind.BINARY.value
+_DECLARATION = NodeKind.DECLARATION.value
+_STORES = frozenset([_DECLARATION, NodeKind.ASSIGNMENT.value])
+
+
+def infer_types(tree: AbstractSyntaxTree) -> dict[str, type | None]:
+    """
+    Gives the type every variable of a parsed program holds, int or float,
+    or None when it holds both. Comparisons give ints, / gives floats and the
+    other operators keep the type of their operands, ints only when both
+    are. Flow-insensitive: a variable has one type for the whole program.
+    """
+    return _Inference(tree).run()
@@ -0,0 +1,85 @@
+from collections.abc import Iterator, Mapping, MutableMapping
+from typing import override
+
+
+class VariableSlots(MutableMapping[str, float]):
+    """
+    Variables stored in a list, each name owning a fixed index (its slot)
+    from the first time it is seen. Compiled code reads and writes values by
+    slot, the mapping interface is a view for everything else.
+
+    Slots are never reused, deleting a name only empties its slot, so code
+    resolved against this table stays valid.
+    """
+
+    values: list[float | None]
+    _slots: dict[str, int]
+
+    def __init__(self, variables: Mapping[str, float] | None = None) -> None:
+        self.values = []
+        self._slots = {}
+        if variables:
+            self.update(variables)
+
+    def slot(self, name: str) -> int:
+        """Returns the slot of name, giving it an empty one if it has none."""
+        slot = self._slots.get(name)
+        if slot is None:
+            slot = self._slots[name] = len(self.values)
+            self.values.append(None)
+        return slot
+
+    def register(self, name: str, default: float = 0.0) -> int:
+        """Returns the slot of name, setting it to default if it is empty."""
+        slot = self.slot(name)
+        if self.values[slot] is None:
+            self.values[slot] = default
+        return slot
+
+    def slots(self) -> dict[str, int]:
+        """Name to slot map of every name ever seen, for debugging."""
+        return dict(self._slots)
+
+    def replace(self, variables: Mapping[str, float]) -> None:
+        """Empties every slot, then stores variables, keeping slot numbers."""
+        for slot in range(len(self.values)):
+            self.values[slot] = None
+        self.update(variables)
+
+    @override
+    def __getitem__(self, name: str) -> float:
+        slot = self._slots.get(name)
+        if slot is None or self.values[slot] is None:
+            raise KeyError(name)
+        return self.values[slot]
+
+    @override
+    def __setitem__(self, name: str, value: float) -> None:
+        self.values[self.slot(name)] = value
+
+    @override
+    def __delitem__(self, name: str) -> None:
+        slot = self._slots.get(name)
+        if slot is None or self.values[slot] is None:
+            raise KeyError(name)
+        self.values[slot] = None
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (name for name, slot in self._slots.items() if values[slot] is not None)
+
+    @override
+    def __len__(self) -> int:
+        return sum(1 for value in self.values if value is not None)
+
+    @override
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        slot = self._slots.get(name)
+        return slot is not None and self.values[slot] is not None
+
+    @override
+    def __repr__(self) -> str:
+        return f"VariableSlots({dict(self)})"
@@ -0,0 +1,121 @@
+from collections.abc import Callable, Iterable, Mapping
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from src.exceptions.ExpressionError import ExpressionError
+from src.joyTypes.Symbol import Symbol, SymbolType, binary_operators, unary_operators
+
+type Column = NDArray[np.float64] | float
+
+
+def _divide(x: Column, y: Column) -> Column:
+    if np.any(np.asarray(y) == 0):
+        raise ZeroDivisionError("float division by zero")
+    return np.divide(x, y)
+
+
+def _modulo(x: Column, y: Column) -> Column:
+    if np.any(np.asarray(y) == 0):
+        raise ZeroDivisionError("float modulo")
+    return np.mod(x, y)
+
+
+def _compare(ufunc: np.ufunc) -> Callable[[Column, Column], Column]:
+    return lambda x, y: ufunc(x, y).astype(np.float64)
+
+
+# whole-array equivalents of Evaluator.operations and Evaluator.unary_operations
+operations: dict[str, Callable[[Column, Column], Column]] = {
+    "!=": _compare(np.not_equal),
+    "==": _compare(np.equal),
+    "<=": _compare(np.less_equal),
+    "<": _compare(np.less),
+    ">=": _compare(np.greater_equal),
+    ">": _compare(np.greater),
+    "/": _divide,
+    "*": np.multiply,
+    "%": _modulo,
+    "+": np.add,
+    "-": np.subtract,
+}
+
+unary_operations: dict[str, Callable[[Column], Column]] = {
+    "+": np.positive,
+    "-": np.negative,
+}
+
+
+def _column_length(columns: Mapping[str, NDArray[np.float64]]) -> int:
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns must have equal length, got {sorted(lengths)}")
+    return lengths.pop() if lengths else 1
+
+
+def solve_rpn_batch(
+    stack: Iterable[Symbol],
+    columns: Mapping[str, ArrayLike],
+    variables: Mapping[str, float],
+) -> NDArray[np.float64]:
+    """
+    Solves RPN from Evaluator._create_rpn_from_tokens once per row of columns,
+    as whole-array operations. Names without a column read their scalar
+    value from variables.
+    """
+    arrays = {
+        name: np.asarray(column, dtype=np.float64).reshape(-1)
+        for name, column in columns.items()
+    }
+    length = _column_length(arrays)
+    output: list[Column] = []
+
+    for symbol in stack:
+        if symbol.type == SymbolType.KEYWORD:
+            if symbol.value == "var":
+                raise ExpressionError("Assignments can't be evaluated in a batch")
+            continue
+        if symbol.type == SymbolType.NUMBER:
+            output.append(float(symbol.value))
+            continue
+        if symbol.type == SymbolType.SYMBOL:
+            if symbol.value in arrays:
+                output.append(arrays[symbol.value])
+            else:
+                output.append(float(variables.get(symbol.value, 0.0)))
+            continue
+        if symbol.type == SymbolType.ASSIGNMENT or symbol.value == "=":
+            raise ExpressionError("Assignments can't be evaluated in a batch")
+        if symbol.type != SymbolType.OPERATOR:
+            raise ExpressionError(f"Symbol {symbol} can't be evaluated in a batch")
+        if len(output) < symbol.argument_count:
+            raise ExpressionError(
+                f"Expression invalid, expected {symbol.argument_count} got {len(output)} {symbol}"
+            )
+
+        match symbol.argument_count:
+            case 2:
+                if symbol.value not in binary_operators:
+                    raise ExpressionError(
+                        f"Unknown operator '{symbol.value}' for {symbol.argument_count}"
+                    )
+                right = output.pop()
+                left = output.pop()
+                if symbol.value in operations:
+                    output.append(operations[symbol.value](left, right))
+                else:
+                    output.append(0.0)
+            case 1:
+                if symbol.value not in unary_operators:
+                    raise ExpressionError(
+                        f"Unknown operator '{symbol.value}' for {symbol.argument_count}"
+                    )
+                output.append(unary_operations[symbol.value](output.pop()))
+            case _:
+                raise ExpressionError(
+                    f"Symbol {symbol} expected {symbol.argument_count}"
+                )
+
+    if len(output) != 1:
+        raise ExpressionError(f"Expression led to no result {len(output)} values")
+    return np.broadcast_to(np.asarray(output[0], dtype=np.float64), (length,)).copy()
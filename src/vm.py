@@ -0,0 +1,229 @@
+import sys
+from collections.abc import Callable
+from typing import TextIO
+
+from src.bytecode import ARGUMENT_BITS, ARGUMENT_LIMIT, Bytecode, OpCode
+from src.constants.other import JIT_HOT_LOOP_THRESHOLD
+from src.exceptions.BytecodeError import BytecodeError
+from src.tracing_jit import TracingJit
+
+_LOAD_CONST = OpCode.LOAD_CONST.value
+_LOAD_VAR = OpCode.LOAD_VAR.value
+_STORE_VAR = OpCode.STORE_VAR.value
+_POP = OpCode.POP.value
+_ADD = OpCode.ADD.value
+_SUBTRACT = OpCode.SUBTRACT.value
+_MULTIPLY = OpCode.MULTIPLY.value
+_DIVIDE = OpCode.DIVIDE.value
+_MODULO = OpCode.MODULO.value
+_EQUAL = OpCode.EQUAL.value
+_NOT_EQUAL = OpCode.NOT_EQUAL.value
+_LESS = OpCode.LESS.value
+_LESS_EQUAL = OpCode.LESS_EQUAL.value
+_GREATER = OpCode.GREATER.value
+_GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+_NEGATE = OpCode.NEGATE.value
+_POSITIVE = OpCode.POSITIVE.value
+_JUMP = OpCode.JUMP.value
+_JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+_PRINT = OpCode.PRINT.value
+_LOAD_VAR_VAR = OpCode.LOAD_VAR_VAR.value
+_LOAD_VAR_CONST = OpCode.LOAD_VAR_CONST.value
+_ADD_CONST = OpCode.ADD_CONST.value
+_MULTIPLY_CONST = OpCode.MULTIPLY_CONST.value
+_INCREMENT_VAR = OpCode.INCREMENT_VAR.value
+_STORE_CONST = OpCode.STORE_CONST.value
+_JUMP_UNLESS_EQUAL = OpCode.JUMP_UNLESS_EQUAL.value
+_JUMP_UNLESS_NOT_EQUAL = OpCode.JUMP_UNLESS_NOT_EQUAL.value
+_JUMP_UNLESS_LESS = OpCode.JUMP_UNLESS_LESS.value
+_JUMP_UNLESS_LESS_EQUAL = OpCode.JUMP_UNLESS_LESS_EQUAL.value
+_JUMP_UNLESS_GREATER = OpCode.JUMP_UNLESS_GREATER.value
+_JUMP_UNLESS_GREATER_EQUAL = OpCode.JUMP_UNLESS_GREATER_EQUAL.value
+_LOOP = OpCode.LOOP.value
+_LAZY_BRANCH = OpCode.LAZY_BRANCH.value
+_HALT = OpCode.HALT.value
+_MASK = ARGUMENT_LIMIT - 1
+
+
+class VirtualMachine:
+    """
+    Stack machine running Bytecode. Variables live in a list indexed by the
+    slot the compiler gave them, and comparisons give 0 or 1 like evaluate.
+
+    LOOP instructions are the back edges of loops, they are handed to a
+    TracingJit which compiles hot loops, unless jit_threshold is None.
+    dispatches counts the instructions the last run interpreted, summed at
+    jumps so the dispatch loop itself pays nothing for it.
+    """
+
+    output: TextIO
+    jit_threshold: int | None
+    jit: TracingJit | None
+    dispatches: int
+
+    def __init__(
+        self,
+        output: TextIO | None = None,
+        jit_threshold: int | None = JIT_HOT_LOOP_THRESHOLD,
+    ) -> None:
+        self.output = output if output is not None else sys.stdout
+        self.jit_threshold = jit_threshold
+        self.jit = None
+        self.dispatches = 0
+
+    def run(
+        self,
+        bytecode: Bytecode,
+        compile_branch: Callable[[int], int] | None = None,
+    ) -> dict[str, float | str]:
+        """
+        Runs bytecode and returns the final value of every variable.
+        compile_branch is the lazy Compiler's, called with the index of a
+        LAZY_BRANCH instruction the first time it runs.
+        """
+        code = bytecode.code
+        consts = bytecode.consts
+        slots: list[float | str] = [0.0] * len(bytecode.names)
+        stack: list = []
+        push = stack.append
+        pop = stack.pop
+        write = self.output.write
+        jit = None
+        if self.jit_threshold is not None:
+            jit = self.jit = TracingJit(bytecode, self.output, self.jit_threshold)
+        end = len(code)
+        pc = 0
+        # start of the straight run of instructions since the last jump
+        run_start = 0
+        dispatches = 0
+
+        try:
+            while pc < end:
+                op = code[pc]
+                arg = code[pc + 1]
+                pc += 2
+                if op == _LOAD_VAR:
+                    push(slots[arg])
+                elif op == _LOAD_CONST:
+                    push(consts[arg])
+                elif op == _STORE_VAR:
+                    slots[arg] = pop()
+                elif op == _LOAD_VAR_CONST:
+                    push(slots[arg & _MASK])
+                    push(consts[arg >> ARGUMENT_BITS])
+                elif op == _LOAD_VAR_VAR:
+                    push(slots[arg & _MASK])
+                    push(slots[arg >> ARGUMENT_BITS])
+                elif op == _INCREMENT_VAR:
+                    slot = arg & _MASK
+                    slots[slot] = slots[slot] + consts[arg >> ARGUMENT_BITS]
+                elif op == _ADD_CONST:
+                    stack[-1] = stack[-1] + consts[arg]
+                elif op == _MULTIPLY_CONST:
+                    stack[-1] = stack[-1] * consts[arg]
+                elif op == _STORE_CONST:
+                    slots[arg & _MASK] = consts[arg >> ARGUMENT_BITS]
+                elif op == _ADD:
+                    right = pop()
+                    stack[-1] = stack[-1] + right
+                elif op == _SUBTRACT:
+                    right = pop()
+                    stack[-1] = stack[-1] - right
+                elif op == _MULTIPLY:
+                    right = pop()
+                    stack[-1] = stack[-1] * right
+                elif op == _JUMP_UNLESS_LESS:
+                    right = pop()
+                    if not pop() < right:
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _LOOP:
+                    dispatches += (pc - run_start) >> 1
+                    if jit is not None:
+                        pc = jit.back_edge(arg, (pc >> 1) - 1, slots) << 1
+                    else:
+                        pc = arg << 1
+                    run_start = pc
+                elif op == _JUMP:
+                    dispatches += (pc - run_start) >> 1
+                    pc = run_start = arg << 1
+                elif op == _JUMP_IF_FALSE:
+                    if not pop():
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _JUMP_UNLESS_LESS_EQUAL:
+                    right = pop()
+                    if not pop() <= right:
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _JUMP_UNLESS_GREATER:
+                    right = pop()
+                    if not pop() > right:
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _JUMP_UNLESS_GREATER_EQUAL:
+                    right = pop()
+                    if not pop() >= right:
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _JUMP_UNLESS_EQUAL:
+                    right = pop()
+                    if pop() != right:
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _JUMP_UNLESS_NOT_EQUAL:
+                    right = pop()
+                    if pop() == right:
+                        dispatches += (pc - run_start) >> 1
+                        pc = run_start = arg << 1
+                elif op == _LESS:
+                    right = pop()
+                    stack[-1] = int(stack[-1] < right)
+                elif op == _LESS_EQUAL:
+                    right = pop()
+                    stack[-1] = int(stack[-1] <= right)
+                elif op == _GREATER:
+                    right = pop()
+                    stack[-1] = int(stack[-1] > right)
+                elif op == _GREATER_EQUAL:
+                    right = pop()
+                    stack[-1] = int(stack[-1] >= right)
+                elif op == _EQUAL:
+                    right = pop()
+                    stack[-1] = int(stack[-1] == right)
+                elif op == _NOT_EQUAL:
+                    right = pop()
+                    stack[-1] = int(stack[-1] != right)
+                elif op == _DIVIDE:
+                    right = pop()
+                    stack[-1] = stack[-1] / right
+                elif op == _MODULO:
+                    right = pop()
+                    stack[-1] = stack[-1] % right
+                elif op == _NEGATE:
+                    stack[-1] = -stack[-1]
+                elif op == _POSITIVE:
+                    stack[-1] = +stack[-1]
+                elif op == _POP:
+                    _ = pop()
+                elif op == _PRINT:
+                    _ = write(f"{pop()}\n")
+                elif op == _LAZY_BRANCH:
+                    if compile_branch is None:
+                        raise BytecodeError(
+                            f"Branch at {(pc >> 1) - 1} is not compiled"
+                        )
+                    dispatches += (pc - run_start) >> 1
+                    pc = run_start = compile_branch((pc >> 1) - 1) << 1
+                    end = len(code)
+                elif op == _HALT:
+                    break
+                else:
+                    raise ValueError(f"Unknown opcode {op} at {(pc >> 1) - 1}")
+        except ZeroDivisionError as e:
+            line = bytecode.lines[(pc >> 1) - 1]
+            raise ZeroDivisionError(f"{e} at line {line}") from e
+        finally:
+            self.dispatches = dispatches + ((pc - run_start) >> 1)
+
+        return dict(zip(bytecode.names, slots))
@@ -1,5 +1,10 @@
-from src.abstract_syntax_tree import AbstractSyntaxTree, Node
-from src.joyTypes.Token import Token, TokenType
+import io
+import pytest
+
+from src.abstract_syntax_tree import NO_NODE, AbstractSyntaxTree, NodeKind
+from src.exceptions.ExpressionError import ExpressionError
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.tokenizer import Tokenizer
 
 
 def test_ast():
@@ -8,61 +13,129 @@ def test_ast():
     assert isinstance(ast, AbstractSyntaxTree)
 
 
+def parse_source(source: str) -> AbstractSyntaxTree:
+    ast = AbstractSyntaxTree()
+    _ = ast.parse_tokens(Tokenizer().iter_tokens(io.StringIO(source)))
+    return ast
+
+
 def test_ast_hello():
     ast = AbstractSyntaxTree()
-    file_path = "examples/hello.joy"
-    ast.parse(file_path)
-
-    expected_result = AbstractSyntaxTree(
-        Node(
-            Token("print", TokenType.KEYWORD),
-            Node(Token('"Hello, World!"', TokenType.STRING)),
-        )
-    )
+    _ = ast.parse("examples/hello.joy")
 
-    assert ast == expected_result
+    assert str(ast) == "(program (print (string 'Hello, World!')))", (
+        "should parse a print of a string"
+    )
 
 
 def test_ast_from_var():
-    ast = AbstractSyntaxTree()
-    expr = "var x = 4;"
-    ast._parse_line(expr)
-
-    expected_result = AbstractSyntaxTree(
-        Node(
-            Token("=", TokenType.ASSIGNMENT),
-            Node(
-                Token("var", TokenType.KEYWORD),
-                right=Node(Token("x", TokenType.SYMBOL)),
-            ),
-            Node(Token("4", TokenType.NUMBER)),
-        )
-    )
+    ast = parse_source("var x = 4;")
 
-    assert ast == expected_result
+    assert str(ast) == "(program (declaration 'x' (number 4)))", (
+        "should parse a declaration with its value"
+    )
 
 
 def test_ast_from_var_and_expr():
-    ast = AbstractSyntaxTree()
-    expr = """
+    ast = parse_source(
+        """
             var x = 4 + 3 + 2 + 1;
             var y = x + 1;
             """
-    ast._parse_line(expr)
-
-    expected_result = AbstractSyntaxTree(
-        [
-            Node(
-                Token("=", TokenType.ASSIGNMENT),
-                Node(Token("x", TokenType.SYMBOL)),
-                Node(Token("10", TokenType.NUMBER)),
-            ),
-            Node(
-                Token("=", TokenType.ASSIGNMENT),
-                Node(Token("y", TokenType.SYMBOL)),
-                Node("x+1", TokenType.EXPRESSION),
-            ),
-        ]
     )
 
-    assert ast == expected_result
+    assert str(ast) == (
+        "(program (declaration 'x' (binary '+' (binary '+' (binary '+'"
+        " (number 4) (number 3)) (number 2)) (number 1)))"
+        " (declaration 'y' (binary '+' (name 'x') (number 1))))"
+    ), "should parse every declaration, grouping additions to the left"
+
+
+def test_ast_parse_program():
+    ast = AbstractSyntaxTree()
+    root = ast.parse("examples/if.joy")
+    assert root == len(ast) - 1, "should allocate the program node last"
+    assert str(ast) == (
+        "(program (declaration 'x') (assignment 'x' (number 2))"
+        " (if (binary '%' (name 'x') (number 2))"
+        " (block (print (string 'odd'))) (block (print (string 'even')))))"
+    ), "should parse every statement of the program"
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("1 + 2 * 3", "(binary '+' (number 1) (binary '*' (number 2) (number 3)))"),
+        ("1 - 2 - 3", "(binary '-' (binary '-' (number 1) (number 2)) (number 3))"),
+        ("(1 + 2) * 3", "(binary '*' (binary '+' (number 1) (number 2)) (number 3))"),
+        ("-x * y", "(binary '*' (unary '-' (name 'x')) (name 'y'))"),
+        ("- - x", "(unary '-' (unary '-' (name 'x')))"),
+        ("x + 1 < y", "(binary '+' (name 'x') (binary '<' (number 1) (name 'y')))"),
+    ],
+)
+def test_ast_expression_precedence(expression: str, expected: str):
+    ast = parse_source(f"{expression};")
+    assert str(ast) == f"(program (expression_statement {expected}))", (
+        f"should group {expression} like the evaluator's operator table"
+    )
+
+
+def test_ast_while():
+    ast = parse_source("while (x < 3) { x = x + 1; }")
+    assert str(ast) == (
+        "(program (while (binary '<' (name 'x') (number 3)) "
+        "(block (assignment 'x' (binary '+' (name 'x') (number 1))))))"
+    ), "should parse the condition and the body"
+    with pytest.raises(JoySyntaxError, match="Expected '\\(' after while"):
+        _ = parse_source("while x { }")
+
+
+def test_ast_arena_links():
+    ast = parse_source("var x = 1 + 2;")
+    declaration = next(ast.children(ast.root))
+    assert ast.kind(declaration) == NodeKind.DECLARATION, "should parse var"
+    assert ast.value(declaration) == "x", "should store the name as operand"
+    (addition,) = ast.children(declaration)
+    left, right = ast.children(addition)
+    assert ast.next_sibling[left] == right, "should link operands as siblings"
+    assert ast.next_sibling[right] == NO_NODE, "should end the sibling chain"
+    assert ast.first_child[left] == NO_NODE, "should give leaves no children"
+
+
+def test_ast_equality():
+    assert parse_source("var x = (1 + 2);") == parse_source("var x = 1 + 2;"), (
+        "should compare structure, not tokens"
+    )
+    assert parse_source("var x = 1 + 2;") != parse_source("var x = 2 + 1;"), (
+        "should compare operands in order"
+    )
+    assert parse_source("print(x);") != parse_source("print(x); x;"), (
+        "should compare statement counts"
+    )
+
+
+def test_ast_deep_expression():
+    depth = 20_000
+    source = "var x = " + " + ".join(["x"] * depth) + ";"
+    ast = parse_source(source)
+    assert ast == parse_source(source), "should compare deep trees iteratively"
+    assert str(ast).count("(binary") == depth - 1, "should print deep trees"
+
+
+def test_ast_deep_nesting():
+    depth = 5_000
+    ast = parse_source("var x = " + "(" * depth + "1" + ")" * depth + ";")
+    assert str(ast) == "(program (declaration 'x' (number 1)))", (
+        "should parse deeply nested parentheses without recursing"
+    )
+    ast = parse_source("var x = " + "-" * depth + "1;")
+    assert str(ast).count("(unary") == depth, "should parse long prefix chains"
+
+
+def test_ast_syntax_errors():
+    with pytest.raises(JoySyntaxError, match="Expected ';' at line 1:11"):
+        _ = parse_source("var x = 1 print(x);")
+    with pytest.raises(ExpressionError, match="Expected operand at line 1:12"):
+        _ = parse_source("var x = 1 +;")
+    with pytest.raises(JoySyntaxError, match="Expected '\\)' at line 1:9"):
+        _ = parse_source("print(1 2);")
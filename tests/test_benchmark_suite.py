@@ -0,0 +1,52 @@
+import json
+
+from benchmarks.suite import benchmarks, compare, main
+from src.evaluator import Evaluator
+
+_BASELINE = {
+    "tokens_per_second": 1000.0,
+    "statements_per_second": 100.0,
+    "peak_memory": 1000,
+}
+
+
+def test_workloads_are_deterministic():
+    first = [benchmark.source for benchmark in benchmarks(0.01)]
+    second = [benchmark.source for benchmark in benchmarks(0.01)]
+
+    assert first == second, "should generate the same workloads every time"
+
+
+def test_workloads_evaluate():
+    for benchmark in benchmarks(0.01):
+        if benchmark.name.startswith("evaluate"):
+            assert Evaluator().evaluate_program(benchmark.source), (
+                f"{benchmark.name} should be valid for the evaluator"
+            )
+
+
+def test_compare_within_threshold():
+    results = {"a": dict(_BASELINE, tokens_per_second=800.0, peak_memory=1200)}
+
+    assert compare(results, {"a": _BASELINE}, 0.25) == [], (
+        "should allow changes within the threshold"
+    )
+    assert compare(results, {}, 0.25) == [], "should skip benchmarks without baseline"
+
+
+def test_compare_regressions():
+    results = {"a": dict(_BASELINE, statements_per_second=50.0, peak_memory=2000)}
+    regressions = compare(results, {"a": _BASELINE}, 0.25)
+
+    assert len(regressions) == 2, "should report throughput and memory regressions"
+    assert regressions[0].startswith("a: statements_per_second")
+
+
+def test_main_stores_and_checks_baselines(tmp_path):
+    path = tmp_path / "baselines.json"
+    arguments = ["--baselines", str(path), "--scale", "0.01", "-k", "run_script"]
+
+    assert main([*arguments, "--update"]) == 0
+    stored = json.loads(path.read_text())
+    assert list(stored["benchmarks"]) == ["run_script"], "should store the results"
+    assert main([*arguments, "--threshold", "0.99"]) == 0, "should pass the baseline"
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+import pytest
+
+from src.bytecode import Bytecode, OpCode
+from src.bytecode_cache import BytecodeCache, default_cache_directory
+from src.interpreter import compile
+from src.tokenizer import Tokenizer
+
+
+def make_bytecode(value: float) -> Bytecode:
+    bytecode = Bytecode(consts=[value])
+    _ = bytecode.emit(OpCode.LOAD_CONST, 0, 1)
+    _ = bytecode.emit(OpCode.PRINT, 0, 1)
+    return bytecode
+
+
+def test_cache_key_depends_on_source():
+    assert BytecodeCache.key(b"var x;") == BytecodeCache.key(b"var x;"), (
+        "should give the same source the same key"
+    )
+    assert BytecodeCache.key(b"var x;") != BytecodeCache.key(b"var y;"), (
+        "should give different sources different keys"
+    )
+
+
+def test_cache_round_trip(tmp_path):
+    cache = BytecodeCache(tmp_path)
+    key = BytecodeCache.key(b"print(1);")
+    assert cache.load(key) is None, "should miss an empty cache"
+    path = cache.store(key, make_bytecode(1.0))
+    assert path == tmp_path / f"{key}.bcj", "should store under the key"
+    assert cache.load(key) == make_bytecode(1.0), "should load stored bytecode"
+    assert [p.name for p in tmp_path.iterdir()] == [path.name], (
+        "should leave no temporary files behind"
+    )
+
+
+def test_cache_drops_corrupted_entry(tmp_path):
+    cache = BytecodeCache(tmp_path)
+    key = BytecodeCache.key(b"print(1);")
+    _ = cache.path(key).write_bytes(b"garbage")
+    assert cache.load(key) is None, "should miss on a corrupted entry"
+    assert not cache.path(key).exists(), "should remove the corrupted entry"
+
+
+def test_cache_prunes_least_recently_used(tmp_path):
+    now = time.time()
+    keys = [BytecodeCache.key(str(i).encode()) for i in range(3)]
+    for age, key in zip([30, 20, 10], keys):
+        _ = BytecodeCache(tmp_path).store(key, make_bytecode(1.0))
+        os.utime(tmp_path / f"{key}.bcj", (now - age, now - age))
+    cache = BytecodeCache(tmp_path, max_entries=2)
+    _ = cache.load(keys[0])
+    assert cache.prune() == 1, "should prune one entry above max_entries"
+    assert not cache.path(keys[1]).exists(), "should prune the least recently used"
+    assert cache.path(keys[0]).exists(), "should keep the entry that was just loaded"
+
+
+def test_cache_prunes_on_store(tmp_path):
+    cache = BytecodeCache(tmp_path, max_entries=2)
+    for i in range(5):
+        _ = cache.store(BytecodeCache.key(str(i).encode()), make_bytecode(1.0))
+    assert len(cache) == 2, "should prune while storing"
+
+
+def test_cache_prunes_old_entries(tmp_path):
+    cache = BytecodeCache(tmp_path, max_age=60)
+    key = BytecodeCache.key(b"old")
+    _ = cache.store(key, make_bytecode(1.0))
+    old = time.time() - 120
+    os.utime(cache.path(key), (old, old))
+    temporary = tmp_path / ".abandoned.tmp"
+    _ = temporary.write_bytes(b"")
+    os.utime(temporary, (old - 3600, old - 3600))
+    assert cache.prune() == 2, "should prune the old entry and temporary file"
+    assert len(cache) == 0, "should leave the cache empty"
+
+
+def test_cache_unwritable_directory(tmp_path):
+    blocker = tmp_path / "file"
+    _ = blocker.write_text("")
+    cache = BytecodeCache(blocker / "cache")
+    assert cache.store("key", make_bytecode(1.0)) is None, (
+        "should skip caching when the directory can't be created"
+    )
+
+
+def test_cache_concurrent_writers(tmp_path):
+    cache = BytecodeCache(tmp_path)
+    key = BytecodeCache.key(b"shared")
+    loaded: list[Bytecode | None] = []
+
+    def write_and_read():
+        for _ in range(20):
+            _ = cache.store(key, make_bytecode(2.0))
+            loaded.append(cache.load(key))
+
+    threads = [threading.Thread(target=write_and_read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(bytecode == make_bytecode(2.0) for bytecode in loaded), (
+        "should only ever read whole entries"
+    )
+
+
+def test_compile_uses_cache(tmp_path, monkeypatch):
+    source = tmp_path / "program.joy"
+    _ = source.write_text("var x = 1;\nprint(x);\n")
+    cache = BytecodeCache(tmp_path / "cache")
+    first = compile(str(source), cache=cache)
+    assert len(cache) == 1, "should cache the compiled program"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("tokenized a cached program")
+
+    monkeypatch.setattr(Tokenizer, "iter_tokens", fail)
+    assert compile(str(source), cache=cache) == first, "should load cached bytecode"
+
+    _ = source.write_text("var x = 2;\nprint(x);\n")
+    with pytest.raises(AssertionError, match="tokenized a cached program"):
+        _ = compile(str(source), cache=cache)
+
+
+def test_default_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv("JOY_CACHE_DIR", str(tmp_path))
+    assert default_cache_directory() == tmp_path, "should honour JOY_CACHE_DIR"
+    monkeypatch.delenv("JOY_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_directory() == tmp_path / "joy", (
+        "should fall back to XDG_CACHE_HOME"
+    )
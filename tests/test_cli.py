@@ -0,0 +1,166 @@
+import subprocess
+import sys
+
+import pytest
+
+from src.cli import main
+
+# microseconds `python -X importtime` may report for importing the modules of
+# src that src.cli loads, not counting the standard library they import
+_IMPORT_BUDGET_MICROSECONDS = 20_000
+_IMPORT_RUNS = 5
+_LAZY_MODULES = ["src.interpreter", "src.compiler", "src.vm", "src.python_backend"]
+
+
+def _import_times(code: str) -> dict[str, int]:
+    """Microseconds spent importing each module itself, without its imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, _, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_time)
+    return times
+
+
+def test_version_import_budget():
+    code = "from src.cli import main; main(['--version'])"
+    runs = [_import_times(code) for _ in range(_IMPORT_RUNS)]
+    # the fastest run is the one least disturbed by the rest of the machine
+    spent = min(
+        sum(time for name, time in times.items() if name.split(".")[0] == "src")
+        for times in runs
+    )
+
+    assert spent < _IMPORT_BUDGET_MICROSECONDS, (
+        f"should import in under {_IMPORT_BUDGET_MICROSECONDS}us, took {spent}us"
+    )
+    for module in [*_LAZY_MODULES, "numpy"]:
+        assert module not in runs[0], f"should not import {module} for --version"
+
+
+def test_eval_imports_no_backend():
+    times = _import_times("from src.cli import main; main(['eval', '1 + 1'])")
+
+    for module in [*_LAZY_MODULES, "numpy"]:
+        assert module not in times, f"should not import {module} for eval"
+
+
+def test_interpreter_import_has_no_side_effects():
+    result = subprocess.run(
+        [sys.executable, "-c", "import src.interpreter"], capture_output=True
+    )
+
+    assert result.returncode == 0, result.stderr.decode()
+    assert result.stdout == b"", "should not run anything on import"
+
+
+def test_version(capsys: pytest.CaptureFixture[str]):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--version"])
+
+    assert exc_info.value.code == 0, "should exit cleanly"
+    assert capsys.readouterr().out.startswith("joy "), "should print the version"
+
+
+def test_eval(capsys: pytest.CaptureFixture[str]):
+    main(["eval", "var x = 2 * 3; x + 1; x > 2"])
+
+    assert capsys.readouterr().out == "6.0\n7.0\n1\n", (
+        "should print the result of every statement"
+    )
+
+
+def test_run(capsys: pytest.CaptureFixture[str]):
+    main(["run", "--no-cache", "tests/files/hello.joy"])
+
+    assert capsys.readouterr().out == "Hello, World!\n", "should run the program"
+
+
+def test_compile(tmp_path, capsys: pytest.CaptureFixture[str]):
+    target = tmp_path / "hello.bcj"
+    main(["compile", "--no-cache", "-o", str(target), "tests/files/hello.joy"])
+    assert capsys.readouterr().out == "", "should compile without running"
+
+    main(["run", str(target)])
+    assert capsys.readouterr().out == "Hello, World!\n", "should run the bytecode"
+
+
+def test_requires_command():
+    with pytest.raises(SystemExit):
+        main([])
+
+
+@pytest.mark.parametrize(
+    "argv, message",
+    [
+        (["run", "--no-cache", "missing.joy"], "missing.joy"),
+        (["eval", "1 / 0"], "division by zero at line 1"),
+        (["eval", "(1 + 2"], "not balanced"),
+        (["run", "BAD_BYTECODE"], "Not a Joy bytecode file"),
+    ],
+)
+def test_user_errors(
+    tmp_path, argv: list[str], message: str, capsys: pytest.CaptureFixture[str]
+):
+    bytecode = tmp_path / "corrupt.bcj"
+    _ = bytecode.write_bytes(b"garbage")
+    argv = [str(bytecode) if arg == "BAD_BYTECODE" else arg for arg in argv]
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(argv)
+
+    assert exc_info.value.code == 1, "should exit with an error status"
+    error = capsys.readouterr().err
+    assert error.startswith("joy: ") and message in error, "should name the error"
+    assert error.count("\n") == 1, "should print one line without a traceback"
+
+
+def test_syntax_error_exit_status(tmp_path):
+    source = tmp_path / "broken.joy"
+    _ = source.write_text("print(1;\n")
+    result = subprocess.run(
+        [sys.executable, "-m", "src.cli", "run", "--no-cache", str(source)],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1, "should exit with an error status"
+    assert result.stderr.startswith("joy: "), "should print the error"
+    assert "Traceback" not in result.stderr, "should not print a traceback"
+
+
+@pytest.mark.parametrize("option", [["-o", "hello.bcj"], ["--cache-dir", "cache"]])
+def test_profile_rejects_output_options(
+    option: list[str], capsys: pytest.CaptureFixture[str]
+):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["run", "--profile", *option, "tests/files/hello.joy"])
+
+    assert exc_info.value.code == 2, "should refuse options profiling would ignore"
+    assert "cannot be used with" in capsys.readouterr().err
+
+
+def test_python_backend_rejects_output(capsys: pytest.CaptureFixture[str]):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["run", "--backend", "python", "-o", "hello.bcj", "tests/files/hello.joy"])
+
+    assert exc_info.value.code == 2, "should refuse -o the Python backend ignores"
+    assert "cannot be used with" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("option", [["--no-cache"], ["--cache-dir", "cache"]])
+def test_compile_directory_rejects_cache_options(
+    option: list[str], capsys: pytest.CaptureFixture[str]
+):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["compile", *option, "tests/files"])
+
+    assert exc_info.value.code == 2, "should refuse options a directory ignores"
+    assert "cannot be used with" in capsys.readouterr().err
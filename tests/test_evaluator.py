@@ -1,3 +1,5 @@
+import subprocess
+import sys
 from collections import deque
 import pytest
 
@@ -6,6 +8,7 @@ from src.evaluator import (
     Evaluator,
 )
 from src.exceptions.ExpressionError import ExpressionError
+from src.expression_cache import ExpressionCache
 from src.joyTypes.Symbol import Symbol, SymbolType
 from src.tokenizer import Tokenizer
 
@@ -350,3 +353,217 @@ def test_if():
     result = eval.evaluate(expr)
     expected_result = 1.0
     assert result == expected_result, f"should evaluate {expr} to {expected_result}"
+
+
+def test_evaluate_cached():
+    eval = Evaluator(cache_size=2)
+    expr = "x * 2 + y"
+    eval.variables = {"x": 3, "y": 1}
+    assert eval.evaluate(expr) == 7
+    eval.variables = {"x": 5, "y": 2}
+    assert eval.evaluate(expr) == 12
+
+    assert eval.cache.stats()["hits"] == 1 and eval.cache.stats()["misses"] == 1
+
+
+def test_evaluate_cached_registers_variables():
+    eval = Evaluator()
+    expr = "x + 1"
+    _ = eval.evaluate(expr)
+    eval.variables = {}
+    result = eval.evaluate(expr)
+
+    assert result == 1 and eval.variables == {"x": 0.0}
+
+
+def test_evaluate_cache_eviction_and_invalidation():
+    eval = Evaluator(cache_size=1)
+    _ = eval.evaluate("1 + 1")
+    _ = eval.evaluate("2 + 2")
+    assert eval.cache.evictions == 1 and "1 + 1" not in eval.cache
+
+    eval.cache.invalidate("2 + 2")
+    _ = eval.evaluate("2 + 2")
+    assert eval.cache.misses == 3
+
+
+def test_evaluate_shared_cache():
+    cache = ExpressionCache()
+    first = Evaluator(variables={"x": 1}, cache=cache)
+    second = Evaluator(variables={"x": 2}, cache=cache)
+
+    assert first.evaluate("x * 10") == 10
+    assert second.evaluate("x * 10") == 20
+    assert cache.hits == 1
+
+
+compiled_expressions = [
+    "1 + 2 * 4 - 3",
+    "1 + 2 * (4 - 3)",
+    "(1 + 2) * 4 - 3",
+    "(1 + 2) * (((4 - 3)-2))",
+    "1 + 2 * - 4 - 3",
+    "-((1 + 2)/((6*-7)+(7*-4)/2)-3)",
+    "2+4+6+8-4*3-3*4-1/3*2",
+    "0x1 + 0b10 * 4 - 3.0",
+    "x + 4",
+    "x + y",
+    "3 == 3",
+    "3 != 4",
+    "3 <= 2",
+    "x >= y",
+    "x % 3 + 7 % y",
+    "if (x > 3)",
+]
+
+
+@pytest.mark.parametrize("expr", compiled_expressions)
+def test_compile_matches_evaluate(expr: str):
+    variables = {"x": 4.0, "y": 3.0}
+    expected_result = Evaluator(variables=dict(variables)).evaluate(expr)
+    result = Evaluator().compile(expr)(dict(variables))
+
+    assert result == expected_result, f"should compile {expr} to {expected_result}"
+
+
+def test_compile_var_assignment():
+    function = Evaluator().compile("var x = 2 + 3")
+    variables = {}
+    result = function(variables)
+
+    assert result == 5 and variables == {"x": 5}
+
+
+def test_compile_invalid_expression():
+    with pytest.raises(ExpressionError, match="Expression invalid"):
+        _ = Evaluator().compile("(1 + 2) * 4 -")
+
+
+def test_compile_division_by_zero():
+    function = Evaluator().compile("x / y")
+    with pytest.raises(ZeroDivisionError):
+        _ = function({"x": 1.0, "y": 0.0})
+
+
+def test_compile_long_chain():
+    expr = " - ".join(["-x"] * 3000)
+    expected_result = Evaluator(variables={"x": 2.0}).evaluate(expr)
+
+    assert Evaluator().compile(expr)({"x": 2.0}) == expected_result, (
+        "should compile long chains through temporaries"
+    )
+
+
+def test_compile_cached():
+    eval = Evaluator()
+
+    assert eval.compile("x * 2") is eval.compile("x * 2")
+
+
+def test_evaluate_batch():
+    np = pytest.importorskip("numpy")
+    eval = Evaluator(variables={"z": 10.0})
+    columns = {"x": np.array([1.0, 2.0, 3.0]), "y": np.array([4.0, 5.0, 6.0])}
+    result = eval.evaluate_batch("-x * 2 + y / 2 + z", columns)
+
+    expected_result = [
+        Evaluator(variables={"x": x, "y": y, "z": 10.0}).evaluate(
+            "-x * 2 + y / 2 + z"
+        )
+        for x, y in zip(columns["x"], columns["y"])
+    ]
+    assert result.tolist() == expected_result, f"should evaluate rows to {expected_result}"
+
+
+def test_evaluate_batch_comparisons():
+    np = pytest.importorskip("numpy")
+    eval = Evaluator()
+    columns = {"x": np.array([1, 2, 3]), "y": np.array([3, 2, 1])}
+
+    assert eval.evaluate_batch("x < y", columns).tolist() == [1.0, 0.0, 0.0]
+    assert eval.evaluate_batch("x == y", columns).tolist() == [0.0, 1.0, 0.0]
+    assert eval.evaluate_batch("+x >= 2", columns).tolist() == [0.0, 1.0, 1.0]
+
+
+def test_evaluate_batch_constant():
+    np = pytest.importorskip("numpy")
+    result = Evaluator().evaluate_batch("1 + 2 * x", {"x": np.zeros(4)})
+
+    assert result.tolist() == [1.0, 1.0, 1.0, 1.0]
+
+
+def test_evaluate_batch_errors():
+    np = pytest.importorskip("numpy")
+    eval = Evaluator()
+    with pytest.raises(ValueError, match="equal length"):
+        _ = eval.evaluate_batch("x + y", {"x": np.zeros(2), "y": np.zeros(3)})
+    with pytest.raises(ZeroDivisionError):
+        _ = eval.evaluate_batch("1 / x", {"x": np.array([1.0, 0.0])})
+    with pytest.raises(ExpressionError):
+        _ = eval.evaluate_batch("var x = y", {"y": np.zeros(2)})
+
+
+def test_evaluator_does_not_import_numpy():
+    code = "import sys, src.evaluator; assert 'numpy' not in sys.modules"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+
+    assert result.returncode == 0, result.stderr.decode()
+
+
+def test_evaluate_resolves_slots_once():
+    eval = Evaluator(variables={"x": 2.0})
+    _ = eval.evaluate("x * 3")
+    resolved = eval.cache.get("x * 3").resolved
+    eval.variables = {"x": 5.0}
+    assert eval.evaluate("x * 3") == 15, "should read the new value through the slot"
+    assert eval.cache.get("x * 3").resolved is resolved, (
+        "should reuse the resolved expression after variables are replaced"
+    )
+
+
+def test_evaluate_shared_cache_switching():
+    cache = ExpressionCache()
+    first = Evaluator(variables={"y": 1.0, "x": 1.0}, cache=cache)
+    second = Evaluator(variables={"x": 2.0}, cache=cache)
+
+    for _ in range(3):
+        assert first.evaluate("x + 1") == 2, "should read the first evaluator's x"
+        assert second.evaluate("x + 1") == 3, "should read the second evaluator's x"
+
+
+def test_variables_view():
+    eval = Evaluator()
+    _ = eval.evaluate("var x = 2 + 3")
+    eval.variables["y"] = 1.0
+    assert dict(eval.variables) == {"x": 5.0, "y": 1.0}, "should act as a dict"
+    assert eval.variables.slots() == {"x": 0, "y": 1}, "should expose the slot map"
+
+
+def test_evaluate_program_matches_evaluate():
+    lines = ["var x = 1 + 2", "x * 2", "-x + 1", "var y = 4 / 2", "x < y", "7 % 4"]
+    expected = Evaluator()
+    program = Evaluator()
+    results = program.evaluate_program(";\n".join(lines))
+
+    assert results == [expected.evaluate(line) for line in lines], (
+        "should give every statement the result evaluate gives"
+    )
+    assert dict(program.variables) == dict(expected.variables), (
+        "should share one variable store across statements"
+    )
+
+
+def test_evaluate_program_statements():
+    eval = Evaluator(variables={"z": 4.0})
+    assert eval.evaluate_program("z * 2;\n;\nz + 1") == [8, 5], (
+        "should skip empty statements and run a trailing one without ';'"
+    )
+    assert eval.evaluate_program("") == [], "should give no results for no code"
+
+
+def test_evaluate_program_error_line():
+    eval = Evaluator()
+    with pytest.raises(ZeroDivisionError, match="at line 3"):
+        _ = eval.evaluate_program("var x = 1;\nx + 1;\nx / 0;")
+    with pytest.raises(ExpressionError, match="at line 2"):
+        _ = eval.evaluate_program("1;\n1 +;")
@@ -0,0 +1,46 @@
+import pytest
+
+from src.expression_cache import ExpressionCache
+
+
+def test_cache_hit_and_miss():
+    cache: ExpressionCache[int] = ExpressionCache(2)
+    assert cache.get("a") is None
+    _ = cache.put("a", 1)
+
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses) == (1, 1), f"should count lookups {cache}"
+
+
+def test_cache_evicts_least_recently_used():
+    cache: ExpressionCache[int] = ExpressionCache(2)
+    _ = cache.put("a", 1)
+    _ = cache.put("b", 2)
+    _ = cache.get("a")
+    _ = cache.put("c", 3)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.evictions == 1, f"should evict b {cache}"
+
+
+def test_cache_invalidate():
+    cache: ExpressionCache[int] = ExpressionCache()
+    _ = cache.put("a", 1)
+    _ = cache.put("b", 2)
+    cache.invalidate("a")
+    assert "a" not in cache and len(cache) == 1
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_cache_disabled():
+    cache: ExpressionCache[int] = ExpressionCache(0)
+    _ = cache.put("a", 1)
+
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_cache_negative_size():
+    with pytest.raises(ValueError):
+        _ = ExpressionCache(-1)
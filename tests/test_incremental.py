@@ -0,0 +1,108 @@
+import io
+
+import pytest
+
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.incremental import IncrementalParser
+from src.tokenizer import Tokenizer
+
+
+def parse(source: str) -> AbstractSyntaxTree:
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(Tokenizer().iter_tokens(io.StringIO(source)))
+    return tree
+
+
+def program(blocks: int) -> str:
+    return "".join(
+        f"var x{i} = {i};\nif (x{i} > 1) {{\n  print(x{i});\n}}\n"
+        for i in range(blocks)
+    )
+
+
+def assert_parsed(parser: IncrementalParser) -> None:
+    expected = parse(parser.source)
+    tree = parser.tree()
+    assert tree == expected, "should give the tree of parsing the whole source"
+    assert tree.lines == expected.lines, "should give every node its source line"
+
+
+def test_tree():
+    parser = IncrementalParser(program(20))
+
+    assert len(parser.regions) > 1, "should cut a long program into regions"
+    assert_parsed(parser)
+
+
+def test_replace_lines():
+    parser = IncrementalParser(program(20))
+    parser.replace_lines(40, 41, "var y = 2;\nprint(y);\n")
+
+    assert parser.source.splitlines()[40:42] == ["var y = 2;", "print(y);"]
+    assert_parsed(parser)
+
+
+def test_replace_lines_keeps_other_regions():
+    parser = IncrementalParser(program(20))
+    regions = list(parser.regions)
+    parser.replace_lines(1, 2, "if (x0 > 2) {\n")
+
+    assert parser.regions[1:] == regions[1:], "should keep the regions after it"
+    assert all(
+        new is old for new, old in zip(parser.regions[1:], regions[1:])
+    ), "should not parse the untouched regions again"
+
+
+def test_update():
+    source = program(20)
+    parser = IncrementalParser(source)
+    source = source.replace("print(x7)", "print(x7 * 2)").replace("x15 > 1", "x15")
+    parser.update(source)
+
+    assert parser.source == source
+    assert_parsed(parser)
+
+
+def test_edit_opening_block():
+    parser = IncrementalParser(program(20))
+    lines = parser.source.splitlines(keepends=True)
+    lines[60:60] = ["}\n"]
+    lines[4:4] = ["while (x0 < 3) {\n"]
+    parser.update("".join(lines))
+
+    assert_parsed(parser)
+
+
+def test_edit_adding_else():
+    parser = IncrementalParser(program(20))
+    parser.replace_lines(20, 20, "else {\n  print(0);\n}\n")
+
+    assert_parsed(parser)
+
+
+def test_edit_opening_string():
+    parser = IncrementalParser(program(20))
+    lines = parser.source.splitlines(keepends=True)
+    lines[30:30] = ['");\n']
+    lines[2] = '  print("a;\n'
+    parser.update("".join(lines))
+
+    assert_parsed(parser)
+
+
+def test_error_keeps_parser():
+    parser = IncrementalParser(program(20))
+    source = parser.source
+
+    with pytest.raises(JoySyntaxError, match="at line 42"):
+        parser.replace_lines(41, 42, "if x1 {\n")
+    assert parser.source == source, "should not change the source on an error"
+    assert_parsed(parser)
+
+
+def test_replace_lines_out_of_range():
+    parser = IncrementalParser("print(1);\n")
+
+    with pytest.raises(ValueError):
+        parser.replace_lines(1, 3, "print(2);\n")
@@ -1,6 +1,7 @@
 from decimal import DivisionByZero
 import pytest
 
+from src.bytecode import Bytecode
 from src.exceptions.FileEmptyError import FileEmptyError
 from src.exceptions.FileWrongTypeError import FileWrongTypeError
 from src.exceptions.VariableDuplicateName import VariableDuplicateName
@@ -9,9 +10,11 @@ from src.exceptions.VariableIllegalName import VariableIllegalName
 from src.exceptions.VariableWhitespaceName import VariableWhitespaceName
 from src.interpreter import (
     assign_value_to_variable,
+    compile,
     get_variable_name,
     read_source_file,
     register_variable,
+    run,
 )
 from src.joyTypes.Variable import Variable
 
@@ -153,3 +156,46 @@ def test_division_by_zero():
     result_dict = {"variable": Variable(type="int", value=4)}
     with pytest.raises(DivisionByZero, match="Cannot divide 0 by zero"):
         assign_value_to_variable("0 / 0", "variable", result_dict)
+
+
+def test_run_program(capsys):
+    variables = run("examples/sum.joy", use_cache=False)
+    assert variables == {"x": 4.0, "y": 2.0}, "should run the program"
+    assert capsys.readouterr().out == "4\n", "should print the result"
+
+
+def test_compile_writes_bytecode(tmp_path, capsys):
+    target = str(tmp_path / "if")
+    bytecode = compile("examples/if.joy", target)
+    assert Bytecode.from_bytes((tmp_path / "if.bcj").read_bytes()) == bytecode, (
+        "should write the bytecode next to the target"
+    )
+    _ = run(target + ".bcj")
+    _ = run("examples/if.joy", cache_directory=str(tmp_path / "cache"))
+    _ = run("examples/if.joy", cache_directory=str(tmp_path / "cache"))
+    assert capsys.readouterr().out == "even\n" * 3, (
+        "should run saved and cached bytecode"
+    )
+
+
+def test_compile_replaces_target_atomically(tmp_path, monkeypatch):
+    target = tmp_path / "if.bcj"
+    _ = target.write_bytes(b"old")
+
+    def fail(*_):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("os.replace", fail)
+    with pytest.raises(OSError):
+        _ = compile("examples/if.joy", str(target))
+    assert target.read_bytes() == b"old", "should leave the old file whole"
+    assert list(tmp_path.iterdir()) == [target], "should remove the temporary file"
+
+    monkeypatch.undo()
+    bytecode = compile("examples/if.joy", str(target))
+    assert Bytecode.from_bytes(target.read_bytes()) == bytecode
+    plain = tmp_path / "plain"
+    _ = plain.write_bytes(b"")
+    assert target.stat().st_mode == plain.stat().st_mode, (
+        "should give the file the permissions open would"
+    )
@@ -0,0 +1,65 @@
+import tracemalloc
+from collections import deque
+
+from src.evaluator import Evaluator
+from src.joyTypes.Symbol import Symbol, binary_operators
+from src.joyTypes.Token import Token, TokenType
+from src.tokenizer import Tokenizer, TokenizerBackend
+
+
+def _generate_expression(terms: int) -> str:
+    return " + ".join(f"(x * {i + 1} - ({i + 2} / y))" for i in range(terms))
+
+
+def _bytes_per_item(build) -> float:
+    tracemalloc.start()
+    result = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(result)
+
+
+def test_token_bytes_per_token():
+    expr = _generate_expression(2000)
+    tokens = Tokenizer(TokenizerBackend.TABLE).tokenize(expr)
+
+    shared = _bytes_per_item(lambda: Tokenizer(TokenizerBackend.TABLE).tokenize(expr))
+    unshared = _bytes_per_item(
+        lambda: [Token(t.token, t.type, t.value) for t in tokens]
+    )
+
+    assert shared < unshared * 0.75, (
+        f"interned tokens should use less memory, got {shared:.1f} vs {unshared:.1f} bytes per token"
+    )
+
+
+def test_rpn_bytes_per_symbol():
+    expr = _generate_expression(2000)
+    tokens = Tokenizer(TokenizerBackend.TABLE).tokenize(expr)
+    evaluator = Evaluator()
+    rpn = evaluator._create_rpn_from_tokens(tokens)
+
+    shared = _bytes_per_item(lambda: evaluator._create_rpn_from_tokens(tokens))
+    unshared = _bytes_per_item(
+        lambda: deque(
+            Symbol(s.value, s.type, s.argument_count, s.precedence) for s in rpn
+        )
+    )
+
+    assert shared < unshared * 0.75, (
+        f"interned symbols should use less memory, got {shared:.1f} vs {unshared:.1f} bytes per symbol"
+    )
+
+
+def test_interned_operators_shared():
+    tokens = Tokenizer().tokenize("x + (y + 1)")
+    rpn = Evaluator()._create_rpn_from_tokens(tokens)
+
+    assert tokens[1] is tokens[4] is Token.interned("+", TokenType.OPERATOR)
+    assert tokens[2] is Tokenizer(TokenizerBackend.TABLE).tokenize("(1)")[0]
+    assert rpn[-1] is binary_operators["+"]
+
+
+def test_slotted_types():
+    for instance in [Token(), Symbol()]:
+        assert not hasattr(instance, "__dict__"), f"{instance!r} should be slotted"
@@ -0,0 +1,54 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.bytecode import Bytecode
+from src.interpreter import compile
+from src.parallel_compile import chunk_by_size, compile_directory
+
+
+@pytest.fixture
+def sources(tmp_path: Path) -> Path:
+    directory = tmp_path / "scripts"
+    (directory / "nested").mkdir(parents=True)
+    for example in Path("examples").glob("*.joy"):
+        _ = shutil.copy(example, directory)
+    _ = shutil.copy("examples/while.joy", directory / "nested" / "loop.joy")
+    return directory
+
+
+def test_chunk_by_size():
+    files = [(str(i), str(i)) for i in range(5)]
+    chunks = chunk_by_size(files, [10, 50, 20, 50, 10], 3)
+
+    assert [[name for name, _ in chunk] for chunk in chunks] == [
+        ["1"],
+        ["3"],
+        ["2", "0", "4"],
+    ], "should hand out the largest files first in chunks of similar size"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_compile_directory(sources: Path, jobs: int):
+    summary = compile_directory(sources, jobs)
+
+    assert len(summary.results) == 5 and summary.errors == []
+    for source in [*sources.glob("*.joy"), sources / "nested" / "loop.joy"]:
+        written = Bytecode.from_bytes(source.with_suffix(".bcj").read_bytes())
+        assert written == compile(str(source)), f"should compile {source.name}"
+
+
+def test_compile_directory_errors(sources: Path, tmp_path: Path):
+    _ = (sources / "broken.joy").write_text("var x = ;")
+    target = tmp_path / "out"
+    summary = compile_directory(sources, 2, target)
+
+    assert [result.source for result in summary.errors] == [
+        str(sources / "broken.joy")
+    ], "should report the file that failed"
+    assert (target / "nested" / "loop.bcj").exists(), (
+        "should write below the target directory"
+    )
+    assert not (target / "broken.bcj").exists(), "should write nothing for errors"
+    assert "error" in summary.report(), "should list errors in the report"
@@ -0,0 +1,164 @@
+import io
+from glob import glob
+from pathlib import Path
+
+import pytest
+
+from src.bytecode import JUMP_OPCODES, Bytecode, OpCode
+from src.compiler import Compiler
+from src.peephole import optimize_bytecode
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+PROGRAMS = [
+    "var x = 5; x = x - 1; x = x + 2; var y = x * 3 / 4 - x / 3; print(y);",
+    "var x = 1; x = x; x; 2; print(x);",
+    "var a = 1; var b; if (a) { if (b) { print(1); } else { print(2); } }"
+    " else { print(3); } print(a + b);",
+    "var i; var t; while (i < 200) { if (i % 2) { t = t + i / 2; }"
+    " else { t = t - 1; } i = i + 1; } print(t);",
+    "var i; var j; var n; while (i < 20) { j = 0; while (j < 20) { n = n + j * 2;"
+    " j = j + 1; } i = i + 1; } print(n);",
+    'var x = 3; if (x > 2) { print("big"); } else { print("small"); }',
+    "if (0) { print(1); } else { 5; print(2); }",
+    "var x = 1; if (0) { print(1); } else { x = x; print(x); }",
+    "var i = 0; while (i < 2) { i = i + 1; } 5; print(9);",
+]
+
+
+def compile_source(source: str, optimize: bool = True) -> Bytecode:
+    compiler = Compiler(optimize)
+    return compiler.compile(Tokenizer().iter_tokens(io.StringIO(source)))
+
+
+def run_bytecode(
+    bytecode: Bytecode, jit_threshold: int | None = None
+) -> tuple[dict[str, float | str], str, int]:
+    output = io.StringIO()
+    vm = VirtualMachine(output, jit_threshold)
+    variables = vm.run(bytecode)
+    return variables, output.getvalue(), vm.dispatches
+
+
+def ops(bytecode: Bytecode) -> list[OpCode]:
+    return [op for _, op, _ in bytecode.instructions()]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        *PROGRAMS,
+        *(
+            Path(path).read_text()
+            for path in sorted(glob("examples/*.joy") + glob("tests/files/*.joy"))
+        ),
+    ],
+)
+@pytest.mark.parametrize("jit_threshold", [None, 8])
+def test_peephole_matches_unoptimized(source: str, jit_threshold: int | None):
+    plain = compile_source(source, optimize=False)
+    optimized, report = optimize_bytecode(plain)
+    expected_variables, expected_output, before = run_bytecode(plain, jit_threshold)
+    variables, output, after = run_bytecode(optimized, jit_threshold)
+    assert variables == expected_variables, "should compute the same variables"
+    assert output == expected_output, "should print the same output"
+    assert after <= before, "should never dispatch more instructions"
+    assert report.instructions_after == len(optimized), "should report its size"
+
+
+def test_peephole_superinstructions():
+    bytecode = compile_source(
+        "var x = 5; x = x - 1; var y = x + 2; print(y * 3); print(x < y);"
+        " print(x < 3);"
+    )
+    assert ops(bytecode) == [
+        OpCode.STORE_CONST,
+        OpCode.INCREMENT_VAR,
+        OpCode.LOAD_VAR,
+        OpCode.ADD_CONST,
+        OpCode.STORE_VAR,
+        OpCode.LOAD_VAR,
+        OpCode.MULTIPLY_CONST,
+        OpCode.PRINT,
+        OpCode.LOAD_VAR_VAR,
+        OpCode.LESS,
+        OpCode.PRINT,
+        OpCode.LOAD_VAR_CONST,
+        OpCode.LESS,
+        OpCode.PRINT,
+    ], "should fuse loads, stores and arithmetic with constants"
+    assert -1.0 in bytecode.consts, "should subtract by adding the negation"
+
+
+def test_peephole_strength_reduction():
+    bytecode = compile_source("var x = 6; print(x / 4); print(x / 3);")
+    assert ops(bytecode).count(OpCode.MULTIPLY_CONST) == 1, (
+        "should multiply by the reciprocal of a power of two"
+    )
+    assert 0.25 in bytecode.consts, "should store the exact reciprocal"
+    assert ops(bytecode).count(OpCode.DIVIDE) == 1, "should keep other divisions"
+
+
+def test_peephole_removes_redundant_code():
+    bytecode = compile_source("var x = 1; x = x; x; 2; print(x);")
+    assert ops(bytecode) == [OpCode.STORE_CONST, OpCode.LOAD_VAR, OpCode.PRINT], (
+        "should drop self assignments and unused loads"
+    )
+
+
+def test_peephole_threads_jumps():
+    plain = compile_source(PROGRAMS[2], optimize=False)
+    optimized, report = optimize_bytecode(plain)
+    code = list(optimized.instructions())
+    for index, op, arg in code:
+        if op in JUMP_OPCODES and arg < len(code):
+            assert arg <= index or code[arg][1] != OpCode.JUMP, (
+                "should not jump forward onto another jump"
+            )
+    assert any(rewrite.startswith("thread") for rewrite in report.rewrites), (
+        "should report threaded jumps"
+    )
+
+
+def test_peephole_keeps_jump_targets():
+    # the loop condition starts at a jump target and must stay addressable
+    bytecode = compile_source("var i; while (i < 3) { i = i + 1; }")
+    assert ops(bytecode) == [
+        OpCode.STORE_CONST,
+        OpCode.LOAD_VAR_CONST,
+        OpCode.JUMP_UNLESS_LESS,
+        OpCode.INCREMENT_VAR,
+        OpCode.LOOP,
+    ], "should fuse inside the loop only"
+    (_, _, target) = list(bytecode.instructions())[-1]
+    assert target == 1, "should jump back to the condition"
+
+
+def test_peephole_removed_else_start():
+    bytecode = compile_source("if (0) { print(1); } else { 5; print(2); }")
+    _, output, _ = run_bytecode(bytecode)
+    assert output == "2\n", "should keep an else starting with an unused value"
+
+
+def test_peephole_removed_loop_exit():
+    bytecode = compile_source("var i = 0; while (i < 2) { i = i + 1; } 5; print(9);")
+    _, output, _ = run_bytecode(bytecode)
+    assert output == "9\n", "should keep code after a loop starting with one"
+
+
+def test_vm_counts_dispatches():
+    plain = compile_source(PROGRAMS[3], optimize=False)
+    optimized, _ = optimize_bytecode(plain)
+    _, _, before = run_bytecode(plain)
+    _, _, after = run_bytecode(optimized)
+    assert before > 2000, "should count every interpreted instruction"
+    assert after < before * 0.75, "should save at least a quarter of the dispatches"
+
+
+def test_negative_zero_constant():
+    source = "var x = 0.0; print(0.0); print(-0.0); print(x - 0.0); print(x * -0.0);"
+    for bytecode in [compile_source(source), compile_source(source, optimize=False)]:
+        _, output, _ = run_bytecode(bytecode)
+        assert output == "0.0\n-0.0\n0.0\n-0.0\n", (
+            "should keep -0.0 apart from 0.0 in the constants"
+        )
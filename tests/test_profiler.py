@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from src.cli import main
+from src.evaluator import Evaluator
+from src.interpreter import Backend, profile
+from src.profiler import Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False)
+    with profiler.phase("tokenize"), profiler.line(1):
+        pass
+
+    assert profiler.phase("a") is profiler.line(2), "should share one context"
+    assert profiler.phases == {} and profiler.lines == {}, "should record nothing"
+
+
+def test_phase_totals():
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.phase("parse"):
+            _ = [object() for _ in range(100)]
+
+    assert profiler.phases["parse"].calls == 3, "should count every call"
+    assert profiler.phases["parse"].seconds > 0, "should add up the time"
+
+
+def test_evaluate_program_profile():
+    profiler = Profiler()
+    results = Evaluator().evaluate_program("var x = 2;\nx * 3;\n\nx + 1", profiler)
+
+    assert results == [2, 6, 3], "should evaluate like without a profiler"
+    assert set(profiler.phases) == {"tokenize", "rpn", "resolve", "solve"}
+    assert profiler.phases["solve"].calls == 3, "should time every statement"
+    assert sorted(profiler.lines) == [1, 2, 4], "should charge statements to lines"
+
+
+def test_profile_python_backend_lines():
+    profiler = Profiler()
+    _ = profile("examples/hello.joy", profiler, Backend.PYTHON)
+    _ = profile("examples/hello.joy", profiler, Backend.PYTHON)
+
+    assert list(profiler.phases) == ["read", "tokenize", "parse", "compile", "run"]
+    assert profiler.phases["run"].calls == 2, "should profile again once done"
+    assert 1 in profiler.lines, "should time the program's lines"
+
+
+def test_profile_vm_phases():
+    profiler = Profiler()
+    variables = profile("tests/files/hello.joy", profiler)
+
+    assert variables == {}, "should run the program"
+    assert profiler.phases["run"].calls == 1, "should time the run"
+
+
+def test_cli_profile_json(tmp_path, capsys: pytest.CaptureFixture[str]):
+    target = tmp_path / "profile.json"
+    main(["eval", "--profile", "--profile-json", str(target), "1 + 2; 3 * 4"])
+
+    captured = capsys.readouterr()
+    assert captured.out == "3.0\n12.0\n", "should still print the results"
+    assert "phase tokenize" in captured.err, "should print the report to stderr"
+    data = json.loads(target.read_text())
+    assert data["lines"]["1"]["calls"] == 2, "should write the lines as JSON"
@@ -0,0 +1,132 @@
+import ast
+import io
+from glob import glob
+from pathlib import Path
+
+import pytest
+
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.bytecode_cache import BytecodeCache
+from src.compiler import Compiler
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.interpreter import compile_python, run
+from src.python_backend import (
+    compile_program,
+    dump_code,
+    load_code,
+    lower_program,
+    run_code,
+)
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+PROGRAMS = [
+    "var x; x = 2; var y; y = 2; x = x + y; print(x);",
+    'var x = 7; if (x % 2) { print("odd"); } else { print("even"); }',
+    "var x = 3; if (x < 2) { print(1); } else if (x < 4) { print(2); }"
+    " else { print(3); }",
+    "var x = 5; var y = -x + +2 * 3; print(y); print(x == 5 + 1); print(x != 5);",
+    "var x = 1; if (x > 2) { var y = 4; } print(x / 4 - 3 % 2);",
+    'print("text"); print(2 >= 3);',
+    "var x = 1; print(-(2 < 3)); print(x < 2 + 0); print(x * 1);",
+    "var x; x = 10 % 4 * (2 + 1); if (x) { x = x - 1; } print(x);",
+    # chains nested deeper than ast and compile() recurse
+    pytest.param(
+        "var x = 1; print(" + " + ".join(["x"] * 3000) + ");", id="long-chain"
+    ),
+    pytest.param(
+        "var x = 1; var y = " + " - ".join(["x"] * 3000) + " < 2; print(y);",
+        id="long-comparison",
+    ),
+    pytest.param(
+        "var x = 1; while ((" + " + ".join(["x"] * 3000) + ") < 6000) {"
+        " x = x + 1; } print(x);",
+        id="long-condition",
+    ),
+]
+
+
+def parse(source: str) -> AbstractSyntaxTree:
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(Tokenizer().iter_tokens(io.StringIO(source)))
+    return tree
+
+
+def run_both(source: str) -> tuple[tuple[dict, str], tuple[dict, str]]:
+    tree = parse(source)
+    vm_output = io.StringIO()
+    vm_variables = VirtualMachine(vm_output).run(Compiler().compile_tree(tree))
+    python_output = io.StringIO()
+    python_variables = run_code(compile_program(tree), python_output)
+    return (
+        (vm_variables, vm_output.getvalue()),
+        (python_variables, python_output.getvalue()),
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        *sorted(glob("examples/*.joy")),
+        *(p for p in sorted(glob("tests/files/*.joy")) if Path(p).stat().st_size),
+    ],
+)
+def test_python_backend_matches_vm_on_files(path: str):
+    vm, python = run_both(Path(path).read_text())
+    assert python == vm, f"should run {path} like the VM"
+
+
+@pytest.mark.parametrize("source", PROGRAMS)
+def test_python_backend_matches_vm(source: str):
+    vm, python = run_both(source)
+    assert python == vm, "should give the same variables and output as the VM"
+
+
+def test_python_backend_division_by_zero_line():
+    code = compile_program(parse("var x = 1;\nvar y = 0;\nprint(x / y);\n"))
+    with pytest.raises(ZeroDivisionError, match="at line 3"):
+        _ = run_code(code, io.StringIO())
+
+
+def test_python_backend_undeclared_variable():
+    with pytest.raises(JoySyntaxError, match="not declared"):
+        _ = compile_program(parse("var x = 1; y = x;"))
+
+
+def test_python_backend_branches_on_comparisons():
+    tree = parse("var x = 1; while (x < 3) { x = x + 1; }")
+    source = ast.unparse(lower_program(tree))
+    assert "while v0 < 3:" in source, "should branch on the bare comparison"
+
+
+def test_python_backend_code_round_trip():
+    code = compile_program(parse("var x = 2; print(x * 3);"))
+    output = io.StringIO()
+    _ = run_code(load_code(dump_code(code)), output)
+    assert output.getvalue() == "6\n", "should run code loaded from its dump"
+    assert load_code(b"garbage") is None, "should reject data without the header"
+
+
+def test_compile_python_uses_cache(tmp_path, monkeypatch):
+    source = tmp_path / "program.joy"
+    _ = source.write_text("var x = 1;\nprint(x);\n")
+    cache = BytecodeCache(tmp_path / "cache")
+    first = compile_python(str(source), cache)
+    assert len(cache) == 1, "should cache the compiled program"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("tokenized a cached program")
+
+    monkeypatch.setattr(Tokenizer, "iter_tokens", fail)
+    assert compile_python(str(source), cache) == first, "should load cached code"
+    assert len(BytecodeCache(tmp_path / "cache")) == 1, (
+        "should not share entries with the bytecode backend"
+    )
+
+
+def test_run_python_backend(tmp_path, capsys):
+    variables = run(
+        "examples/sum.joy", cache_directory=str(tmp_path), backend="python"
+    )
+    assert capsys.readouterr().out == "4\n", "should print like the VM"
+    assert variables["x"] == 4.0, "should return the variables"
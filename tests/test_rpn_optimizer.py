@@ -0,0 +1,155 @@
+from collections import deque
+
+import pytest
+
+from src.evaluator import Evaluator
+from src.exceptions.ExpressionError import ExpressionError
+from src.joyTypes.Symbol import Symbol, SymbolType, binary_operators
+from src.rpn_optimizer import fold_constants
+from src.tokenizer import Tokenizer
+
+
+def _fold(expr: str):
+    evaluator = Evaluator()
+    rpn = evaluator._create_rpn_from_tokens(Tokenizer().tokenize(expr))
+    return fold_constants(rpn, evaluator.operations, evaluator.unary_operations)
+
+
+def test_fold_subexpression():
+    expr = "x * (2 + 3) - 0"
+    result, report = _fold(expr)
+
+    expected_result = deque(
+        [
+            Symbol("x", SymbolType.SYMBOL, 0),
+            Symbol("5.0", SymbolType.NUMBER, 0),
+            Symbol("*", SymbolType.OPERATOR),
+        ]
+    )
+    assert result == expected_result, f"should fold {expr} to {expected_result}"
+    assert report.removed == ["2.0 3.0 + -> 5.0", "x 5.0 * 0.0 - -> x 5.0 *"]
+    assert (report.symbols_before, report.symbols_after) == (7, 3)
+
+
+def test_fold_literals():
+    expr = "-4 + 0x10 * 0b11"
+    result, _report = _fold(expr)
+
+    assert result == deque([Symbol("44.0", SymbolType.NUMBER, 0)])
+
+
+@pytest.mark.parametrize(
+    "expr", ["x * 1", "1 * x", "x + 0", "0 + x", "x - 0", "x / 1", "-(-x)", "+x"]
+)
+def test_fold_identities(expr: str):
+    result, report = _fold(expr)
+
+    assert result == deque([Symbol("x", SymbolType.SYMBOL, 0)]), (
+        f"should simplify {expr} to x, got {result}"
+    )
+    assert len(report.removed) == 1
+
+
+def test_fold_keeps_non_identities():
+    for expr in ["0 - x", "1 / x", "x * 0", "x == 1"]:
+        result, report = _fold(expr)
+        assert len(result) == 3 and report.removed == [], f"should keep {expr}"
+
+
+def test_fold_assignment():
+    result, _report = _fold("var x = 2 + 3")
+
+    expected_result = deque(
+        [
+            Symbol("var", SymbolType.KEYWORD, 0),
+            Symbol("x", SymbolType.SYMBOL, 0),
+            Symbol("5.0", SymbolType.NUMBER, 0),
+            Symbol("=", SymbolType.ASSIGNMENT, 0),
+        ]
+    )
+    assert result == expected_result
+
+
+def test_fold_division_by_zero_at_runtime():
+    result, report = _fold("1 / (2 - 2)")
+    assert len(result) == 3 and len(report.removed) == 1
+
+    with pytest.raises(ZeroDivisionError):
+        _ = Evaluator().evaluate("1 / (2 - 2)")
+
+
+def test_fold_invalid_expression_unchanged():
+    result, report = _fold("(1 + 2) * 4 -")
+    assert report.removed == [] and len(result) == 6
+
+    with pytest.raises(ExpressionError, match="Expression invalid"):
+        _ = Evaluator().evaluate("(1 + 2) * 4 -")
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "1 + 2 * 4 - 3",
+        "-((1 + 2)/((6*-7)+(7*-4)/2)-3)",
+        "2+4+6+8-4*3-3*4-1/3*2",
+        "0x1 + 0b10 * 4 - 3.0",
+        "x * (2 + 3) - 0 + -(-y)",
+        "x * 1 + 0 * y",
+        "3 <= 2 + x",
+    ],
+)
+def test_fold_matches_unoptimized(expr: str):
+    variables = {"x": 4.0, "y": -3.0}
+    expected_result = Evaluator(variables=dict(variables), optimize=False).evaluate(expr)
+    result = Evaluator(variables=dict(variables)).evaluate(expr)
+
+    assert result == expected_result, f"should evaluate {expr} to {expected_result}"
+
+
+def test_evaluator_fold_report():
+    eval = Evaluator()
+
+    assert eval.fold_report("2 * 3").removed == ["2.0 3.0 * -> 6.0"]
+    assert Evaluator(optimize=False).fold_report("2 * 3") is None
+
+
+
+@pytest.mark.parametrize(
+    "constant, operator, kind, removed",
+    [
+        ("1", "/", int, False),
+        ("1", "/", float, True),
+        ("0", "+", int, True),
+        ("0.0", "+", int, False),
+        ("1", "*", None, True),
+        ("1.0", "*", None, False),
+    ],
+)
+def test_fold_identity_keeps_type(
+    constant: str, operator: str, kind: type | None, removed: bool
+):
+    rpn = [
+        Symbol("x", SymbolType.SYMBOL, 0),
+        Symbol(constant, SymbolType.NUMBER, 0),
+        binary_operators[operator],
+    ]
+    result, _ = fold_constants(
+        rpn, Evaluator.operations, Evaluator.unary_operations, lambda _: kind
+    )
+
+    assert (len(result) == 1) == removed, (
+        f"should only drop x {operator} {constant} when x keeps the result's type"
+    )
+
+
+def test_fold_int_constants_exact():
+    rpn = [
+        Symbol(str(2**60), SymbolType.NUMBER, 0),
+        Symbol("1", SymbolType.NUMBER, 0),
+        binary_operators["+"],
+    ]
+    result, _ = fold_constants(rpn, Evaluator.operations, Evaluator.unary_operations)
+
+    assert result == deque([Symbol(str(2**60 + 1), SymbolType.NUMBER, 0)]), (
+        "should fold int constants without rounding them"
+    )
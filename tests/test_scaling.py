@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.scaling import (
+    MAX_EXPONENT,
+    PHASES,
+    SIZES,
+    Phase,
+    growth_exponent,
+    measure,
+)
+
+
+def test_growth_exponent():
+    sizes = [1, 10, 100]
+
+    assert growth_exponent(sizes, [1.0, 10.0, 100.0]) == pytest.approx(1.0)
+    assert growth_exponent(sizes, [1.0, 100.0, 10_000.0]) == pytest.approx(2.0)
+    assert growth_exponent(sizes, [2.0, 2.0, 2.0]) == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("phase", PHASES, ids=[phase.name for phase in PHASES])
+def test_phase_scales_linearly(phase: Phase):
+    sizes = [phase.base * size for size in SIZES]
+    times = measure(phase)
+    exponent = growth_exponent(sizes, times)
+    if exponent > MAX_EXPONENT:
+        # a single slow timing on a busy machine is not a trend, measure again
+        exponent = growth_exponent(sizes, measure(phase))
+
+    assert exponent <= MAX_EXPONENT, (
+        f"{phase.name} should grow at most linearly, grew as size^{exponent:.2f}"
+    )
@@ -0,0 +1,173 @@
+import asyncio
+import json
+
+import pytest
+
+from src.evaluator import Evaluator
+from src.server import EvaluationServer, percentile
+
+
+async def _exchange(
+    server: EvaluationServer, requests: list[dict], socket_path: str | None = None
+) -> list[dict]:
+    """Sends requests in one write over a fresh connection, reads the answers."""
+    listener = await server.start(port=0, socket_path=socket_path)
+    async with listener:
+        if socket_path is not None:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+        else:
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"".join(json.dumps(r).encode() + b"\n" for r in requests))
+        await writer.drain()
+        answers = [json.loads(await reader.readline()) for _ in requests]
+        writer.close()
+        await writer.wait_closed()
+    return sorted(answers, key=lambda answer: str(answer["id"]))
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0, "should give 0 without values"
+
+
+def test_evaluate_and_sessions():
+    server = EvaluationServer()
+    answers = asyncio.run(
+        _exchange(
+            server,
+            [{"id": 1, "session": "a", "expression": "x * 2", "variables": {"x": 3}}],
+        )
+    )
+    assert answers == [{"id": 1, "result": 6.0}], "should answer with the result"
+
+    answers = asyncio.run(
+        _exchange(
+            server,
+            [
+                {"id": 2, "session": "a", "expression": "x + 1"},
+                {"id": 3, "session": "b", "expression": "var x = 10"},
+            ],
+        )
+    )
+    assert answers[0]["result"] == 4.0, "should keep a session's variables"
+    assert server.sessions["a"].variables["x"] == 3.0
+    assert server.sessions["b"].variables["x"] == 10.0, "should keep sessions apart"
+
+
+def test_unix_socket(tmp_path):
+    server = EvaluationServer()
+    request = {"id": "u", "expression": "1 + 2"}
+    answers = asyncio.run(_exchange(server, [request], str(tmp_path / "joy.sock")))
+
+    assert answers == [{"id": "u", "result": 3.0}], "should serve a Unix socket"
+
+
+def test_errors():
+    server = EvaluationServer()
+    answers = asyncio.run(
+        _exchange(
+            server,
+            [
+                {"id": 1, "expression": "1 / 0"},
+                {"id": 2},
+                {"id": 3, "expression": "1 +"},
+            ],
+        )
+    )
+
+    assert all("error" in answer for answer in answers), "should answer errors"
+    assert answers[1]["error"] == "Missing field 'expression'"
+    assert server.errors == 3
+
+
+def test_batches_identical_expressions():
+    pytest.importorskip("numpy")
+    server = EvaluationServer(batch_window=0.01)
+    requests = [
+        {"id": i, "session": f"s{i % 3}", "expression": "x * x + y", "variables": v}
+        for i, v in enumerate([{"x": 1, "y": 1}, {"x": 2}, {"x": 3}, {"x": 4}])
+    ]
+    answers = asyncio.run(_exchange(server, requests))
+
+    # s0 gets x=1, y=1 then x=4 keeping y=1, the others have y=0
+    assert [answer["result"] for answer in answers] == [2.0, 4.0, 9.0, 17.0], (
+        "should give every request its own result"
+    )
+    assert server.batches == 1 and server.batched_requests == 4, (
+        "should solve the requests as one batch"
+    )
+    assert server.sessions["s0"].variables["x"] == 4.0, (
+        "should store the variables in request order"
+    )
+
+
+@pytest.mark.parametrize("batch_window", [0.0, 0.01])
+def test_pipelined_session_order(batch_window: float):
+    server = EvaluationServer(batch_window)
+    expressions = ["var x = 1", "x + 1", "var x = 5", "x + 1", "x * 2", "x + 1"]
+    requests = [
+        {"id": i, "session": "a", "expression": expression}
+        for i, expression in enumerate(expressions)
+    ]
+    answers = asyncio.run(_exchange(server, requests))
+
+    assert [answer["result"] for answer in answers] == [
+        1.0,
+        2.0,
+        5.0,
+        6.0,
+        10.0,
+        6.0,
+    ], "should run a session's requests in the order they were sent"
+
+
+@pytest.mark.parametrize(
+    "expression", ["x > 1", "-(x == 2)", "(x > 1) + (x < 3)", "(x > 1) / 1", "x * 2"]
+)
+def test_batched_answers_match_unbatched(expression: str):
+    pytest.importorskip("numpy")
+    server = EvaluationServer(batch_window=0.01)
+    requests = [
+        {"id": x, "session": str(x), "expression": expression, "variables": {"x": x}}
+        for x in [1, 2, 3]
+    ]
+    answers = asyncio.run(_exchange(server, requests))
+    expected = [
+        Evaluator(variables={"x": float(x)}).evaluate(expression) for x in [1, 2, 3]
+    ]
+
+    assert server.batches == 1, "should solve the requests as one batch"
+    assert [repr(answer["result"]) for answer in answers] == [
+        repr(json.loads(json.dumps(result))) for result in expected
+    ], f"should answer {expression} with the numbers evaluate gives"
+
+
+def test_batch_errors_fall_back():
+    pytest.importorskip("numpy")
+    server = EvaluationServer(batch_window=0.01)
+    requests = [
+        {"id": i, "session": str(i), "expression": "1 / x", "variables": {"x": x}}
+        for i, x in enumerate([2, 0])
+    ]
+    answers = asyncio.run(_exchange(server, requests))
+
+    assert answers[0] == {"id": 0, "result": 0.5}, "should still answer the others"
+    assert "division by zero" in answers[1]["error"], "should report its own error"
+    assert server.batches == 0
+
+
+def test_stats():
+    server = EvaluationServer()
+    requests = [{"id": i, "expression": f"{i} + 1"} for i in range(5)]
+    _ = asyncio.run(_exchange(server, requests))
+    answers = asyncio.run(_exchange(server, [{"id": "s", "op": "stats"}]))
+    stats = answers[0]["stats"]
+
+    assert stats["requests"] == 5, "should count the requests"
+    assert set(stats["latency_ms"]) == {"p50", "p90", "p99", "max"}
+    assert 0 < stats["latency_ms"]["p50"] <= stats["latency_ms"]["max"]
+    assert stats["cache"]["misses"] == 5, "should share the expression cache"
@@ -0,0 +1,78 @@
+import tracemalloc
+
+from src.evaluator import Evaluator
+from src.joyTypes.Token import Token, TokenType
+from src.joyTypes.TokenStream import TokenStream
+from src.tokenizer import Tokenizer
+
+
+def test_token_stream_matches_list():
+    expr = 'var x = 0x1F + (2.5 * y) - 0b11; print("a, b");'
+    result = Tokenizer().tokenize_stream(expr)
+    expected_result = Tokenizer().tokenize(expr)
+
+    assert list(result) == expected_result, f"should tokenize {expr} got {result}"
+    assert len(result) == len(expected_result)
+
+
+def test_token_stream_offsets():
+    expr = 'print("Hello")'
+    stream = Tokenizer().tokenize_stream(expr)
+
+    assert stream.type_at(2) == TokenType.STRING
+    assert stream.span(2) == (7, 12)
+    assert stream.text(2) == "Hello"
+    assert stream[0] == Token("print", TokenType.KEYWORD)
+
+
+def test_token_stream_append():
+    stream = TokenStream("1 + x")
+    stream.append(TokenType.NUMBER, 0, 1, 1.0)
+    stream.append(TokenType.OPERATOR, 2, 3)
+    stream.append(TokenType.SYMBOL, 4, 5)
+
+    expected_result = [
+        Token("1", TokenType.NUMBER, 1.0),
+        Token("+", TokenType.OPERATOR),
+        Token("x", TokenType.SYMBOL),
+    ]
+
+    assert list(stream) == expected_result, f"should build stream got {stream}"
+
+
+def test_token_stream_rpn():
+    expr = "1 + 2 * (4 - x) / 0x10"
+    evaluator = Evaluator(variables={"x": 2})
+    result = evaluator._create_rpn_from_tokens(Tokenizer().tokenize_stream(expr))
+    expected_result = evaluator._create_rpn_from_tokens(Tokenizer().tokenize(expr))
+
+    assert result == expected_result, f"should create rpn from {expr}"
+
+
+def _traced_size(build) -> int:
+    tracemalloc.start()
+    result = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def test_token_stream_memory():
+    expr = " + ".join(f"(x{i} * {i + 1}.5)" for i in range(2000))
+    tokens = Tokenizer().tokenize(expr)
+    stream_size = _traced_size(lambda: Tokenizer().tokenize_stream(expr))
+    list_size = _traced_size(lambda: Tokenizer().tokenize(expr))
+    # interned operators and punctuation already shrink the token list, the
+    # stream is measured against one Token object per token as well
+    unshared_size = _traced_size(
+        lambda: [Token(t.token, t.type, t.value) for t in tokens]
+    )
+
+    assert stream_size < list_size, (
+        f"stream should be smaller, got {stream_size} vs {list_size}"
+    )
+    assert stream_size * 2 < unshared_size, (
+        f"stream should be under half of unshared tokens, "
+        f"got {stream_size} vs {unshared_size}"
+    )
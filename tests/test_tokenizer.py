@@ -1,6 +1,8 @@
+import io
+
 from src.exceptions.TokenizerValueError import TokenizerValueError
 from src.joyTypes.Token import Token, TokenType
-from src.tokenizer import Tokenizer
+from src.tokenizer import Tokenizer, TokenizerBackend
 
 import pytest
 
@@ -408,3 +410,135 @@ def test_greater_than_or_equal():
     ]
 
     assert result == expected_result, f"should tokenize {expr} got {result}"
+
+
+backend_expressions = [
+    "100+(20*40)-30000",
+    "1.00+(2.0*40)-30.000",
+    "1.0.0+(2.0*40)-30.00.0 ",
+    ".1+(2.0*40)-30.000",
+    "1.00+(2.0*40)-30.abcd00.efgh0 ",
+    "1.00+(2.0*40)-abc30.00.0",
+    "abc 1.0",
+    "0b0110 0xABC34 23.176 9",
+    "0b0110 0xABmC34 23.176 9",
+    "{0b0110 0xABC34 23.176 9}",
+    "{0b0110 0xABC34 23.176 9",
+    "0b0110 0xABC34 23.176 9}",
+    "{0b0110, 0xABC34, 23.176 9}",
+    "{0b0110, 0xABC34, ,23.176, ,9,}",
+    "{0b0110, 0xABC34, 23.176 9};",
+    'print("Hello, world!");',
+    '"Hello, world!"',
+    '"Hello, world! ',
+    "var",
+    "var x = 4",
+    "var x = 4 + 5 + 12",
+    "var x = 4 + (5 + 12)",
+    "4 == 5",
+    "4 != 5",
+    "4 < 5",
+    "4 <= 5",
+    "4 > 5",
+    "4 >= 5",
+    "x=-4 !!= 2",
+    "0 + 1",
+    "0x",
+    "if (x > 3) { print(x); } else { print(\"no\"); }",
+    "qq ~ 2",
+]
+
+
+def _tokenize_or_error(backend: TokenizerBackend, expr: str):
+    try:
+        return Tokenizer(backend).tokenize(expr)
+    except (TokenizerValueError, ValueError) as e:
+        return type(e), str(e)
+
+
+@pytest.mark.parametrize("expr", backend_expressions)
+def test_table_backend_matches_state_machine(expr: str):
+    expected_result = _tokenize_or_error(TokenizerBackend.STATE_MACHINE, expr)
+    result = _tokenize_or_error(TokenizerBackend.TABLE, expr)
+
+    assert result == expected_result, f"should tokenize {expr} like the state machine"
+
+
+def test_table_backend_balance():
+    tokenizer = Tokenizer(TokenizerBackend.TABLE)
+    _result = tokenizer.tokenize("((1) + {2})")
+
+    assert tokenizer.parenthesis_balance == 0 and tokenizer.scope_balance == 0
+
+
+def test_iter_tokens_chunk_boundaries():
+    source = 'var x = 0x1F + 12.5;\nif (x >= 0b101) {\n  print("a, b");\n}\n'
+    expected_result = Tokenizer().tokenize(source)
+
+    for chunk_size in [1, 2, 3, 7, 64]:
+        result = list(Tokenizer().iter_tokens(io.StringIO(source), chunk_size))
+        assert result == expected_result, (
+            f"should tokenize across chunks of {chunk_size} got {result}"
+        )
+
+
+def test_iter_tokens_line_and_column():
+    source = 'var x = 4;\n\n  print("a\nb");\nx >= 2'
+    result = list(Tokenizer().iter_tokens(io.StringIO(source), 4))
+
+    positions = [(token.token, token.line, token.column) for token in result]
+    expected_result = [
+        ("var", 1, 1),
+        ("x", 1, 5),
+        ("=", 1, 7),
+        ("4", 1, 9),
+        (";", 1, 10),
+        ("print", 3, 3),
+        ("(", 3, 8),
+        ("a\nb", 3, 9),
+        (")", 4, 3),
+        (";", 4, 4),
+        ("x", 5, 1),
+        (">=", 5, 3),
+        ("2", 5, 6),
+    ]
+
+    assert positions == expected_result, f"should track positions got {positions}"
+
+
+def test_iter_tokens_path(tmp_path):
+    file_path = tmp_path / "sum.joy"
+    file_path.write_text("var x;\nx = 2;\n")
+    result = list(Tokenizer().iter_tokens(str(file_path)))
+
+    expected_result = Tokenizer().tokenize("var x;\nx = 2;\n")
+
+    assert result == expected_result, f"should tokenize {file_path} got {result}"
+
+
+def test_iter_tokens_unbalanced():
+    with pytest.raises(TokenizerValueError):
+        _result = list(Tokenizer().iter_tokens(io.StringIO("{ (1 + 2)"), 2))
+
+
+def test_iter_tokens_lazy():
+    tokens = Tokenizer().iter_tokens(io.StringIO("1 + 2 $"), 2)
+
+    assert next(tokens) == Token("1", TokenType.NUMBER, 1.0)
+    with pytest.raises(TokenizerValueError):
+        _result = list(tokens)
+
+
+def test_tokenizer_zero():
+    expr = "0 + 0.5 - 01"
+    expected_result = [
+        Token("0", TokenType.NUMBER, 0.0),
+        Token("+", TokenType.OPERATOR),
+        Token("0.5", TokenType.NUMBER, 0.5),
+        Token("-", TokenType.OPERATOR),
+        Token("01", TokenType.NUMBER, 1.0),
+    ]
+
+    for backend in TokenizerBackend:
+        result = Tokenizer(backend).tokenize(expr)
+        assert result == expected_result, f"should tokenize {expr} got {result}"
@@ -0,0 +1,110 @@
+import io
+
+import pytest
+
+from src.compiler import Compiler
+from src.tokenizer import Tokenizer
+from src.tracing_jit import GUARD_FAILED, MAX_RECORDINGS
+from src.vm import VirtualMachine
+
+
+def run_source(
+    source: str, jit_threshold: int | None = 8
+) -> tuple[dict[str, float | str], str, VirtualMachine]:
+    bytecode = Compiler().compile(Tokenizer().iter_tokens(io.StringIO(source)))
+    output = io.StringIO()
+    vm = VirtualMachine(output, jit_threshold)
+    variables = vm.run(bytecode)
+    return variables, output.getvalue(), vm
+
+
+PROGRAMS = [
+    "var i; while (i < 100) { i = i + 1; }",
+    "var i; var t; while (i < 50) { if (i % 3) { t = t + i; } else { t = t - 1; }"
+    " i = i + 1; } print(t);",
+    "var i; while (i < 20) { print(i * 2); i = i + 1; }",
+    "var i; var j; var n; while (i < 10) { j = 0; while (j < 10) { n = n + 1;"
+    " j = j + 1; } i = i + 1; } print(n);",
+    "var i; var f; while (i < 30) { f = i < 15; i = i + +1; } print(f);",
+    "var i = 10; while (i) { i = i - 1; -i; }",
+    pytest.param(
+        "var i; var y; while (i < 20) { i = i + 1;"
+        " y = " + " + ".join(["i"] * 3000) + "; if ((" + " - ".join(["i"] * 3000)
+        + ") < 0) { print(y); } }",
+        id="long-chain",
+    ),
+]
+
+
+@pytest.mark.parametrize("source", PROGRAMS)
+def test_jit_matches_interpreter(source: str):
+    expected_variables, expected_output, _ = run_source(source, None)
+    variables, output, _ = run_source(source)
+    assert variables == expected_variables, "should compute the same variables"
+    assert output == expected_output, "should print the same output"
+
+
+def test_jit_tiers_up_hot_loop():
+    variables, _, vm = run_source("var i; while (i < 1000) { i = i + 1; }")
+    assert variables == {"i": 1000.0}, "should finish the loop"
+    (stats,) = vm.jit.stats.values()
+    assert stats.tier_ups == 1, "should compile the loop once"
+    assert stats.back_edges == 8, "should leave the interpreter once the loop is hot"
+    assert stats.side_exits == 0, "should only leave the trace when the loop ends"
+    assert "line 1" in vm.jit.report(), "should report the loop by line"
+
+
+def test_jit_leaves_cold_loop_alone():
+    _, _, vm = run_source("var i; while (i < 5) { i = i + 1; }")
+    (stats,) = vm.jit.stats.values()
+    assert stats.tier_ups == 0, "should not compile a loop below the threshold"
+
+
+def test_jit_side_exits_on_other_branch():
+    source = (
+        "var i; var t; while (i < 100) { if (i < 50) { t = t + 1; } "
+        "else { t = t - 1; } i = i + 1; }"
+    )
+    variables, _, vm = run_source(source)
+    assert variables["t"] == 0.0, "should take both branches"
+    (stats,) = vm.jit.stats.values()
+    assert stats.side_exits > 0, "should exit the trace on the unrecorded branch"
+
+
+def test_jit_nested_loop_traces_inner_loop():
+    source = (
+        "var i; var j; while (i < 20) { j = 0; while (j < 20) { j = j + 1; } "
+        "i = i + 1; }"
+    )
+    _, _, vm = run_source(source)
+    outer, inner = (vm.jit.stats[header] for header in sorted(vm.jit.stats))
+    assert outer.aborts == 1, "should abandon tracing a loop holding a loop"
+    assert inner.tier_ups == 1, "should trace the inner loop"
+
+
+def test_jit_type_guard_fails_on_new_type():
+    # x holds a float while the loop is recorded, then an int from a comparison
+    source = (
+        "var i; var x = 0.5; var n; while (n < 3) { i = 0; while (i < 20) { x = -x; "
+        "i = i + 1; } x = x < 1; n = n + 1; }"
+    )
+    expected, _, _ = run_source(source, None)
+    variables, _, vm = run_source(source)
+    assert variables == expected, "should fall back on a type guard failure"
+    inner = vm.jit.stats[max(vm.jit.stats)]
+    assert inner.guard_failures >= 1, "should count the failed guard"
+    assert inner.tier_ups <= MAX_RECORDINGS, "should record a bounded number of times"
+
+
+def test_jit_trace_source():
+    _, _, vm = run_source("var i; while (i < 100) { i = i + 1; }")
+    trace = vm.jit.trace(min(vm.jit.stats))
+    assert trace is not None, "should keep the compiled trace"
+    assert "type(v0) is not int" in trace.source, "should guard the entry types"
+    assert f"return {GUARD_FAILED}" in trace.source, "should return on a bad type"
+
+
+def test_jit_division_by_zero_reports_line():
+    source = "var i = 20;\nvar x;\nwhile (i > -1) {\n  x = 1 / i;\n  i = i - 1;\n}\n"
+    with pytest.raises(ZeroDivisionError, match="at line 4"):
+        _ = run_source(source)
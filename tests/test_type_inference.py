@@ -0,0 +1,55 @@
+import io
+import pytest
+
+from src.abstract_syntax_tree import AbstractSyntaxTree
+from src.compiler import Compiler
+from src.python_backend import compile_program, run_code
+from src.tokenizer import Tokenizer
+from src.type_inference import infer_types
+from src.vm import VirtualMachine
+
+
+def parse_source(source: str) -> AbstractSyntaxTree:
+    tree = AbstractSyntaxTree()
+    _ = tree.parse_tokens(Tokenizer().iter_tokens(io.StringIO(source)))
+    return tree
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ("var i; i = i + 1;", {"i": int}),
+        ("var x = 0x10; var y = x * 2 - 1;", {"x": int, "y": int}),
+        ("var x = 1; var y = x / 1;", {"x": int, "y": float}),
+        ("var x; x = x / 2;", {"x": float}),
+        ("var x = 1.5; var c = x < 2;", {"x": float, "c": int}),
+        ("var x = 1; x = x + 0.5;", {"x": None}),
+        ("var a; var b = a; a = b + 1.0;", {"a": None, "b": None}),
+        ("var a; var b = a + 1.5; b = b * 2;", {"a": int, "b": float}),
+    ],
+)
+def test_infer_types(source: str, expected: dict[str, type | None]):
+    assert infer_types(parse_source(source)) == expected, (
+        f"should infer the types of {source}"
+    )
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ("var x = 9007199254740993; print(x + 0);", "9007199254740993\n"),
+        ("var i; while (i < 3) { i = i + 1; } print(i);", "3\n"),
+        ("var x = 3; print(x / 1);", "3.0\n"),
+        ("var x; x = x / 2; print(x);", "0.0\n"),
+        ("var x = 7; print(x % 4 * 2.0);", "6.0\n"),
+    ],
+)
+def test_integer_programs_exact(source: str, expected: str):
+    tree = parse_source(source)
+    output = io.StringIO()
+    _ = VirtualMachine(output).run(Compiler().compile_tree(tree))
+    assert output.getvalue() == expected, "should keep int arithmetic exact"
+
+    output = io.StringIO()
+    _ = run_code(compile_program(tree), output)
+    assert output.getvalue() == expected, "should print like the VM"
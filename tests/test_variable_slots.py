@@ -0,0 +1,43 @@
+import pytest
+
+from src.variable_slots import VariableSlots
+
+
+def test_slots_are_stable():
+    variables = VariableSlots({"x": 1.0, "y": 2.0})
+    x = variables.slot("x")
+    del variables["x"]
+    variables["z"] = 3.0
+    variables["x"] = 4.0
+    assert variables.slot("x") == x, "should keep the slot of a deleted name"
+    assert variables.slots() == {"x": 0, "y": 1, "z": 2}, "should number names in order"
+    assert variables.values[x] == 4.0, "should store values by slot"
+
+
+def test_slots_mapping_view():
+    variables = VariableSlots({"x": 1.0})
+    _ = variables.slot("unset")
+    assert variables == {"x": 1.0}, "should hide empty slots"
+    assert "unset" not in variables and len(variables) == 1, "should not count empty slots"
+    with pytest.raises(KeyError):
+        _ = variables["unset"]
+    with pytest.raises(KeyError):
+        del variables["unset"]
+    assert variables.get("unset", 5.0) == 5.0, "should support the mapping helpers"
+
+
+def test_slots_register():
+    variables = VariableSlots({"x": 1.0})
+    assert variables.register("x") == 0 and variables["x"] == 1.0, (
+        "should keep the value of a registered name"
+    )
+    assert variables.register("y") == 1 and variables["y"] == 0.0, (
+        "should default a new name to 0.0"
+    )
+
+
+def test_slots_replace():
+    variables = VariableSlots({"x": 1.0, "y": 2.0})
+    variables.replace({"y": 3.0, "z": 4.0})
+    assert variables == {"y": 3.0, "z": 4.0}, "should replace every value"
+    assert variables.slots() == {"x": 0, "y": 1, "z": 2}, "should keep old slots"
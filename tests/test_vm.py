@@ -0,0 +1,217 @@
+import io
+import pytest
+
+from src.bytecode import Bytecode, OpCode
+from src.compiler import Compiler
+from src.evaluator import Evaluator
+from src.exceptions.BytecodeError import BytecodeError
+from src.exceptions.ExpressionError import ExpressionError
+from src.exceptions.JoySyntaxError import JoySyntaxError
+from src.exceptions.VariableDuplicateName import VariableDuplicateName
+from src.exceptions.VariableIllegalName import VariableIllegalName
+from src.tokenizer import Tokenizer
+from src.vm import VirtualMachine
+
+
+def compile_source(source: str) -> Bytecode:
+    return Compiler().compile(Tokenizer().iter_tokens(io.StringIO(source)))
+
+
+def run_source(source: str) -> tuple[dict[str, float | str], str]:
+    output = io.StringIO()
+    variables = VirtualMachine(output).run(compile_source(source))
+    return variables, output.getvalue()
+
+
+def test_vm_while():
+    variables, output = run_source(
+        "var i; var total; while (i < 5) { total = total + i; i = i + 1; } "
+        "print(total);"
+    )
+    assert variables == {"i": 5.0, "total": 10.0}, "should loop until false"
+    assert output == "10\n", "should print the sum of the loop"
+
+
+def test_vm_sum():
+    variables, output = run_source(
+        "var x; x = 2; var y; y = 2; x = x + y; print(x);"
+    )
+    assert variables == {"x": 4.0, "y": 2.0}, "should store every variable"
+    assert output == "4\n", "should print the sum"
+
+
+@pytest.mark.parametrize(
+    "x, expected",
+    [(2, "even\n"), (3, "odd\n")],
+)
+def test_vm_if_else(x: int, expected: str):
+    _, output = run_source(
+        f'var x; x = {x}; if (x % 2) {{ print("odd"); }} else {{ print("even"); }}'
+    )
+    assert output == expected, f"should take the {expected.strip()} branch"
+
+
+@pytest.mark.parametrize(
+    "x, expected",
+    [(1, "one\n"), (2, "two\n"), (3, "other\n")],
+)
+def test_vm_else_if(x: int, expected: str):
+    _, output = run_source(
+        f"var x = {x};"
+        + 'if (x == 1) { print("one"); }'
+        + ' else if (x == 2) { print("two"); }'
+        + ' else { print("other"); }'
+    )
+    assert output == expected, "should take one branch of an else if chain"
+
+
+def test_vm_if_without_else():
+    _, output = run_source('var x = 0; if (x) { print("yes"); } print("done");')
+    assert output == "done\n", "should skip a false if without else"
+
+
+branch_programs = [
+    'var x = 2; if (x % 2) { print("odd"); } else { print("even"); }',
+    "var x = 2; var y; if (x == 1) { y = 1; } else if (x == 2) { y = 2; "
+    "if (y > 1) { print(y); } } else { y = 3; } print(y);",
+    "var i; var t; while (i < 100) { if (i < 50) { t = t + 1; } i = i + 1; } "
+    "if (t >= 50) { print(t); }",
+    "var x = 1; if (x) { var y = 3; print(y * x); } print(y);",
+]
+
+
+@pytest.mark.parametrize("source", branch_programs)
+def test_vm_lazy_branches(source: str):
+    expected = run_source(source)
+    compiler = Compiler(lazy=True)
+    bytecode = compiler.compile(Tokenizer().iter_tokens(io.StringIO(source)))
+    output = io.StringIO()
+    variables = VirtualMachine(output).run(bytecode, compiler.compile_branch)
+    assert (variables, output.getvalue()) == expected, (
+        "should run like the eagerly compiled program"
+    )
+
+
+def test_vm_lazy_branch_compiled_once_taken():
+    source = "var x = 1; if (x < 1) { x = 2; } else { x = 3; } print(x);"
+    compiler = Compiler(lazy=True)
+    bytecode = compiler.compile(Tokenizer().iter_tokens(io.StringIO(source)))
+    stubs = [op for _, op, _ in bytecode.instructions() if op == OpCode.LAZY_BRANCH]
+    assert len(stubs) == 2, "should leave both branches uncompiled"
+
+    _ = VirtualMachine(io.StringIO()).run(bytecode, compiler.compile_branch)
+    ops = [op for _, op, _ in bytecode.instructions()]
+    assert ops.count(OpCode.LAZY_BRANCH) == 1, "should only compile the taken branch"
+    with pytest.raises(BytecodeError, match="not compiled yet"):
+        _ = bytecode.to_bytes()
+    with pytest.raises(BytecodeError, match="is not compiled"):
+        _ = VirtualMachine(io.StringIO()).run(
+            compiler.compile(Tokenizer().iter_tokens(io.StringIO(source)))
+        )
+
+
+def test_compiler_fuses_comparison_and_branch():
+    bytecode = compile_source("var x = 1; if (x < 2) { x = 2; } print(x);")
+    ops = [op for _, op, _ in bytecode.instructions()]
+    assert OpCode.JUMP_UNLESS_LESS in ops, "should branch on the comparison"
+    assert OpCode.LESS not in ops, "should not push the comparison's result"
+
+
+vm_expressions = [
+    "1 + 2 * 4 - 3",
+    "(1 + 2) * (4 - 3)",
+    "-a + 3 * -(b - 2)",
+    "a / b + 7 % 4",
+    "a < b",
+    "a != b - 1",
+    "2 * (a + 1) >= b",
+]
+
+
+@pytest.mark.parametrize("expression", vm_expressions)
+def test_vm_matches_evaluator(expression: str):
+    variables = {"a": 3.0, "b": 4.0}
+    evaluator = Evaluator(variables=dict(variables))
+    expected = evaluator.evaluate(expression)
+    result, _ = run_source(f"var a = 3; var b = 4; var result = {expression};")
+    assert result["result"] == expected, f"should evaluate {expression} like evaluate"
+
+
+def test_vm_division_by_zero_reports_line():
+    with pytest.raises(ZeroDivisionError, match="at line 2"):
+        _ = run_source("var x = 0;\nvar y = 1 / x;")
+
+
+def test_compiler_undeclared_variable():
+    with pytest.raises(JoySyntaxError, match="Variable y is not declared at line 1"):
+        _ = compile_source("var x = y + 1;")
+
+
+def test_compiler_assignment_needs_declaration():
+    with pytest.raises(JoySyntaxError, match="Variable x is not declared"):
+        _ = compile_source("x = 1;")
+
+
+def test_compiler_duplicate_variable():
+    with pytest.raises(VariableDuplicateName, match="Variable name x already registered"):
+        _ = compile_source("var x; var x;")
+
+
+def test_compiler_keyword_variable():
+    with pytest.raises(VariableIllegalName, match="containing keywords print"):
+        _ = compile_source("var print;")
+
+
+def test_compiler_missing_semicolon():
+    with pytest.raises(JoySyntaxError, match="Expected ';'"):
+        _ = compile_source("var x = 1 print(x);")
+
+
+def test_compiler_else_without_if():
+    with pytest.raises(JoySyntaxError, match="Unexpected keyword 'else' at line 1"):
+        _ = compile_source("var x; else { x = 1; }")
+
+
+def test_compiler_invalid_expression():
+    with pytest.raises(ExpressionError):
+        _ = compile_source("var x = 1 +;")
+
+
+def test_compiler_folds_constants():
+    bytecode = compile_source("var x = 2 * 3 + 1;")
+    ops = [op for _, op, _ in bytecode.instructions()]
+    assert ops == [OpCode.STORE_CONST], "should fold 2 * 3 + 1"
+    assert bytecode.consts == [7], "should keep only the folded constant"
+
+
+def test_compiler_shares_constants():
+    bytecode = compile_source('var x = 1; var y = 1; print("1"); print("1");')
+    assert bytecode.consts == [1, "1"], "should store each constant once"
+
+
+def test_bytecode_round_trip():
+    bytecode = compile_source('var x = 2;\nif (x > 1) { print("big"); }')
+    loaded = Bytecode.from_bytes(bytecode.to_bytes())
+    assert loaded == bytecode, "should load the bytecode it saved"
+    assert list(loaded.lines) == list(bytecode.lines), "should keep source lines"
+
+
+def test_bytecode_wrong_magic():
+    with pytest.raises(BytecodeError, match="Not a Joy bytecode file"):
+        _ = Bytecode.from_bytes(b"nope")
+
+
+def test_bytecode_wrong_version():
+    data = bytearray(compile_source("var x;").to_bytes())
+    data[4] += 1
+    with pytest.raises(BytecodeError, match="does not match"):
+        _ = Bytecode.from_bytes(bytes(data))
+
+
+def test_bytecode_disassemble():
+    listing = compile_source("var x = 1;\nprint(x);").disassemble()
+    assert "STORE_CONST" in listing and "(1, x)" in listing, (
+        "should show the constants and names of a superinstruction"
+    )
+    assert "LOAD_VAR" in listing and "(x)" in listing, "should show names"
+    assert listing.splitlines()[-1].split()[0] == "2", "should show source lines"